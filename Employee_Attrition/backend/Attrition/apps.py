@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AttritionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Attrition'
+
+    def ready(self):
+        from Attrition import signals  # noqa: F401
@@ -0,0 +1,33 @@
+import os
+import pickle
+from django.core.management.base import BaseCommand
+from Attrition.services.artifact import artifact_path, save_forest_artifact
+from Attrition.services.encoder import FeatureEncoder
+from Attrition.services.registry import ModelRegistry
+
+
+class Command(BaseCommand):
+    help = "Write memory-mappable .forest artifacts for registered .sav models that lack one"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Rewrite existing artifacts")
+
+    def handle(self, *args, **options):
+        models_dir = os.path.join(os.getcwd(), 'pickle', 'models')
+        for info in ModelRegistry().list(include_features=False):
+            model_path = os.path.join(models_dir, info['filename'])
+            if not os.path.exists(model_path):
+                self.stdout.write(f"{info['model_id']}: model file missing, skipped")
+                continue
+            if os.path.exists(artifact_path(model_path)) and not options['force']:
+                continue
+
+            with open(model_path, 'rb') as f:
+                model_data = pickle.load(f)
+
+            encoder_data = model_data.get('encoder')
+            if encoder_data is None:
+                encoder_data = FeatureEncoder.from_feature_names(model_data['feature_names']).to_dict()
+
+            path = save_forest_artifact(model_path, model_data['model'], encoder_data)
+            self.stdout.write(f"{info['model_id']}: {'wrote ' + os.path.basename(path) if path else 'not a supported forest'}")
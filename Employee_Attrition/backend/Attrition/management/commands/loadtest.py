@@ -0,0 +1,308 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import tempfile
+import threading
+import subprocess
+import http.client
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from Attrition.serializers import EmployeeCreateSerializer
+
+DEFAULT_MIX = 'prediction=50,models=10,employee=30,add=10'
+SERVERS = ('asgi', 'wsgi', 'runserver')
+
+
+def parse_mix(mix):
+    """'name=weight,...' into {name: weight}"""
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+class LocalServer:
+    """Backend process on a scratch copy of the database, run from its own working directory"""
+
+    def __init__(self, run_dir, port, server='asgi', workers=1, stdout=sys.stdout):
+        self.run_dir = run_dir
+        self.port = port
+        self.server = server
+        self.workers = workers
+        self.stdout = stdout
+        self.db_path = os.path.join(run_dir, 'db.sqlite3')
+        self.process = None
+        os.makedirs(os.path.join(run_dir, 'log'), exist_ok=True)
+        os.makedirs(os.path.join(run_dir, 'pickle', 'models'), exist_ok=True)
+
+    def _env(self):
+        env = dict(os.environ, ATTRITION_DB_PATH=self.db_path, DJANGO_SETTINGS_MODULE='backend.settings')
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(settings.BASE_DIR), env.get('PYTHONPATH')]))
+        return env
+
+    def manage(self, *args):
+        """Run a manage.py command against the scratch database"""
+        subprocess.run(
+            [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), *args],
+            cwd=self.run_dir, env=self._env(), check=True, stdout=subprocess.DEVNULL
+        )
+
+    def seed(self, db_path=None, csv_path=None):
+        """Copy an existing database, or migrate a new one and import a CSV into it"""
+        if db_path:
+            shutil.copyfile(db_path, self.db_path)
+            self.manage('migrate', '--noinput')
+            return
+        self.manage('migrate', '--noinput')
+        self.manage('import_employees', csv_path, '--no-rescore')
+
+    def start(self, timeout=60):
+        bind = f"127.0.0.1:{self.port}"
+        if self.server == 'runserver':
+            command = [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'),
+                       'runserver', '--noreload', bind]
+        else:
+            command = [sys.executable, '-m', 'gunicorn', f"backend.{self.server}:application",
+                       '--bind', bind, '--workers', str(self.workers), '--log-level', 'warning']
+            if self.server == 'asgi':
+                command += ['-k', 'uvicorn.workers.UvicornWorker']
+        log = open(os.path.join(self.run_dir, 'log', 'server.log'), 'w')
+        self.process = subprocess.Popen(command, cwd=self.run_dir, env=self._env(), stdout=log, stderr=log)
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise CommandError(f"Server exited early, see {log.name}")
+            try:
+                status, _ = self.request('GET', '/models/')
+                if status == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        raise CommandError(f"Server did not start within {timeout}s")
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+    def request(self, method, path, body=None, timeout=600):
+        """One request on a fresh connection; returns (status, decoded JSON or None)"""
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=timeout)
+        try:
+            headers = {'Content-Type': 'application/json'} if body is not None else {}
+            conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+            response = conn.getresponse()
+            data = response.read()
+            try:
+                return response.status, json.loads(data)
+            except ValueError:
+                return response.status, None
+        finally:
+            conn.close()
+
+
+class LoadGenerator:
+    """Closed-loop load: each of `concurrency` threads sends its next request as soon as one returns"""
+
+    def __init__(self, port, scenarios, weights, concurrency=8, duration=30, warmup=2):
+        self.port = port
+        self.scenarios = scenarios
+        self.names = list(weights)
+        self.weights = [weights[name] for name in self.names]
+        self.concurrency = concurrency
+        self.duration = duration
+        self.warmup = warmup
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def _worker(self, seed, start, end):
+        rng = random.Random(seed)
+        samples = []
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        while time.monotonic() < end:
+            name = rng.choices(self.names, self.weights)[0]
+            method, path, body = self.scenarios[name](rng)
+            headers = {'Content-Type': 'application/json'} if body is not None else {}
+            sent = time.monotonic()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                # Reconnect after a dropped keep-alive connection or timeout
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+                status = None
+            finished = time.monotonic()
+            if sent >= start:
+                samples.append((name, sent, finished - sent, status))
+        conn.close()
+        with self._lock:
+            self.samples.extend(samples)
+
+    def run(self):
+        start = time.monotonic() + self.warmup
+        end = start + self.duration
+        threads = [
+            threading.Thread(target=self._worker, args=(seed, start, end), daemon=True)
+            for seed in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.report()
+
+    def _summary(self, samples):
+        latencies = np.array([s[2] for s in samples]) * 1000
+        errors = sum(1 for s in samples if s[3] is None or s[3] >= 400)
+        summary = {
+            'requests': len(samples),
+            'rps': len(samples) / self.duration,
+            'errors': errors,
+            'error_rate': errors / len(samples) if samples else 0.0,
+            'status_codes': {}
+        }
+        for s in samples:
+            code = str(s[3]) if s[3] is not None else 'connection_error'
+            summary['status_codes'][code] = summary['status_codes'].get(code, 0) + 1
+        if samples:
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            summary.update({'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99),
+                            'max_ms': float(latencies.max())})
+        return summary
+
+    def report(self):
+        endpoints = {
+            name: self._summary([s for s in self.samples if s[0] == name])
+            for name in self.names
+        }
+        return {'overall': self._summary(self.samples), 'endpoints': endpoints}
+
+
+class Command(BaseCommand):
+    help = ("Start the backend on a scratch SQLite database and drive prediction, model, "
+            "employee and add-employee endpoints with concurrent HTTP load")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8, help="Concurrent client threads")
+        parser.add_argument('--duration', type=float, default=30, help="Measured seconds of load")
+        parser.add_argument('--warmup', type=float, default=2, help="Seconds of load discarded first")
+        parser.add_argument('--mix', default=DEFAULT_MIX,
+                            help="Endpoint weights, from prediction, prediction_async, models, employee, add")
+        parser.add_argument('--server', choices=SERVERS, default='asgi',
+                            help="gunicorn with uvicorn workers (asgi), gunicorn sync workers (wsgi) or runserver")
+        parser.add_argument('--workers', type=int, default=1, help="gunicorn worker processes")
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--db', help="Copy this SQLite database instead of seeding a new one")
+        parser.add_argument('--csv', default=os.path.join(settings.BASE_DIR, 'Employee_Attrition_Prediction.csv'),
+                            help="CSV imported into a new database")
+        parser.add_argument('--model-id', help="Registered model to predict with instead of training one")
+        parser.add_argument('--trees', type=int, default=100, help="n_estimators of the model trained for the run")
+        parser.add_argument('--output', help="Write the report as JSON to this path")
+        parser.add_argument('--keep', action='store_true', help="Keep the scratch directory")
+
+    def handle(self, *args, **options):
+        weights = parse_mix(options['mix'])
+        unknown = set(weights) - {'prediction', 'prediction_async', 'models', 'employee', 'add'}
+        if unknown:
+            raise CommandError(f"Unknown endpoints in --mix: {', '.join(sorted(unknown))}")
+
+        run_dir = tempfile.mkdtemp(prefix='attrition-loadtest-')
+        server = LocalServer(run_dir, options['port'], options['server'], options['workers'])
+        try:
+            self.stdout.write(f"Seeding scratch database in {run_dir}")
+            server.seed(options['db'], options['csv'])
+            server.start()
+            scenarios = self.build_scenarios(server, options)
+
+            self.stdout.write(
+                f"Running {options['duration']:.0f}s at concurrency {options['concurrency']} "
+                f"against {options['server']} ({options['mix']})"
+            )
+            report = LoadGenerator(
+                options['port'], scenarios, weights,
+                concurrency=options['concurrency'],
+                duration=options['duration'],
+                warmup=options['warmup']
+            ).run()
+        finally:
+            server.stop()
+            if not options['keep']:
+                shutil.rmtree(run_dir, ignore_errors=True)
+
+        report['config'] = {k: options[k] for k in ('concurrency', 'duration', 'mix', 'server', 'workers')}
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def build_scenarios(self, server, options):
+        """Request factories per endpoint, using data fetched from the running server"""
+        model_id = options['model_id']
+        if not model_id:
+            self.stdout.write(f"Training a {options['trees']}-tree model")
+            status, body = server.request('POST', '/training/', {'model_params': {'n_estimators': options['trees']}})
+            if status != 200:
+                raise CommandError(f"Training failed: {body}")
+            model_id = body['model_id']
+
+        status, body = server.request('GET', '/prediction/prefilled-predictions/?page_size=1000')
+        employee_numbers = [row['employeeNumber'] for row in (body or {}).get('results', [])]
+        if not employee_numbers:
+            raise CommandError("No holdout employees to load test with")
+
+        records = []
+        for number in employee_numbers[:200]:
+            status, record = server.request('GET', f'/prediction/prefilled-predictions/{number}/')
+            if status == 200:
+                records.append(record)
+
+        # Payloads the add endpoint accepts; EmployeeNumber is assigned by the server
+        new_employees = [
+            {k: v for k, v in record.items() if k not in ('EmployeeNumber', 'Attrition')}
+            for record in records
+        ]
+        new_employees = [e for e in new_employees if EmployeeCreateSerializer(data=e).is_valid()]
+        if not new_employees:
+            raise CommandError("No holdout record passes add-employee validation")
+
+        def prediction(path):
+            def scenario(rng):
+                data = dict(rng.choice(records))
+                return 'POST', path, json.dumps({'model_id': model_id, 'data': data})
+            return scenario
+
+        return {
+            'prediction': prediction('/prediction/'),
+            'prediction_async': prediction('/prediction/async/'),
+            'models': lambda rng: ('GET', '/models/', None),
+            'employee': lambda rng: ('GET', f'/prediction/prefilled-predictions/{rng.choice(employee_numbers)}/', None),
+            'add': lambda rng: ('POST', '/employees/add/', json.dumps(rng.choice(new_employees)))
+        }
+
+    def print_report(self, report):
+        header = f"{'endpoint':<18}{'requests':>10}{'rps':>10}{'errors':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        self.stdout.write(header)
+        rows = list(report['endpoints'].items()) + [('overall', report['overall'])]
+        for name, summary in rows:
+            if not summary['requests']:
+                self.stdout.write(f"{name:<18}{0:>10}")
+                continue
+            self.stdout.write(
+                f"{name:<18}{summary['requests']:>10}{summary['rps']:>10.1f}"
+                f"{summary['error_rate']:>9.1%}{summary['p50_ms']:>10.1f}"
+                f"{summary['p95_ms']:>10.1f}{summary['p99_ms']:>10.1f}"
+            )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from Attrition.services.feature_store import feature_store
+
+
+class Command(BaseCommand):
+    help = "Check the encoded training matrix against a full hash of the training rows, rebuilding it on a mismatch"
+
+    def handle(self, *args, **options):
+        ok, dataset = feature_store.verify()
+        if ok:
+            self.stdout.write(self.style.SUCCESS(
+                f"Feature store version {dataset.version[:12]} matches the training rows ({len(dataset)} rows)"))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"Feature store was stale; rebuilt as version {dataset.version[:12]} ({len(dataset)} rows)"))
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.10 on 2026-10-18 07:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Attrition', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeatureSchema',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('schema_hash', models.CharField(max_length=64, unique=True)),
+                ('features', models.JSONField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrainedModel',
+            fields=[
+                ('model_id', models.CharField(max_length=36, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('timestamp', models.DateTimeField(db_index=True)),
+                ('params', models.JSONField(default=dict)),
+                ('metrics', models.JSONField(default=dict)),
+                ('inference_backend', models.CharField(blank=True, max_length=20, null=True)),
+                ('schema', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='models', to='Attrition.featureschema')),
+            ],
+            options={
+                'ordering': ['timestamp'],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+from django.db import migrations
+
+
+def import_model_metadata(apps, schema_editor):
+    """Copy entries from pickle/model_metadata.json into the registry tables"""
+    FeatureSchema = apps.get_model('Attrition', 'FeatureSchema')
+    TrainedModel = apps.get_model('Attrition', 'TrainedModel')
+
+    metadata_file = os.path.join(os.getcwd(), 'pickle', 'model_metadata.json')
+    if not os.path.exists(metadata_file):
+        return
+
+    with open(metadata_file, 'r') as f:
+        metadata = json.load(f)
+
+    for info in metadata.get('models', []):
+        if TrainedModel.objects.filter(model_id=info['model_id']).exists():
+            continue
+
+        features = info.get('features') or []
+        schema, _ = FeatureSchema.objects.get_or_create(
+            schema_hash=hashlib.sha256(json.dumps(features).encode('utf-8')).hexdigest(),
+            defaults={'features': features}
+        )
+
+        timestamp = datetime.fromisoformat(info['timestamp'])
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+
+        TrainedModel.objects.create(
+            model_id=info['model_id'],
+            filename=info['filename'],
+            timestamp=timestamp,
+            params=info.get('params', {}),
+            metrics=info.get('metrics', {}),
+            schema=schema,
+            inference_backend=info.get('inference_backend')
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Attrition', '0002_model_registry'),
+    ]
+
+    operations = [
+        migrations.RunPython(import_model_metadata, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+def normalize_attrition(apps, schema_editor):
+    """Rewrite boolean-style Attrition values from the old import script as 'Yes'/'No'"""
+    EmployeeData = apps.get_model('Attrition', 'EmployeeData')
+    EmployeeData.objects.filter(Attrition__in=['True', 'true', '1']).update(Attrition='Yes')
+    EmployeeData.objects.filter(Attrition__in=['False', 'false', '0']).update(Attrition='No')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Attrition', '0004_training_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_attrition, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.10 on 2026-10-18 07:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Attrition', '0005_normalize_attrition'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainedmodel',
+            name='is_promoted',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.CreateModel(
+            name='RiskScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department', models.CharField(max_length=100)),
+                ('probability', models.FloatField()),
+                ('prediction', models.CharField(max_length=3)),
+                ('confidence', models.CharField(max_length=10)),
+                ('scored_at', models.DateTimeField(auto_now=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='risk_scores', to='Attrition.employeedata')),
+                ('model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='risk_scores', to='Attrition.trainedmodel')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['model', 'probability'], name='risk_model_probability_idx'), models.Index(fields=['model', 'department', 'probability'], name='risk_model_dept_prob_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='riskscore',
+            constraint=models.UniqueConstraint(fields=('employee', 'model'), name='unique_employee_model_score'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.10 on 2026-10-18 07:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Attrition', '0006_risk_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainedmodel',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='Attrition.trainedmodel'),
+        ),
+        migrations.AddField(
+            model_name='trainedmodel',
+            name='trained_through',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
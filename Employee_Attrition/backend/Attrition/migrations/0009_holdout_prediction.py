@@ -0,0 +1,34 @@
+# Generated by Django 4.2.10 on 2026-10-18 08:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Attrition', '0008_data_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HoldoutPrediction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data_version', models.BigIntegerField()),
+                ('probability', models.FloatField()),
+                ('prediction', models.CharField(max_length=3)),
+                ('actual', models.CharField(max_length=3)),
+                ('scored_at', models.DateTimeField(auto_now=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holdout_predictions', to='Attrition.employeedata')),
+                ('model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holdout_predictions', to='Attrition.trainedmodel')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['model', 'data_version'], name='holdout_model_version_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='holdoutprediction',
+            constraint=models.UniqueConstraint(fields=('employee', 'model'), name='unique_employee_model_holdout'),
+        ),
+    ]
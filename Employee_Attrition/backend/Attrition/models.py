@@ -40,3 +40,104 @@ class EmployeeData(models.Model):
     def __str__(self):
         return f"{self.employee_number} - Attrition: {self.attrition}"
 
+
+class FeatureSchema(models.Model):
+    schema_hash = models.CharField(max_length=64, unique=True)  # sha256 of the ordered feature list
+    features = models.JSONField()
+
+    def __str__(self):
+        return f"{self.schema_hash[:12]} - {len(self.features)} features"
+
+class TrainedModel(models.Model):
+    model_id = models.CharField(max_length=36, primary_key=True)
+    filename = models.CharField(max_length=255)
+    timestamp = models.DateTimeField(db_index=True)
+    params = models.JSONField(default=dict)
+    metrics = models.JSONField(default=dict)
+    schema = models.ForeignKey(FeatureSchema, on_delete=models.PROTECT, related_name='models')
+    inference_backend = models.CharField(max_length=20, null=True, blank=True)
+    is_promoted = models.BooleanField(default=False, db_index=True)  # Model behind the risk-score table
+    parent = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True,
+                               related_name='children')  # Model an incremental version was grown from
+    trained_through = models.IntegerField(null=True, blank=True)  # Highest EmployeeNumber in the training data
+
+    class Meta:
+        ordering = ['timestamp']
+
+    def __str__(self):
+        return f"{self.model_id} - {self.timestamp}"
+
+class TrainingJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    job_id = models.UUIDField(primary_key=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued', db_index=True)
+    request_data = models.JSONField(default=dict)
+    model_id = models.CharField(max_length=36, null=True, blank=True)
+    metrics = models.JSONField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.job_id} - {self.status}"
+
+class RiskScore(models.Model):
+    employee = models.ForeignKey(EmployeeData, on_delete=models.CASCADE, related_name='risk_scores')
+    model = models.ForeignKey(TrainedModel, on_delete=models.CASCADE, related_name='risk_scores')
+    department = models.CharField(max_length=100)  # Copied from the employee for indexed filtering
+    probability = models.FloatField()
+    prediction = models.CharField(max_length=3)
+    confidence = models.CharField(max_length=10)
+    scored_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'model'], name='unique_employee_model_score')
+        ]
+        indexes = [
+            models.Index(fields=['model', 'probability'], name='risk_model_probability_idx'),
+            models.Index(fields=['model', 'department', 'probability'], name='risk_model_dept_prob_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} / {self.model_id} - {self.probability:.3f}"
+
+
+class HoldoutPrediction(models.Model):
+    # Holdout scores stored by a model comparison; kept apart from RiskScore,
+    # which holds full rankings of every employee
+    employee = models.ForeignKey(EmployeeData, on_delete=models.CASCADE, related_name='holdout_predictions')
+    model = models.ForeignKey(TrainedModel, on_delete=models.CASCADE, related_name='holdout_predictions')
+    data_version = models.BigIntegerField()  # Employee data version the holdout was read at
+    probability = models.FloatField()
+    prediction = models.CharField(max_length=3)
+    actual = models.CharField(max_length=3)  # Attrition when the holdout was scored
+    scored_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'model'], name='unique_employee_model_holdout')
+        ]
+        indexes = [
+            models.Index(fields=['model', 'data_version'], name='holdout_model_version_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} / {self.model_id} @ {self.data_version} - {self.probability:.3f}"
+
+class DataVersion(models.Model):
+    name = models.CharField(max_length=50, primary_key=True)  # Data set the counter tracks, e.g. 'employees'
+    version = models.BigIntegerField(default=0)  # Bumped by every write path that changes the data
+
+    def __str__(self):
+        return f"{self.name} - {self.version}"
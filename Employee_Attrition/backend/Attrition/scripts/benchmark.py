@@ -0,0 +1,290 @@
+import os
+import sys
+import json
+import time
+import pickle
+import platform
+import tempfile
+import numpy as np
+import pandas as pd
+import sklearn
+from datetime import datetime
+from django.conf import settings
+from imblearn.over_sampling import SMOTE
+from sklearn.model_selection import train_test_split
+from Attrition.models import EmployeeData
+from Attrition.services.artifact import artifact_path, save_forest_artifact
+from Attrition.services.encoder import FeatureEncoder
+from Attrition.services.forest import CompiledForest
+from Attrition.services.model_cache import model_cache
+from Attrition.services.prediction import Prediction
+from Attrition.services.training import Training
+
+# Micro-benchmarks for the training and prediction hot paths, run on the
+# bundled CSV and on upscaled copies of it.
+# Usage:
+#   python manage.py runscript benchmark --script-args run [sizes=10000,100000,1000000]
+#       [output=benchmark.json] [repeats=20] [trees=100] [batch_rows=100000] [model_id=<id>]
+#   python manage.py runscript benchmark --script-args compare <baseline.json> <results.json> [threshold=0.10]
+#
+# No baseline is committed: timings only compare on the same machine and
+# library versions. Record one from the commit to compare against, then run
+# the change and compare:
+#   git checkout <base commit> && python manage.py runscript benchmark --script-args run output=baseline.json
+#   git checkout <branch> && python manage.py runscript benchmark --script-args run output=benchmark.json
+#   python manage.py runscript benchmark --script-args compare baseline.json benchmark.json
+
+DATASET = os.path.join(settings.BASE_DIR, 'Employee_Attrition_Prediction.csv')
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+
+def time_call(func, repeats):
+    """Return (median, min) wall time of func in milliseconds"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings)), float(np.min(timings))
+
+
+def load_bundled_frame():
+    """The bundled CSV typed like load_employee_frame: int32 and sorted categoricals"""
+    df = pd.read_csv(DATASET)
+    data = {}
+    for field in EmployeeData._meta.concrete_fields:
+        column = df[field.name]
+        if column.dtype == object:
+            data[field.name] = pd.Categorical(column, categories=sorted(column.unique()))
+        else:
+            data[field.name] = column.to_numpy(dtype=np.int32)
+    return pd.DataFrame(data)
+
+
+def upscale(df, n_rows, seed=0):
+    """Resample rows to n_rows, keeping each column's distribution.
+
+    Rows are drawn with replacement, so categorical frequencies and the
+    joint structure are preserved; wide-range integer columns get small
+    noise clipped to their observed range so the copies are not exact
+    duplicates.
+    """
+    rng = np.random.default_rng(seed)
+    sample = df.iloc[rng.integers(0, len(df), n_rows)].reset_index(drop=True)
+    for column in df.columns:
+        if column == 'EmployeeNumber' or isinstance(df[column].dtype, pd.CategoricalDtype):
+            continue
+        if df[column].nunique() <= 50:
+            continue
+        noise = np.rint(rng.normal(0, 0.02 * df[column].std(), n_rows))
+        sample[column] = np.clip(
+            sample[column].to_numpy() + noise, df[column].min(), df[column].max()
+        ).astype(np.int32)
+    sample['EmployeeNumber'] = np.arange(1, n_rows + 1, dtype=np.int32)
+    return sample
+
+
+class BenchmarkRunner:
+    """Times each hot path on one dataset and collects the results by name"""
+
+    def __init__(self, repeats=20, trees=100, batch_rows=100000, model_id=None):
+        self.repeats = repeats
+        self.trees = trees
+        self.batch_rows = batch_rows
+        self.model_id = model_id
+        self.trainer = Training()
+        self.predictor = Prediction()
+        self.results = {}
+
+    def record(self, dataset, name, rows, func, repeats=None):
+        repeats = repeats or self.repeats
+        median_ms, min_ms = time_call(func, repeats)
+        key = f"{dataset}/{name}"
+        self.results[key] = {'median_ms': median_ms, 'min_ms': min_ms, 'repeats': repeats, 'rows': rows}
+        print(f"{key:<45} {median_ms:>12.3f} ms  (min {min_ms:.3f}, n={repeats})")
+
+    def run_training(self, dataset, df):
+        """preprocess_data, SMOTE and train_model on an 80/20 split"""
+        heavy_repeats = 1 if len(df) > 10000 else 3
+        self.record(dataset, 'preprocess_data', len(df),
+                    lambda: self.trainer.preprocess_data(df), heavy_repeats)
+
+        train_df, test_df = train_test_split(df, test_size=0.2, random_state=42)
+        train_features, train_target = self.trainer.preprocess_data(train_df)
+        test_features, test_target = self.trainer.preprocess_data(test_df)
+        test_features = test_features.reindex(columns=train_features.columns, fill_value=0)
+
+        self.record(dataset, 'smote', len(train_df),
+                    lambda: SMOTE(random_state=42).fit_resample(train_features, train_target), heavy_repeats)
+
+        trained = {}
+
+        def train():
+            trained['model'], _, _ = self.trainer.train_model(
+                train_features, train_target, test_features, test_target, {'n_estimators': self.trees})
+
+        self.record(dataset, 'train_model', len(train_df), train, 1)
+        encoder = FeatureEncoder.fit(train_df, train_features.columns.tolist())
+        return trained['model'], encoder
+
+    def run_prediction(self, dataset, df, model, encoder):
+        """Model loading, input encoding and predict_proba for one row and a batch"""
+        records = df.head(self.batch_rows).to_dict('records')
+        single = records[:1]
+
+        self.record(dataset, 'preprocess_input/single', 1,
+                    lambda: self.predictor.preprocess_input(single[0], encoder))
+        self.record(dataset, 'preprocess_input/batch', len(records),
+                    lambda: self.predictor.preprocess_input(records, encoder), 3)
+
+        features, _, _ = encoder.transform(records)
+        compiled = CompiledForest.from_sklearn(model)
+        for backend, scorer in [('sklearn', model), ('compiled', compiled)]:
+            self.record(dataset, f'predict_proba/single/{backend}', 1,
+                        lambda: scorer.predict_proba(features[:1]))
+            self.record(dataset, f'predict_proba/batch/{backend}', len(features),
+                        lambda: scorer.predict_proba(features), 3)
+
+    def run_loading(self, model, encoder):
+        """Cold load of a saved model file in both formats, and a cached load_model"""
+        with tempfile.TemporaryDirectory() as directory:
+            model_path = os.path.join(directory, 'model_benchmark.sav')
+            with open(model_path, 'wb') as f:
+                pickle.dump({'model': model, 'feature_names': encoder.feature_names,
+                             'encoder': encoder.to_dict()}, f)
+            save_forest_artifact(model_path, model, encoder.to_dict())
+
+            self.record('model', 'load_model/pickle', 1,
+                        lambda: self.predictor._load_model_file(model_path))
+            self.record('model', 'load_model/artifact', 1,
+                        lambda: self.predictor._load_model_file(artifact_path(model_path)))
+
+        if self.model_id:
+            def cold():
+                model_cache.invalidate(self.model_id)
+                self.predictor.load_model(self.model_id)
+
+            self.record('model', 'load_model/registry_cold', 1, cold)
+            self.record('model', 'load_model/cached', 1, lambda: self.predictor.load_model(self.model_id))
+
+    def run(self, sizes):
+        bundled = load_bundled_frame()
+        print(f"Loaded {len(bundled)} rows from {os.path.basename(DATASET)}")
+
+        model, encoder = self.run_training('bundled', bundled)
+        self.run_loading(model, encoder)
+        self.run_prediction('bundled', bundled, model, encoder)
+
+        for size in sizes:
+            df = upscale(bundled, size)
+            dataset = f'upscaled_{size}'
+            model, encoder = self.run_training(dataset, df)
+            self.run_prediction(dataset, df, model, encoder)
+
+        return {
+            'meta': {
+                'timestamp': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'pandas': pd.__version__,
+                'sklearn': sklearn.__version__,
+                'machine': platform.machine(),
+                'cpu_count': os.cpu_count(),
+                'repeats': self.repeats,
+                'trees': self.trees,
+                'batch_rows': self.batch_rows
+            },
+            'results': self.results
+        }
+
+
+def compare(baseline, current, threshold):
+    """Compare two result files; returns the names of benchmarks that regressed"""
+    regressions = []
+    for name in sorted(set(baseline['results']) | set(current['results'])):
+        before = baseline['results'].get(name)
+        after = current['results'].get(name)
+        if before is None or after is None:
+            print(f"{name:<45} {'only in ' + ('current' if before is None else 'baseline'):>32}")
+            continue
+
+        ratio = after['median_ms'] / before['median_ms'] if before['median_ms'] else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = 'REGRESSION'
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = 'improved'
+        print(f"{name:<45} {before['median_ms']:>12.3f} -> {after['median_ms']:>12.3f} ms  x{ratio:.2f} {flag}")
+    return regressions
+
+
+def load_results(path, role):
+    """Read a results file written by run; exits with a hint when it is missing or unreadable"""
+    if not os.path.exists(path):
+        sys.exit(f"{role.capitalize()} file {path} not found; create it with "
+                 f"'runscript benchmark --script-args run output={path}' (see the usage notes in benchmark.py)")
+    try:
+        with open(path) as f:
+            results = json.load(f)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Cannot read {role} file {path}: {e}")
+    if not isinstance(results, dict) or not isinstance(results.get('results'), dict):
+        sys.exit(f"{role.capitalize()} file {path} is not benchmark output")
+    return results
+
+
+def warn_mismatched_meta(baseline, current):
+    """Timings only compare on the same machine and library versions"""
+    keys = ('machine', 'cpu_count', 'python', 'numpy', 'pandas', 'sklearn', 'trees', 'batch_rows')
+    for key in keys:
+        before, after = baseline.get('meta', {}).get(key), current.get('meta', {}).get(key)
+        if before != after:
+            print(f"Warning: {key} differs between baseline ({before}) and results ({after})")
+
+
+def parse_options(args):
+    """key=value script arguments"""
+    options = {}
+    for arg in args:
+        key, _, value = arg.partition('=')
+        options[key] = value
+    return options
+
+
+def run(*args):
+    if not args or args[0] not in ('run', 'compare'):
+        print("Usage: runscript benchmark --script-args run [sizes=...] [output=...] [repeats=N] "
+              "[trees=N] [batch_rows=N] [model_id=...]")
+        print("       runscript benchmark --script-args compare <baseline.json> <results.json> [threshold=0.10]")
+        return
+
+    if args[0] == 'compare':
+        if len(args) < 3:
+            sys.exit("compare needs a baseline and a results file")
+        baseline = load_results(args[1], 'baseline')
+        current = load_results(args[2], 'results')
+        threshold = float(parse_options(args[3:]).get('threshold', 0.10))
+        warn_mismatched_meta(baseline, current)
+
+        regressions = compare(baseline, current, threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {threshold:.0%}")
+            sys.exit(1)
+        print("No regressions")
+        return
+
+    options = parse_options(args[1:])
+    sizes = [int(s) for s in options['sizes'].split(',') if s] if 'sizes' in options else DEFAULT_SIZES
+    runner = BenchmarkRunner(
+        repeats=int(options.get('repeats', 20)),
+        trees=int(options.get('trees', 100)),
+        batch_rows=int(options.get('batch_rows', 100000)),
+        model_id=options.get('model_id')
+    )
+    results = runner.run(sizes)
+
+    output = options.get('output', 'benchmark.json')
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
@@ -0,0 +1,70 @@
+import os
+import json
+import pickle
+import time
+import numpy as np
+from Attrition.models import EmployeeData
+from Attrition.services.encoder import FeatureEncoder
+from Attrition.services.forest import CompiledForest
+from Attrition.services.prediction import Prediction
+
+# Compare sklearn predict_proba with the compiled forest backend.
+# Usage: python manage.py runscript benchmark_forest --script-args <model_id> [repeats]
+
+
+def time_call(func, repeats):
+    """Return the median wall time of func in milliseconds"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def run(*args):
+    if not args:
+        print("Usage: runscript benchmark_forest --script-args <model_id> [repeats]")
+        return
+
+    model_id = args[0]
+    repeats = int(args[1]) if len(args) > 1 else 20
+
+    # Always the pickled sklearn model, even when the model serves from its .forest artifact
+    pred_obj = Prediction()
+    model_path = os.path.join(pred_obj.models_dir, pred_obj.registry.get_filename(model_id))
+    with open(model_path, 'rb') as f:
+        model_data = pickle.load(f)
+    model = model_data['model']
+    if model_data.get('encoder') is not None:
+        encoder = FeatureEncoder.from_dict(model_data['encoder'])
+    else:
+        encoder = FeatureEncoder.from_feature_names(model_data['feature_names'])
+
+    start = time.perf_counter()
+    compiled = CompiledForest.from_sklearn(model)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    records = list(EmployeeData.objects.all().order_by("EmployeeNumber").values())
+    features, _, _ = encoder.transform(records)
+    single_row = features[:1]
+
+    max_diff = float(np.abs(model.predict_proba(features) - compiled.predict_proba(features)).max())
+
+    results = {
+        'model_id': model_id,
+        'n_estimators': compiled.n_estimators,
+        'max_depth': compiled.max_depth,
+        'rows': len(features),
+        'compile_ms': compile_ms,
+        'max_probability_diff': max_diff,
+        'single_row_ms': {
+            'sklearn': time_call(lambda: model.predict_proba(single_row), repeats),
+            'compiled': time_call(lambda: compiled.predict_proba(single_row), repeats)
+        },
+        'batch_ms': {
+            'sklearn': time_call(lambda: model.predict_proba(features), repeats),
+            'compiled': time_call(lambda: compiled.predict_proba(features), repeats)
+        }
+    }
+    print(json.dumps(results, indent=2))
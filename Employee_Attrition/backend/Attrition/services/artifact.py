@@ -0,0 +1,130 @@
+import os
+import json
+import mmap
+import struct
+import hashlib
+import numpy as np
+from Attrition.services.forest import CompiledForest, compile_model
+
+# Memory-mappable forest artifact:
+#   8-byte magic | uint64 header length | JSON header | padding | array data
+# Arrays are stored uncompressed at ALIGNMENT-byte offsets from the data
+# start, so readers can map them with np.frombuffer and every worker process
+# shares the same page-cache pages. The header carries a sha256 of the data.
+MAGIC = b'ATTRFRST'
+VERSION = 1
+ALIGNMENT = 64
+ARTIFACT_SUFFIX = '.forest'
+ARRAY_NAMES = ['feature', 'threshold', 'left', 'right', 'value', 'roots', 'classes']
+
+
+def artifact_path(model_path):
+    """Artifact path stored next to a .sav model file"""
+    return os.path.splitext(model_path)[0] + ARTIFACT_SUFFIX
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_forest_artifact(path, compiled, encoder_data):
+    """Write a CompiledForest and its encoder to path atomically"""
+    arrays = {
+        'feature': compiled.feature,
+        'threshold': compiled.threshold,
+        'left': compiled.left,
+        'right': compiled.right,
+        'value': compiled.value,
+        'roots': compiled.roots,
+        'classes': np.asarray(compiled.classes_)
+    }
+
+    specs, offset = {}, 0
+    for name in ARRAY_NAMES:
+        array = np.ascontiguousarray(arrays[name])
+        arrays[name] = array
+        specs[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset = _align(offset + array.nbytes)
+    data_size = offset
+
+    def chunks():
+        """Array bytes interleaved with alignment padding, in file order"""
+        position = 0
+        for name in ARRAY_NAMES:
+            yield b'\0' * (specs[name]['offset'] - position)
+            yield memoryview(arrays[name]).cast('B')
+            position = specs[name]['offset'] + arrays[name].nbytes
+        yield b'\0' * (data_size - position)
+
+    digest = hashlib.sha256()
+    for chunk in chunks():
+        digest.update(chunk)
+
+    header = json.dumps({
+        'version': VERSION,
+        'max_depth': compiled.max_depth,
+        'encoder': encoder_data,
+        'arrays': specs,
+        'data_size': data_size,
+        'sha256': digest.hexdigest()
+    }).encode('utf-8')
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        f.write(b'\0' * (data_start - len(MAGIC) - 8 - len(header)))
+        for chunk in chunks():
+            f.write(chunk)
+    os.replace(tmp_path, path)
+
+
+def save_forest_artifact(model_path, model, encoder_data):
+    """Compile a model and write its artifact next to model_path; None if unsupported"""
+    compiled = compile_model(model)
+    if compiled is None:
+        return None
+    path = artifact_path(model_path)
+    write_forest_artifact(path, compiled, encoder_data)
+    return path
+
+
+def open_forest_artifact(path, verify=True):
+    """Map an artifact read-only; returns (CompiledForest, encoder data)"""
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{os.path.basename(path)} is not a forest artifact")
+    (header_size,) = struct.unpack('<Q', buffer[len(MAGIC):len(MAGIC) + 8])
+    header = json.loads(buffer[len(MAGIC) + 8:len(MAGIC) + 8 + header_size].decode('utf-8'))
+    if header.get('version') != VERSION:
+        raise ValueError(f"Unsupported artifact version {header.get('version')}")
+
+    data_start = _align(len(MAGIC) + 8 + header_size)
+    if len(buffer) != data_start + header['data_size']:
+        raise ValueError(f"{os.path.basename(path)} is truncated")
+
+    if verify:
+        view = memoryview(buffer)[data_start:]
+        try:
+            if hashlib.sha256(view).hexdigest() != header['sha256']:
+                raise ValueError(f"Checksum mismatch in {os.path.basename(path)}")
+        finally:
+            view.release()
+
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        arrays[name] = np.frombuffer(
+            buffer, dtype=dtype, count=count, offset=data_start + spec['offset']
+        ).reshape(spec['shape'])
+
+    compiled = CompiledForest(
+        arrays['feature'], arrays['threshold'], arrays['left'], arrays['right'],
+        arrays['value'], arrays['roots'], header['max_depth'], arrays['classes']
+    )
+    return compiled, header['encoder']
@@ -0,0 +1,203 @@
+import json
+import time
+import logging
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from rest_framework import status
+from django.conf import settings
+from django.db import transaction
+from sklearn.metrics import roc_auc_score
+from Attrition.models import EmployeeData, HoldoutPrediction
+from Attrition.services.errors import InvalidRequestError
+from Attrition.services.feature_store import feature_store
+from Attrition.services.importer import normalize_attrition
+from Attrition.services.loader import employee_data_version, holdout_start
+from Attrition.services.prediction import Prediction
+from Attrition.services.registry import ModelRegistry
+from Attrition.services.training import Training
+
+logger = logging.getLogger(__name__)
+
+METRICS = ('accuracy', 'precision', 'recall', 'f1_score', 'roc_auc')
+
+
+class ModelComparison:
+    """Scores several registered models on one encoding of the holdout employees"""
+
+    def __init__(self):
+        self.predictor = Prediction()
+        self.registry = ModelRegistry()
+
+    def load_holdout(self):
+        """Holdout rows encoded once in the full training column layout.
+
+        Returns (rows, features, target, columns, data_version); rows that
+        fail to encode or have no recognised Attrition value are left out.
+        """
+        # Read first, so a write during the load can only make the version stale
+        data_version = employee_data_version()
+        start = holdout_start()
+        if start is None:
+            raise ValueError("Every employee is in the training range; there is no holdout")
+        rows = list(EmployeeData.objects.filter(EmployeeNumber__gte=start).order_by('EmployeeNumber').values())
+
+        # Columns of the whole training range, a superset of every model's features
+        dataset = feature_store.get()
+        features, _, errors = dataset.encoder(dataset.columns).transform(rows)
+        target = normalize_attrition(pd.Series([row['Attrition'] for row in rows], dtype=object))
+        target = target.map({'Yes': 1, 'No': 0}).fillna(-1).to_numpy(dtype=int)
+
+        keep = [i for i, error in enumerate(errors) if error is None and target[i] >= 0]
+        return [rows[i] for i in keep], features[keep], target[keep], dataset.columns, data_version
+
+    def _score(self, model, columns, features, target):
+        """Score one model on its columns of the shared matrix; runs on a pool thread"""
+        start = time.perf_counter()
+        # No copy when the model uses every column in training order
+        if columns != list(range(features.shape[1])):
+            features = features[:, columns]
+        probabilities = model.predict_proba(features)[:, list(model.classes_).index(1)]
+        predict_seconds = time.perf_counter() - start
+
+        predictions = (probabilities > 0.5).astype(int)
+        metrics = dict(Training().accuracy_measures(target, predictions, log_report=False))
+        metrics['roc_auc'] = float(roc_auc_score(target, probabilities)) if len(set(target)) > 1 else None
+        return probabilities, metrics, predict_seconds
+
+    def store_predictions(self, model_id, rows, target, probabilities, data_version):
+        """Replace a model's stored holdout predictions; returns the number of rows stored"""
+        predictions = [
+            HoldoutPrediction(
+                employee_id=row['EmployeeNumber'],
+                model_id=model_id,
+                data_version=data_version,
+                probability=float(probability),
+                prediction="Yes" if probability > 0.5 else "No",
+                actual="Yes" if actual == 1 else "No"
+            )
+            for row, actual, probability in zip(rows, target, probabilities)
+        ]
+        # Rows of an earlier holdout version go too, so a model holds one consistent set
+        with transaction.atomic():
+            HoldoutPrediction.objects.filter(model_id=model_id).delete()
+            HoldoutPrediction.objects.bulk_create(predictions, batch_size=5000)
+        return len(predictions)
+
+    def compare(self, request):
+        """Aligned holdout metrics and inference timings for a list of models"""
+        response = {
+            'status': status.HTTP_200_OK,
+            'response': None,
+            'error': None
+        }
+
+        try:
+            try:
+                input_data = json.loads(request.body.decode('utf-8'))
+                model_ids = input_data.get('model_ids')
+                if not isinstance(model_ids, list) or not model_ids:
+                    raise ValueError("model_ids must be a non-empty list")
+                model_ids = list(dict.fromkeys(str(model_id) for model_id in model_ids))
+                max_models = getattr(settings, 'COMPARE_MAX_MODELS', 10)
+                if len(model_ids) > max_models:
+                    raise ValueError(f"At most {max_models} models can be compared at once")
+                metric = input_data.get('metric', 'f1_score')
+                if metric not in METRICS:
+                    raise ValueError(f"metric must be one of {', '.join(METRICS)}")
+                store_predictions = input_data.get('store_predictions', False)
+                if not isinstance(store_predictions, bool):
+                    raise ValueError("store_predictions must be true or false")
+            except json.JSONDecodeError:
+                raise InvalidRequestError("Invalid JSON input")
+            except (TypeError, ValueError) as e:
+                raise InvalidRequestError(str(e))
+
+            start = time.perf_counter()
+            rows, features, target, all_columns, data_version = self.load_holdout()
+            encode_seconds = time.perf_counter() - start
+            if not rows:
+                raise ValueError("No holdout employees could be encoded")
+            positions = {name: i for i, name in enumerate(all_columns)}
+
+            # Models load on this thread (registry and model cache); scoring runs in parallel
+            results = {model_id: {'model_id': model_id, 'error': None} for model_id in model_ids}
+            jobs = {}
+            for model_id in model_ids:
+                try:
+                    load_start = time.perf_counter()
+                    model, encoder = self.predictor.load_model(model_id)
+                    info = self.registry.get(model_id, include_features=False)
+                    missing = [name for name in encoder.feature_names if name not in positions]
+                    if missing:
+                        raise ValueError(f"Features not in the holdout encoding: {', '.join(missing)}")
+                    results[model_id].update({
+                        'timestamp': info['timestamp'],
+                        'n_estimators': info['params'].get('n_estimators'),
+                        'inference_backend': info['inference_backend'],
+                        'recorded_metrics': {k: info['metrics'].get(k) for k in METRICS if k in info['metrics']},
+                        'load_seconds': time.perf_counter() - load_start
+                    })
+                    jobs[model_id] = (model, [positions[name] for name in encoder.feature_names])
+                except Exception as e:
+                    results[model_id]['error'] = str(e)
+
+            max_workers = min(len(jobs) or 1, getattr(settings, 'COMPARE_MAX_WORKERS', 4))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    model_id: executor.submit(self._score, model, columns, features, target)
+                    for model_id, (model, columns) in jobs.items()
+                }
+                scored = {}
+                for model_id, future in futures.items():
+                    try:
+                        scored[model_id] = future.result()
+                    except Exception as e:
+                        results[model_id]['error'] = str(e)
+
+            for model_id, (probabilities, metrics, predict_seconds) in scored.items():
+                results[model_id].update({
+                    'metrics': metrics,
+                    'predict_seconds': predict_seconds,
+                    'rows_per_second': len(rows) / predict_seconds if predict_seconds else None
+                })
+                if store_predictions:
+                    results[model_id]['stored'] = self.store_predictions(
+                        model_id, rows, target, probabilities, data_version)
+
+            ranked = sorted(
+                (r for r in results.values() if r.get('metrics') and r['metrics'].get(metric) is not None),
+                key=lambda r: -r['metrics'][metric]
+            )
+            response['response'] = {
+                'holdout': {
+                    'first_employee_number': rows[0]['EmployeeNumber'],
+                    'rows': len(rows),
+                    'positives': int(target.sum()),
+                    'data_version': data_version,
+                    'encode_seconds': encode_seconds
+                },
+                'metric': metric,
+                'best_model_id': ranked[0]['model_id'] if ranked else None,
+                'models': [results[model_id] for model_id in model_ids],
+                'seconds': time.perf_counter() - start
+            }
+            logger.info("Compared %d models on %d holdout rows, best %s",
+                        len(scored), len(rows), response['response']['best_model_id'])
+
+        except InvalidRequestError as e:
+            error_msg = f"Invalid comparison request: {str(e)}"
+            logger.warning(error_msg)
+            response.update({
+                'status': status.HTTP_400_BAD_REQUEST,
+                'error': error_msg
+            })
+
+        except Exception as e:
+            error_msg = f"Comparison error: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            response.update({
+                'status': status.HTTP_500_INTERNAL_SERVER_ERROR,
+                'error': error_msg
+            })
+
+        return response
@@ -0,0 +1,121 @@
+import numpy as np
+
+# Columns that are one-hot encoded during training (object dtype except the target)
+CATEGORICAL_FIELDS = [
+    'BusinessTravel', 'Department', 'EducationField', 'Gender',
+    'JobRole', 'MaritalStatus', 'Over18', 'OverTime'
+]
+TARGET_FIELD = 'Attrition'
+
+
+class FeatureEncoder:
+    """Maps raw employee records straight into the model's feature matrix.
+
+    Numerical fields map to a single column index and each categorical value
+    maps to the index of its one-hot column. Values dropped as the baseline
+    by get_dummies(drop_first=True) are known but have no column, so they
+    leave the row at zero, which matches the training encoding.
+    """
+
+    def __init__(self, feature_names, numerical, categorical, known_categories=None):
+        self.feature_names = list(feature_names)
+        self.numerical = dict(numerical)
+        self.categorical = {field: dict(values) for field, values in categorical.items()}
+        self.known_categories = (
+            {field: set(values) for field, values in known_categories.items()}
+            if known_categories is not None else None
+        )
+
+    @classmethod
+    def fit(cls, attrition_df, feature_names):
+        """Build an encoder from the training frame and its encoded column names"""
+        categorical_fields = [f for f in CATEGORICAL_FIELDS if f in attrition_df.columns]
+        known_categories = {
+            field: [str(v) for v in attrition_df[field].dropna().unique()]
+            for field in categorical_fields
+        }
+        encoder = cls.from_feature_names(feature_names, categorical_fields)
+        encoder.known_categories = {field: set(values) for field, values in known_categories.items()}
+        return encoder
+
+    @classmethod
+    def from_feature_names(cls, feature_names, categorical_fields=CATEGORICAL_FIELDS):
+        """Build an encoder from column names alone (used for models saved without one).
+
+        Without the training categories unknown values cannot be told apart
+        from the dropped baseline, so they are not reported.
+        """
+        numerical, categorical = {}, {}
+        for index, name in enumerate(feature_names):
+            field = next((f for f in categorical_fields if name.startswith(f + '_')), None)
+            if field is None:
+                numerical[name] = index
+            else:
+                categorical.setdefault(field, {})[name[len(field) + 1:]] = index
+        return cls(feature_names, numerical, categorical)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data['feature_names'],
+            data['numerical'],
+            data['categorical'],
+            data.get('known_categories')
+        )
+
+    def to_dict(self):
+        """Plain-data form stored in the model file"""
+        return {
+            'feature_names': self.feature_names,
+            'numerical': self.numerical,
+            'categorical': self.categorical,
+            'known_categories': (
+                {field: sorted(values) for field, values in self.known_categories.items()}
+                if self.known_categories is not None else None
+            )
+        }
+
+    def transform_row(self, record, out):
+        """Fill a zeroed row in place and return any unknown categories.
+
+        Raises ValueError for a missing or non-numeric value of a model field.
+        """
+        for field, index in self.numerical.items():
+            value = record.get(field)
+            if value is None:
+                raise ValueError(f"Missing value for {field}")
+            try:
+                out[index] = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid numeric value for {field}: {value!r}")
+
+        unknown = {}
+        for field, columns in self.categorical.items():
+            value = record.get(field)
+            if value is None:
+                raise ValueError(f"Missing value for {field}")
+            value = str(value)
+            index = columns.get(value)
+            if index is not None:
+                out[index] = 1.0
+            elif self.known_categories is not None and value not in self.known_categories.get(field, ()):
+                unknown[field] = value
+        return unknown
+
+    def transform(self, records):
+        """Encode a list of records into a preallocated float matrix.
+
+        Returns the matrix plus per-row unknown categories and errors; rows
+        that fail to encode are left at zero and should not be scored.
+        """
+        matrix = np.zeros((len(records), len(self.feature_names)), dtype=np.float64)
+        unknowns, errors = [], []
+        for row, record in enumerate(records):
+            try:
+                unknowns.append(self.transform_row(record, matrix[row]))
+                errors.append(None)
+            except ValueError as e:
+                matrix[row] = 0.0
+                unknowns.append({})
+                errors.append(str(e))
+        return matrix, unknowns, errors
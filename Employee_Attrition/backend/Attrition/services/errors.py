@@ -0,0 +1,2 @@
+class InvalidRequestError(ValueError):
+    """A request with malformed JSON or options; services answer it with 400"""
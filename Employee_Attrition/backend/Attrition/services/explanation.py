@@ -0,0 +1,260 @@
+import os
+import json
+import pickle
+import logging
+import numpy as np
+from scipy import sparse
+from rest_framework import status
+from django.conf import settings
+from Attrition.models import EmployeeData
+from Attrition.services.encoder import FeatureEncoder
+from Attrition.services.errors import InvalidRequestError
+from Attrition.services.forest import compile_model
+from Attrition.services.model_cache import ModelCache
+from Attrition.services.result_cache import build_result_cache
+from Attrition.services.registry import ModelRegistry
+from Attrition.services.metrics import PREDICTION_STAGE_SECONDS, PREDICTIONS, stage_timer
+
+logger = logging.getLogger(__name__)
+
+
+class TreeExplainer:
+    """Exact per-feature contributions of a random forest's attrition probability.
+
+    Each split moves a row from a node to a child, changing the node's
+    positive-class fraction; that change is credited to the split feature
+    (Saabas path attribution). A row's probability is then exactly the
+    forest's mean root value plus the sum of its contributions.
+
+    The path of every leaf is folded into one sparse row of per-feature
+    totals when the explainer is built, so explaining a row costs one
+    lockstep walk of the compiled forest (the same walk as predict_proba)
+    and a sparse product over the leaves it reached.
+    """
+
+    def __init__(self, model, encoder):
+        forest = compile_model(model)
+        if forest is None:
+            raise ValueError(f"Explanations are not supported for {type(model).__name__}")
+        self.forest = forest
+        self.encoder = encoder
+
+        classes = list(forest.classes_)
+        self.positive = classes.index(1) if 1 in classes else len(classes) - 1
+        value = forest.value[:, self.positive]
+        n_nodes = len(value)
+        n_features = len(encoder.feature_names)
+
+        # Parent of every node; roots and the self-loops of leaves stay -1
+        node_ids = np.arange(n_nodes)
+        internal = forest.left != node_ids
+        parent = np.full(n_nodes, -1, dtype=np.int64)
+        parent[forest.left[internal]] = node_ids[internal]
+        parent[forest.right[internal]] = node_ids[internal]
+
+        # Walk every leaf up to its root at once, one level per step
+        rows, columns, deltas = [], [], []
+        current = owner = np.flatnonzero(~internal)
+        while True:
+            up = parent[current]
+            active = up >= 0
+            if not active.any():
+                break
+            current, owner, up = current[active], owner[active], up[active]
+            rows.append(owner)
+            columns.append(forest.feature[up])
+            deltas.append(value[current] - value[up])
+            current = up
+
+        # Duplicate (leaf, feature) pairs are summed by the sparse constructor
+        self.paths = sparse.csr_matrix(
+            (np.concatenate(deltas), (np.concatenate(rows), np.concatenate(columns))),
+            shape=(n_nodes, n_features)
+        ) if rows else sparse.csr_matrix((n_nodes, n_features))
+        self.base_value = float(value[forest.roots].mean())
+
+        # One-hot columns are reported under their employee field
+        self.fields = list(encoder.numerical) + list(encoder.categorical)
+        field_of = {index: i for i, index in enumerate(encoder.numerical.values())}
+        for i, values in enumerate(encoder.categorical.values(), start=len(encoder.numerical)):
+            field_of.update({index: i for index in values.values()})
+        self.grouping = sparse.csr_matrix(
+            (np.ones(len(field_of)), (list(field_of), list(field_of.values()))),
+            shape=(n_features, len(self.fields))
+        )
+
+        importances = getattr(model, 'feature_importances_', None)
+        if importances is None:
+            importances = np.zeros(n_features)
+        self.importances = np.asarray(importances, dtype=np.float64)
+        self.field_importances = self.grouping.T @ self.importances
+
+    def contributions(self, features):
+        """Return (probabilities, contributions) with one contribution per encoded column"""
+        leaves = self.forest.apply(features)
+        n_rows, n_trees = leaves.shape
+        reached = sparse.csr_matrix(
+            (np.full(leaves.size, 1.0 / n_trees), (np.repeat(np.arange(n_rows), n_trees), leaves.ravel())),
+            shape=(n_rows, self.paths.shape[0])
+        )
+        contributions = (reached @ self.paths).toarray()
+        return self.base_value + contributions.sum(axis=1), contributions
+
+    def by_field(self, contributions):
+        """Sum the contributions of each categorical field's one-hot columns"""
+        return np.asarray(contributions @ self.grouping)
+
+
+explainer_cache = ModelCache(
+    max_models=getattr(settings, 'EXPLAINER_CACHE_MAX_MODELS', 2),
+    max_bytes=getattr(settings, 'MODEL_CACHE_MAX_BYTES', 512 * 1024 * 1024),
+    instrument=False
+)
+explanation_cache = build_result_cache('explanation')
+
+
+class Explanation:
+    def __init__(self):
+        self.models_dir = os.path.normpath(os.path.join(os.getcwd(), 'pickle', 'models'))
+        self.registry = ModelRegistry()
+
+    def _resolve_model_path(self, model_id):
+        """The pickled forest; the .forest artifact lacks the importances"""
+        info = self.registry.get(model_id, include_features=False)
+        path = os.path.join(self.models_dir, info['filename'])
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Model file {info['filename']} not found")
+        return path
+
+    def _build_explainer(self, path):
+        with stage_timer(PREDICTION_STAGE_SECONDS, 'explainer_load'):
+            with open(path, 'rb') as f:
+                model_data = pickle.load(f)
+            if model_data.get('encoder') is not None:
+                encoder = FeatureEncoder.from_dict(model_data['encoder'])
+            else:
+                encoder = FeatureEncoder.from_feature_names(model_data['feature_names'])
+            explainer = TreeExplainer(model_data['model'], encoder)
+        logger.info("Built explainer for %s (%d path entries)", os.path.basename(path), explainer.paths.nnz)
+        return explainer
+
+    def load_explainer(self, model_id):
+        """Explainer for a registered model, built once per process and model file"""
+        return explainer_cache.get(model_id, self._resolve_model_path, self._build_explainer)
+
+    def _ranked(self, names, values, record, top_n):
+        """Entries ordered by absolute size, the remainder summed into 'other'"""
+        order = np.argsort(-np.abs(values), kind='stable')
+        ranked = [
+            {'feature': names[i], 'value': record.get(names[i]) if record else None, 'contribution': float(values[i])}
+            for i in order
+        ]
+        if top_n and len(ranked) > top_n:
+            return ranked[:top_n], float(sum(entry['contribution'] for entry in ranked[top_n:]))
+        return ranked, 0.0
+
+    def explain(self, request):
+        """Per-feature contributions to one employee's attrition probability"""
+        response = {
+            'status': status.HTTP_200_OK,
+            'response': None,
+            'error': None
+        }
+
+        model_label = ''
+        try:
+            try:
+                input_data = json.loads(request.body.decode('utf-8'))
+                model_id = input_data.get('model_id')
+                if not model_id:
+                    raise ValueError("model_id is required")
+                employee_number = input_data.get('employee_number')
+                record = input_data.get('data')
+                if employee_number is None and not isinstance(record, dict):
+                    raise ValueError("Either employee_number or data is required")
+                top_n = input_data.get('top_n', 10)
+                if isinstance(top_n, bool) or int(top_n) < 0:
+                    raise ValueError("top_n must be a non-negative integer (0 lists every feature)")
+                top_n = int(top_n)
+                by_field = input_data.get('group_categorical', True)
+                if not isinstance(by_field, bool):
+                    raise ValueError("group_categorical must be true or false")
+            except json.JSONDecodeError:
+                raise InvalidRequestError("Invalid JSON input")
+            except (TypeError, ValueError) as e:
+                raise InvalidRequestError(str(e))
+
+            if employee_number is not None:
+                record = EmployeeData.objects.filter(EmployeeNumber=employee_number).values().first()
+                if record is None:
+                    raise ValueError(f"Employee {employee_number} not found")
+
+            explainer = self.load_explainer(model_id)
+            model_label = model_id
+
+            with stage_timer(PREDICTION_STAGE_SECONDS, 'preprocess'):
+                features, unknowns, errors = explainer.encoder.transform([record])
+            if errors[0]:
+                raise ValueError(errors[0])
+
+            # Cached per model file and encoded employee row, so edits miss
+            version = explainer_cache.version(model_id)
+            key = explanation_cache.keys(model_id, version, features)[0] if explanation_cache else None
+            cached = explanation_cache.get_many([key]).get(key) if key else None
+            cache_hit = cached is not None
+            if not cache_hit:
+                with stage_timer(PREDICTION_STAGE_SECONDS, 'explain'):
+                    probabilities, contributions = explainer.contributions(features)
+                cached = {
+                    'probability': float(probabilities[0]),
+                    'contributions': contributions[0].tolist()
+                }
+                if key:
+                    explanation_cache.set_many({key: cached})
+
+            contributions = np.asarray(cached['contributions'])
+            if by_field:
+                names, values = explainer.fields, explainer.by_field(contributions)
+                importances = explainer.field_importances
+            else:
+                names, values = explainer.encoder.feature_names, contributions
+                importances = explainer.importances
+            ranked, other = self._ranked(names, values, record if by_field else None, top_n)
+            global_ranked, _ = self._ranked(names, importances, None, top_n)
+
+            probability = cached['probability']
+            response['response'] = {
+                'model_id': model_id,
+                'employee_number': record.get('EmployeeNumber'),
+                'prediction': "Yes" if probability > 0.5 else "No",
+                'probability': probability,
+                'base_value': explainer.base_value,
+                'contributions': ranked,
+                'other_contribution': other,
+                'global_importances': [
+                    {'feature': entry['feature'], 'importance': entry['contribution']} for entry in global_ranked
+                ],
+                'unknown_categories': unknowns[0],
+                'cache_hit': cache_hit
+            }
+            PREDICTIONS.labels(endpoint='explain', model_id=model_id, outcome='success').inc()
+
+        except InvalidRequestError as e:
+            error_msg = f"Invalid explanation request: {str(e)}"
+            logger.warning(error_msg)
+            PREDICTIONS.labels(endpoint='explain', model_id='', outcome='invalid').inc()
+            response.update({
+                'status': status.HTTP_400_BAD_REQUEST,
+                'error': error_msg
+            })
+
+        except Exception as e:
+            error_msg = f"Explanation error: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            PREDICTIONS.labels(endpoint='explain', model_id=model_label, outcome='error').inc()
+            response.update({
+                'status': status.HTTP_500_INTERNAL_SERVER_ERROR,
+                'error': error_msg
+            })
+
+        return response
@@ -0,0 +1,185 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import threading
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max
+from Attrition.models import EmployeeData
+from Attrition.services.encoder import CATEGORICAL_FIELDS, FeatureEncoder
+from Attrition.services.loader import (
+    bump_employee_data_version, employee_data_version, load_employee_frame, training_queryset
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump when the encoding below changes so stored versions are rebuilt
+ENCODING_VERSION = 1
+
+
+class EncodedDataset:
+    """One stored version: float32 feature matrix, target and employee numbers.
+
+    The arrays are memory-mapped read-only from the version directory.
+    Columns are fixed for the whole training range, so any split of the
+    rows shares one schema.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'schema.json')) as f:
+            schema = json.load(f)
+        self.version = schema['fingerprint']
+        self.columns = schema['columns']
+        self.categories = schema['categories']
+        self.features = np.load(os.path.join(directory, 'features.npy'), mmap_mode='r')
+        self.target = np.load(os.path.join(directory, 'target.npy'), mmap_mode='r')
+        self.employee_numbers = np.load(os.path.join(directory, 'employee_numbers.npy'), mmap_mode='r')
+
+    def __len__(self):
+        return len(self.target)
+
+    def column_indices(self, selected_features=None):
+        """Indices of the selected columns in request order (all columns when None)"""
+        if not selected_features:
+            return list(range(len(self.columns)))
+        positions = {name: i for i, name in enumerate(self.columns)}
+        return [positions[name] for name in selected_features if name in positions]
+
+    def encoder(self, feature_names):
+        """Inference encoder for a model trained on feature_names from this dataset"""
+        encoder = FeatureEncoder.from_feature_names(feature_names)
+        encoder.known_categories = {field: set(values) for field, values in self.categories.items()}
+        return encoder
+
+
+class FeatureStore:
+    """Versioned on-disk cache of the encoded training range.
+
+    A version is keyed by a cheap change marker: the training range's row
+    count and highest EmployeeNumber plus the employee data version, which
+    the importer and add-employee path bump on every write (and the
+    encoding version). Checking it is one aggregate query, so the matrix
+    is rebuilt only when employees in the training range change. A sha256
+    over the rows' values is stored with each version for verify().
+    """
+
+    def __init__(self, directory=None, keep_versions=2):
+        self.directory = directory or os.path.join(os.getcwd(), 'pickle', 'features')
+        self.keep_versions = keep_versions
+        self._loaded = None
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def fingerprint(self, queryset=None):
+        """sha256 of the change marker of the rows"""
+        queryset = queryset if queryset is not None else training_queryset()
+        names = [f.name for f in EmployeeData._meta.concrete_fields]
+        marker = queryset.aggregate(rows=Count('pk'), last=Max('EmployeeNumber'))
+        key = f"{ENCODING_VERSION}:{','.join(names)}:{marker['rows']}:{marker['last']}:{employee_data_version()}"
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def content_hash(self, queryset=None, chunk_size=10000):
+        """sha256 of the rows' values in EmployeeNumber order; reads every row"""
+        queryset = queryset if queryset is not None else training_queryset()
+        names = [f.name for f in EmployeeData._meta.concrete_fields]
+        digest = hashlib.sha256(f"{ENCODING_VERSION}:{','.join(names)}".encode('utf-8'))
+        for row in queryset.values_list(*names).iterator(chunk_size=chunk_size):
+            digest.update(repr(row).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _build(self, fingerprint, queryset):
+        """Encode the rows and write them as a new version directory"""
+        from Attrition.services.training import Training
+
+        df = load_employee_frame(queryset)
+        features, target = Training().preprocess_data(df)
+        if target.isna().any():
+            raise ValueError("Training data has unrecognised Attrition values")
+
+        categories = {
+            field: [str(v) for v in df[field].cat.categories]
+            for field in CATEGORICAL_FIELDS if field in df.columns
+        }
+
+        tmp_dir = os.path.join(self.directory, f".{fingerprint}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        np.save(os.path.join(tmp_dir, 'features.npy'), features.to_numpy(dtype=np.float32))
+        np.save(os.path.join(tmp_dir, 'target.npy'), target.to_numpy(dtype=np.int8))
+        np.save(os.path.join(tmp_dir, 'employee_numbers.npy'), df['EmployeeNumber'].to_numpy(dtype=np.int32))
+        with open(os.path.join(tmp_dir, 'schema.json'), 'w') as f:
+            json.dump({
+                'fingerprint': fingerprint,
+                'content_sha256': self.content_hash(queryset),
+                'encoding_version': ENCODING_VERSION,
+                'rows': len(df),
+                'columns': features.columns.tolist(),
+                'categories': categories
+            }, f)
+
+        final_dir = os.path.join(self.directory, fingerprint)
+        try:
+            os.replace(tmp_dir, final_dir)
+        except OSError:
+            # Another process published the same version first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        logger.info("Built feature store version %s (%d rows, %d columns)",
+                    fingerprint[:12], len(df), features.shape[1])
+
+    def _prune(self, current):
+        """Remove all but the newest keep_versions versions"""
+        versions = [
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if not name.startswith('.') and os.path.isdir(os.path.join(self.directory, name))
+        ]
+        versions.sort(key=os.path.getmtime, reverse=True)
+        for path in versions[self.keep_versions:]:
+            if os.path.basename(path) != current:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def get(self, queryset=None):
+        """The encoded dataset for the current rows, building it if they changed"""
+        queryset = queryset if queryset is not None else training_queryset()
+        fingerprint = self.fingerprint(queryset)
+
+        with self._lock:
+            if self._loaded is not None and self._loaded.version == fingerprint:
+                return self._loaded
+
+            version_dir = os.path.join(self.directory, fingerprint)
+            if not os.path.exists(os.path.join(version_dir, 'schema.json')):
+                self._build(fingerprint, queryset)
+                self._prune(fingerprint)
+            else:
+                logger.info("Using feature store version %s", fingerprint[:12])
+
+            self._loaded = EncodedDataset(version_dir)
+            return self._loaded
+
+    def verify(self, queryset=None):
+        """Compare the current version with the rows' full content hash.
+
+        Catches writes that bypassed the data version counter (admin edits,
+        raw SQL). On a mismatch the counter is bumped, so every process
+        moves to a freshly built version. Returns (ok, dataset).
+        """
+        queryset = queryset if queryset is not None else training_queryset()
+        dataset = self.get(queryset)
+        with open(os.path.join(dataset.directory, 'schema.json')) as f:
+            expected = json.load(f).get('content_sha256')
+        if expected == self.content_hash(queryset):
+            return True, dataset
+
+        logger.warning("Feature store version %s does not match the training rows; rebuilding",
+                       dataset.version[:12])
+        bump_employee_data_version()
+        return False, self.get(queryset)
+
+
+feature_store = FeatureStore(
+    directory=getattr(settings, 'FEATURE_STORE_DIR', None),
+    keep_versions=getattr(settings, 'FEATURE_STORE_KEEP_VERSIONS', 2)
+)
@@ -0,0 +1,98 @@
+import numpy as np
+
+
+class CompiledForest:
+    """Random forest flattened into contiguous node arrays for fast scoring.
+
+    All trees are stored back to back: feature, threshold, left/right child
+    and the normalized class distribution of each node. Leaves point to
+    themselves, so every tree can be walked in lockstep for max_depth steps
+    and rows that reach a leaf early simply stay there.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, classes):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Compile a fitted RandomForestClassifier"""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left).astype(np.int32) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right).astype(np.int32) + offset)
+
+            # Class counts (or fractions) normalized per node, as predict_proba does
+            value = tree.value[:, 0, :]
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(value / normalizer)
+
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            np.ascontiguousarray(np.concatenate(features)),
+            np.ascontiguousarray(np.concatenate(thresholds)),
+            np.ascontiguousarray(np.concatenate(lefts)),
+            np.ascontiguousarray(np.concatenate(rights)),
+            np.ascontiguousarray(np.concatenate(values)),
+            np.asarray(roots, dtype=np.int32),
+            max_depth,
+            np.asarray(model.classes_)
+        )
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    def apply(self, X):
+        """Return the leaf index reached in every tree, shape (n_rows, n_trees)"""
+        # Trees are trained on float32 inputs, so compare in the same precision
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.int64) * n_features)[:, None]
+
+        nodes = np.broadcast_to(self.roots, (n_rows, len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            go_left = flat_X[row_offsets + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X, chunk_size=1024):
+        """Average the leaf class distributions over all trees"""
+        X = np.asarray(X)
+        probabilities = np.empty((X.shape[0], self.value.shape[1]), dtype=np.float64)
+        for start in range(0, X.shape[0], chunk_size):
+            leaves = self.apply(X[start:start + chunk_size])
+            probabilities[start:start + chunk_size] = self.value[leaves].mean(axis=1)
+        return probabilities
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+def compile_model(model):
+    """Return a CompiledForest for supported models, otherwise None"""
+    estimators = getattr(model, 'estimators_', None)
+    if not estimators or not all(hasattr(e, 'tree_') for e in estimators):
+        return None
+    if getattr(model, 'n_outputs_', 1) != 1:
+        return None
+    return CompiledForest.from_sklearn(model)
@@ -0,0 +1,131 @@
+import time
+import logging
+import numpy as np
+import pandas as pd
+from imblearn.over_sampling import SMOTE
+from imblearn.under_sampling import RandomUnderSampler
+
+# Class-imbalance strategies applied to the training rows before a forest is
+# fit. Kept free of Django imports: cross-validation workers use it too.
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ('smote', 'smote_sample', 'undersample', 'class_weight')
+OPTIONS = ('strategy', 'random_state', 'max_minority_rows', 'majority_ratio', 'class_weight')
+
+
+def _take(data, rows):
+    return data.iloc[rows] if hasattr(data, 'iloc') else data[rows]
+
+
+def _concat(parts):
+    if hasattr(parts[0], 'iloc'):
+        return pd.concat(parts, ignore_index=True)
+    return np.concatenate(parts)
+
+
+class ImbalanceStrategy:
+    """Rebalances training rows, or weights classes instead.
+
+    smote         SMOTE over every minority row (the original behaviour)
+    smote_sample  SMOTE seeded from at most max_minority_rows minority rows;
+                  all real rows are kept, only the neighbour search is bounded
+    undersample   drop random majority rows down to majority_ratio per minority row
+    class_weight  no resampling; the forest gets class_weight instead
+    """
+
+    def __init__(self, strategy='smote', random_state=42, max_minority_rows=2000,
+                 majority_ratio=1.0, class_weight='balanced'):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"imbalance strategy must be one of {', '.join(STRATEGIES)}")
+        try:
+            max_minority_rows, majority_ratio = int(max_minority_rows), float(majority_ratio)
+        except (TypeError, ValueError):
+            raise ValueError("max_minority_rows must be an integer and majority_ratio a number")
+        if max_minority_rows < 2 or majority_ratio < 1:
+            raise ValueError("max_minority_rows must be at least 2 and majority_ratio at least 1")
+        self.strategy = strategy
+        self.random_state = random_state
+        self.max_minority_rows = max_minority_rows
+        self.majority_ratio = majority_ratio
+        self.class_weight = class_weight
+
+    @classmethod
+    def from_options(cls, options):
+        """Build from the request's imbalance value: a strategy name or an options dict.
+
+        Raises ValueError, naming what is accepted, for anything else.
+        """
+        if options is None:
+            return cls()
+        if isinstance(options, str):
+            options = {'strategy': options}
+        if not isinstance(options, dict):
+            raise ValueError(f"imbalance must be a strategy name or an object with {', '.join(OPTIONS)}")
+        unknown = sorted(set(options) - set(OPTIONS))
+        if unknown:
+            raise ValueError(
+                f"Unknown imbalance options {', '.join(unknown)}; accepted options are {', '.join(OPTIONS)}")
+        return cls(**options)
+
+    def to_dict(self):
+        return {
+            'strategy': self.strategy,
+            'random_state': self.random_state,
+            'max_minority_rows': self.max_minority_rows,
+            'majority_ratio': self.majority_ratio,
+            'class_weight': self.class_weight
+        }
+
+    def model_params(self):
+        """Forest parameters this strategy requires"""
+        return {'class_weight': self.class_weight} if self.strategy == 'class_weight' else {}
+
+    def resample(self, data, target):
+        """Return (data, target, stats) with the strategy applied"""
+        start = time.perf_counter()
+        target_values = np.asarray(target)
+        rows_before = len(target_values)
+
+        if self.strategy == 'smote':
+            data, target = SMOTE(random_state=self.random_state).fit_resample(data, target)
+        elif self.strategy == 'smote_sample':
+            data, target = self._smote_sample(data, target, target_values)
+        elif self.strategy == 'undersample':
+            classes, counts = np.unique(target_values, return_counts=True)
+            minority, majority = classes[counts.argmin()], classes[counts.argmax()]
+            keep = min(counts.max(), int(counts.min() * self.majority_ratio))
+            sampler = RandomUnderSampler(sampling_strategy={majority: keep, minority: counts.min()},
+                                         random_state=self.random_state)
+            data, target = sampler.fit_resample(data, target)
+
+        stats = {
+            'strategy': self.strategy,
+            'rows_before': rows_before,
+            'rows_after': len(target),
+            'class_counts': {str(k): int(v) for k, v in zip(*np.unique(np.asarray(target), return_counts=True))},
+            'seconds': time.perf_counter() - start
+        }
+        logger.info("Imbalance strategy %s: %d -> %d rows in %.3fs",
+                    self.strategy, rows_before, stats['rows_after'], stats['seconds'])
+        return data, target, stats
+
+    def _smote_sample(self, data, target, target_values):
+        classes, counts = np.unique(target_values, return_counts=True)
+        minority, majority = classes[counts.argmin()], classes[counts.argmax()]
+        minority_rows = np.flatnonzero(target_values == minority)
+        if len(minority_rows) <= self.max_minority_rows:
+            return SMOTE(random_state=self.random_state).fit_resample(data, target)
+
+        # SMOTE sees the majority rows and a minority sample; the other real
+        # minority rows are appended afterwards without entering the kNN search
+        rng = np.random.default_rng(self.random_state)
+        seeds = rng.choice(minority_rows, self.max_minority_rows, replace=False)
+        rest = np.setdiff1d(minority_rows, seeds)
+        fit_rows = np.sort(np.concatenate([np.flatnonzero(target_values == majority), seeds]))
+
+        synthetic = counts.max() - len(minority_rows)
+        smote = SMOTE(random_state=self.random_state,
+                      sampling_strategy={minority: len(seeds) + synthetic})
+        resampled, resampled_target = smote.fit_resample(_take(data, fit_rows), _take(target, fit_rows))
+        return _concat([resampled, _take(data, rest)]), _concat([resampled_target, _take(target, rest)])
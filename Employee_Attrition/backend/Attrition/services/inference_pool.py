@@ -0,0 +1,119 @@
+import time
+import asyncio
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections
+from Attrition.services.metrics import (
+    PREDICTION_IN_FLIGHT, PREDICTION_QUEUE_DEPTH, PREDICTION_QUEUE_WAIT_SECONDS, PREDICTION_REJECTED
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturatedError(Exception):
+    """Raised when a process already has its maximum number of predictions in flight"""
+
+    def __init__(self, retry_after):
+        super().__init__("Prediction capacity exhausted, retry later")
+        self.retry_after = retry_after
+
+
+class InferencePool:
+    """Bounded thread pool that runs CPU-bound predictions off the event loop.
+
+    At most max_in_flight calls are admitted per process (running plus
+    waiting for a thread); further calls fail fast with PoolSaturatedError
+    instead of queueing without limit.
+    """
+
+    def __init__(self, max_workers=2, max_in_flight=16, retry_after=1):
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prediction')
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.running = 0
+        self.started = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _publish(self):
+        """Export the load gauges (caller holds the lock)"""
+        PREDICTION_IN_FLIGHT.set(self.in_flight)
+        PREDICTION_QUEUE_DEPTH.set(self.in_flight - self.running)
+
+    def _admit(self):
+        with self._lock:
+            if self.in_flight >= self.max_in_flight:
+                self.rejected += 1
+                PREDICTION_REJECTED.inc()
+                raise PoolSaturatedError(self.retry_after)
+            self.in_flight += 1
+            self._publish()
+
+    def _release(self, future=None):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+            self._publish()
+
+    def _timed(self, enqueued, fn, args):
+        """Run fn in a worker thread, recording how long it waited for one"""
+        waited = time.perf_counter() - enqueued
+        with self._lock:
+            self.running += 1
+            self.started += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            self._publish()
+        PREDICTION_QUEUE_WAIT_SECONDS.observe(waited)
+        # Pool threads outlive requests, so the request_started/finished
+        # signals never recycle their connections; do it around each task
+        close_old_connections()
+        try:
+            return fn(*args)
+        finally:
+            close_old_connections()
+            with self._lock:
+                self.running -= 1
+                self._publish()
+
+    async def run(self, fn, *args):
+        """Await fn(*args) on the pool, raising PoolSaturatedError when full"""
+        self._admit()
+        try:
+            future = self._executor.submit(self._timed, time.perf_counter(), fn, args)
+        except Exception:
+            self._release()
+            raise
+        # Released when the thread finishes, even if the client went away first
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self):
+        """Return pool load counters"""
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_in_flight': self.max_in_flight,
+                'in_flight': self.in_flight,
+                'running': self.running,
+                'queue_depth': self.in_flight - self.running,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'wait_seconds_total': self.wait_seconds_total,
+                'wait_seconds_max': self.wait_seconds_max,
+                'wait_seconds_avg': self.wait_seconds_total / self.started if self.started else 0.0
+            }
+
+
+inference_pool = InferencePool(
+    max_workers=getattr(settings, 'PREDICTION_MAX_WORKERS', 2),
+    max_in_flight=getattr(settings, 'PREDICTION_MAX_IN_FLIGHT', 16),
+    retry_after=getattr(settings, 'PREDICTION_RETRY_AFTER', 1)
+)
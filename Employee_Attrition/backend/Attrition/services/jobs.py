@@ -0,0 +1,191 @@
+import os
+import json
+import uuid
+import logging
+import threading
+from datetime import timedelta
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import django
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# App models are imported inside functions: spawned workers import this
+# module (to unpickle their tasks) before django.setup() has run
+
+
+class JobRequest:
+    """Request-like wrapper so Training.train can run outside a view"""
+    def __init__(self, data):
+        self.body = json.dumps(data).encode('utf-8')
+
+
+class QueueFullError(Exception):
+    """Raised when too many training jobs are already queued or running"""
+
+
+def _init_worker():
+    """Set up Django in a freshly spawned worker and lower its CPU priority"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    django.setup()
+    niceness = getattr(settings, 'TRAINING_WORKER_NICE', 10)
+    if niceness and hasattr(os, 'nice'):
+        os.nice(niceness)
+
+
+def run_training_job(job_id):
+    """Worker entry point: run Training.train for a queued job and record the outcome"""
+    from Attrition.models import TrainingJob
+    from Attrition.services.training import Training
+
+    # fail_stale_jobs may fail a job at any point; status changes are only
+    # written while the row still holds the status this worker expects
+    started = TrainingJob.objects.filter(job_id=job_id, status='queued').update(
+        status='running', started_at=timezone.now())
+    if not started:
+        logger.warning("Training job %s is no longer queued; not running it", job_id)
+        return TrainingJob.objects.get(job_id=job_id).status
+
+    job = TrainingJob.objects.get(job_id=job_id)
+    request_data = dict(job.request_data)
+    model_params = dict(request_data.get('model_params') or {})
+    # Cap the forest's own parallelism so jobs leave cores for prediction traffic
+    model_params['n_jobs'] = getattr(settings, 'TRAINING_JOB_N_JOBS', 1)
+    request_data['model_params'] = model_params
+
+    try:
+        response = Training().train(JobRequest(request_data))
+    except Exception as e:
+        response = {'status': 500, 'response': f"Exception during training: {str(e)}"}
+
+    if response.get('status') == 200:
+        outcome = {
+            'status': 'done',
+            'model_id': response.get('model_id'),
+            'metrics': dict(response.get('metrics') or {})
+        }
+    else:
+        outcome = {'status': 'failed', 'error': response.get('response')}
+    finished = TrainingJob.objects.filter(job_id=job_id, status='running').update(
+        finished_at=timezone.now(), **outcome)
+    if not finished:
+        logger.warning("Training job %s was marked failed while it ran; keeping that status (model %s)",
+                       job_id, outcome.get('model_id'))
+        return TrainingJob.objects.get(job_id=job_id).status
+    return outcome['status']
+
+
+class TrainingJobQueue:
+    """Bounded process pool that runs training jobs off the request thread"""
+
+    def __init__(self, max_workers=1, max_pending=4, timeout=7200):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self._submit_lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker
+                )
+            return self._executor
+
+    def _on_done(self, job_id, future):
+        """Mark the job failed if the worker died before recording a result"""
+        from Attrition.models import TrainingJob
+
+        error = future.exception()
+        if error is None:
+            return
+        logger.error("Training job %s crashed: %s", job_id, error)
+        if isinstance(error, BrokenProcessPool):
+            with self._lock:
+                self._executor = None
+        try:
+            TrainingJob.objects.filter(job_id=job_id, status__in=['queued', 'running']).update(
+                status='failed', error=f"Worker error: {str(error)}", finished_at=timezone.now())
+        finally:
+            close_old_connections()
+
+    def fail_stale_jobs(self):
+        """Mark jobs failed that were left queued or running past the timeout.
+
+        Rows of a worker that crashed, or of a server that restarted, are
+        never finished by anyone else and would otherwise count against
+        max_pending forever.
+        """
+        from Attrition.models import TrainingJob
+
+        cutoff = timezone.now() - timedelta(seconds=self.timeout)
+        stale = (
+            TrainingJob.objects.filter(status='queued', created_at__lt=cutoff) |
+            TrainingJob.objects.filter(status='running', started_at__lt=cutoff)
+        )
+        count = stale.update(
+            status='failed',
+            error=f"Job did not finish within {self.timeout}s; its worker or server stopped",
+            finished_at=timezone.now()
+        )
+        if count:
+            logger.warning("Marked %d stale training jobs failed", count)
+        return count
+
+    def submit(self, request_data):
+        """Queue a training job and return its row, or raise QueueFullError"""
+        from Attrition.models import TrainingJob
+
+        # Count and insert together so concurrent submits in this process
+        # cannot both pass the limit
+        with self._submit_lock, transaction.atomic():
+            self.fail_stale_jobs()
+            pending = list(
+                TrainingJob.objects.select_for_update()
+                .filter(status__in=['queued', 'running']).values_list('job_id', flat=True)
+            )
+            if len(pending) >= self.max_pending:
+                raise QueueFullError(f"Too many training jobs in progress ({len(pending)})")
+            job = TrainingJob.objects.create(job_id=uuid.uuid4(), request_data=request_data)
+
+        try:
+            future = self._get_executor().submit(run_training_job, job.job_id)
+        except Exception as e:
+            job.status = 'failed'
+            job.error = f"Could not start job: {str(e)}"
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'error', 'finished_at'])
+            with self._lock:
+                self._executor = None  # A broken pool is rebuilt on the next submit
+            raise
+
+        future.add_done_callback(lambda f: self._on_done(job.job_id, f))
+        logger.info("Queued training job %s", job.job_id)
+        return job
+
+    def to_dict(self, job):
+        return {
+            'job_id': str(job.job_id),
+            'status': job.status,
+            'model_id': job.model_id,
+            'metrics': job.metrics,
+            'error': job.error,
+            'created_at': job.created_at.isoformat() if job.created_at else None,
+            'started_at': job.started_at.isoformat() if job.started_at else None,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None
+        }
+
+
+training_queue = TrainingJobQueue(
+    max_workers=getattr(settings, 'TRAINING_MAX_WORKERS', 1),
+    max_pending=getattr(settings, 'TRAINING_MAX_PENDING_JOBS', 4),
+    timeout=getattr(settings, 'TRAINING_JOB_TIMEOUT', 7200)
+)
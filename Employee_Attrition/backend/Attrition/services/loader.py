@@ -0,0 +1,107 @@
+from itertools import islice
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import models, transaction
+from Attrition.models import DataVersion, EmployeeData
+
+# DataVersion row bumped whenever employees are imported or added
+EMPLOYEE_DATA = 'employees'
+
+
+def training_row_count():
+    """Number of employees (ordered by EmployeeNumber) used for training; the rest are holdout"""
+    return getattr(settings, 'TRAINING_ROWS', 1450)
+
+
+def training_queryset():
+    """Employees used for training"""
+    return EmployeeData.objects.all().order_by("EmployeeNumber")[:training_row_count()]
+
+
+def holdout_start():
+    """First holdout EmployeeNumber, or None if every employee is in the training range"""
+    offset = training_row_count()
+    return (
+        EmployeeData.objects.order_by("EmployeeNumber")
+        .values_list("EmployeeNumber", flat=True)[offset:offset + 1]
+        .first()
+    )
+
+
+def training_watermark():
+    """Highest EmployeeNumber in the training range, or None without employees"""
+    start = holdout_start()
+    queryset = EmployeeData.objects.all()
+    if start is not None:
+        queryset = queryset.filter(EmployeeNumber__lt=start)
+    return queryset.aggregate(last=models.Max("EmployeeNumber"))["last"]
+
+
+def employee_data_version():
+    """Counter bumped by every employee write path (0 before the first write)"""
+    return DataVersion.objects.filter(name=EMPLOYEE_DATA).values_list('version', flat=True).first() or 0
+
+
+def bump_employee_data_version():
+    """Mark the employee rows as changed for caches keyed on employee_data_version"""
+    with transaction.atomic():
+        DataVersion.objects.get_or_create(name=EMPLOYEE_DATA)
+        DataVersion.objects.filter(name=EMPLOYEE_DATA).update(version=models.F('version') + 1)
+
+
+def load_employee_frame(queryset=None, chunk_size=10000):
+    """Load employees into typed columns without building per-row dicts.
+
+    Rows are streamed with values_list().iterator() in chunks and written
+    straight into preallocated arrays: int32 for integer fields and
+    categorical codes for CharFields. Categories are sorted so one-hot
+    encoding drops the same baseline as get_dummies on object columns.
+    """
+    if queryset is None:
+        queryset = EmployeeData.objects.order_by("EmployeeNumber")
+
+    fields = EmployeeData._meta.concrete_fields
+    names = [f.name for f in fields]
+    is_text = [isinstance(f, models.CharField) for f in fields]
+
+    capacity = max(queryset.count(), 1)
+    columns = [np.empty(capacity, dtype=np.int32) for _ in names]
+    lookups = [{} if text else None for text in is_text]
+
+    n_rows = 0
+    rows = queryset.values_list(*names).iterator(chunk_size=chunk_size)
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            break
+
+        end = n_rows + len(batch)
+        if end > capacity:
+            # Rows were added after the count; grow the columns
+            capacity = max(end, capacity * 2)
+            columns = [np.resize(column, capacity) for column in columns]
+
+        for i, values in enumerate(zip(*batch)):
+            lookup = lookups[i]
+            if lookup is None:
+                columns[i][n_rows:end] = values
+            else:
+                columns[i][n_rows:end] = [lookup.setdefault(v, len(lookup)) for v in values]
+        n_rows = end
+
+    data = {}
+    for name, column, lookup in zip(names, columns, lookups):
+        column = column[:n_rows]
+        if lookup is None:
+            data[name] = column
+            continue
+
+        categories = sorted(lookup)
+        remap = np.empty(len(categories), dtype=np.int32)
+        for code, value in enumerate(categories):
+            remap[lookup[value]] = code
+        codes = remap[column] if len(categories) else column
+        data[name] = pd.Categorical.from_codes(codes, categories=categories)
+
+    return pd.DataFrame(data, copy=False)
@@ -0,0 +1,98 @@
+import os
+import time
+from contextlib import contextmanager
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+from prometheus_client import multiprocess
+
+# Prometheus metrics for the prediction and training paths.
+#
+# With PROMETHEUS_MULTIPROC_DIR set (see the Dockerfile) every worker process
+# writes its samples to files in that directory and /metrics aggregates them,
+# so a scrape covers all gunicorn workers and training job processes. Gauges
+# use 'livesum' so values of exited processes drop out.
+
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+TRAINING_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+PREDICTION_STAGE_SECONDS = Histogram(
+    'attrition_prediction_stage_seconds',
+    "Time spent in each stage of a single prediction; metadata and load only run on model cache misses",
+    ['stage'],
+    buckets=STAGE_BUCKETS
+)
+PREDICTIONS = Counter(
+    'attrition_predictions_total',
+    "Prediction requests by model and outcome",
+    ['endpoint', 'model_id', 'outcome']
+)
+TRAINING_STAGE_SECONDS = Histogram(
+    'attrition_training_stage_seconds',
+    "Time spent in each stage of model training",
+    ['stage'],
+    buckets=TRAINING_BUCKETS
+)
+TRAINING_RUNS = Counter(
+    'attrition_training_runs_total',
+    "Training runs by outcome",
+    ['outcome']
+)
+MODEL_CACHE_REQUESTS = Counter(
+    'attrition_model_cache_requests_total',
+    "Model cache lookups by result",
+    ['result']
+)
+MODEL_CACHE_RESIDENT_BYTES = Gauge(
+    'attrition_model_cache_resident_bytes',
+    "Size of the model files held in the model cache",
+    multiprocess_mode='livesum'
+)
+MODEL_CACHE_MODELS = Gauge(
+    'attrition_model_cache_models',
+    "Models held in the model cache",
+    multiprocess_mode='livesum'
+)
+PREDICTION_IN_FLIGHT = Gauge(
+    'attrition_prediction_in_flight',
+    "Async predictions admitted and not yet finished",
+    multiprocess_mode='livesum'
+)
+PREDICTION_QUEUE_DEPTH = Gauge(
+    'attrition_prediction_queue_depth',
+    "Async predictions waiting for an inference thread",
+    multiprocess_mode='livesum'
+)
+PREDICTION_QUEUE_WAIT_SECONDS = Histogram(
+    'attrition_prediction_queue_wait_seconds',
+    "Time async predictions waited for an inference thread",
+    buckets=STAGE_BUCKETS
+)
+PREDICTION_REJECTED = Counter(
+    'attrition_prediction_rejected_total',
+    "Async predictions refused because the inference pool was full"
+)
+LOG_RECORDS_DROPPED = Counter(
+    'attrition_log_records_dropped_total',
+    "Log records dropped because the logging queue was full"
+)
+
+
+@contextmanager
+def stage_timer(histogram, stage, **labels):
+    """Observe the duration of the with-block under the given stage label"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(stage=stage, **labels).observe(time.perf_counter() - start)
+
+
+def render_metrics():
+    """Return (body, content type) for a scrape, aggregating worker processes when configured"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
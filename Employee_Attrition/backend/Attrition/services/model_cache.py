@@ -0,0 +1,161 @@
+import os
+import threading
+import logging
+from collections import OrderedDict
+from django.conf import settings
+from Attrition.services.metrics import MODEL_CACHE_REQUESTS, MODEL_CACHE_RESIDENT_BYTES, MODEL_CACHE_MODELS
+
+logger = logging.getLogger(__name__)
+
+# Concurrent misses for models sharing a stripe load one after the other
+LOAD_LOCK_STRIPES = 16
+
+class ModelCache:
+    """Process-wide LRU cache of loaded models keyed by model_id"""
+
+    def __init__(self, max_models=4, max_bytes=512 * 1024 * 1024, instrument=True):
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        # Only the prediction model cache exports the model cache metrics
+        self.instrument = instrument
+        self._entries = OrderedDict()
+        # Striped so the lock set stays fixed however many model ids are requested
+        self._load_locks = [threading.Lock() for _ in range(LOAD_LOCK_STRIPES)]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _file_signature(self, path):
+        """Return (mtime, size) used to detect a replaced model file"""
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _lookup(self, model_id):
+        """Return a cached value if its file is unchanged, else None (caller holds the lock)"""
+        entry = self._entries.get(model_id)
+        if entry is None:
+            return None
+
+        try:
+            signature = self._file_signature(entry['path'])
+        except OSError:
+            signature = None
+
+        if signature != entry['signature']:
+            # File was removed or rewritten since it was loaded
+            del self._entries[model_id]
+            self.invalidations += 1
+            self._publish()
+            logger.info("Invalidated cached model %s", model_id)
+            return None
+
+        self._entries.move_to_end(model_id)
+        return entry['value']
+
+    def _publish(self):
+        """Export resident model gauges (caller holds the lock)"""
+        if not self.instrument:
+            return
+        MODEL_CACHE_MODELS.set(len(self._entries))
+        MODEL_CACHE_RESIDENT_BYTES.set(sum(e['signature'][1] for e in self._entries.values()))
+
+    def _count(self, result):
+        if self.instrument:
+            MODEL_CACHE_REQUESTS.labels(result=result).inc()
+
+    def _evict(self):
+        """Drop least recently used models until within limits (caller holds the lock)"""
+        total_bytes = sum(e['signature'][1] for e in self._entries.values())
+        while len(self._entries) > 1 and (
+                len(self._entries) > self.max_models or total_bytes > self.max_bytes):
+            model_id, entry = self._entries.popitem(last=False)
+            total_bytes -= entry['signature'][1]
+            self.evictions += 1
+            logger.info("Evicted cached model %s", model_id)
+
+    def get(self, model_id, resolve_path, load):
+        """Return the cached value for model_id, loading it once on a miss.
+
+        resolve_path(model_id) returns the model file path and load(path)
+        returns the value to cache. Concurrent misses for the same model
+        wait on the same striped lock so the file is only loaded once.
+        """
+        with self._lock:
+            value = self._lookup(model_id)
+            if value is not None:
+                self.hits += 1
+                self._count('hit')
+                return value
+            load_lock = self._load_locks[hash(model_id) % LOAD_LOCK_STRIPES]
+
+        with load_lock:
+            # Another request may have finished loading while we waited
+            with self._lock:
+                value = self._lookup(model_id)
+                if value is not None:
+                    self.hits += 1
+                    self._count('hit')
+                    return value
+
+            # Unknown ids raise here and are not counted as misses
+            path = resolve_path(model_id)
+            signature = self._file_signature(path)
+            with self._lock:
+                self.misses += 1
+                self._count('miss')
+            value = load(path)
+
+            with self._lock:
+                self._entries[model_id] = {
+                    'path': path,
+                    'signature': signature,
+                    'value': value
+                }
+                self._evict()
+                self._publish()
+
+        return value
+
+    def version(self, model_id):
+        """Signature of the loaded file for a cached model, or None"""
+        with self._lock:
+            entry = self._entries.get(model_id)
+            if entry is None:
+                return None
+            mtime_ns, size = entry['signature']
+            return f"{mtime_ns}-{size}"
+
+    def invalidate(self, model_id):
+        """Remove a model from the cache"""
+        with self._lock:
+            if self._entries.pop(model_id, None) is not None:
+                self.invalidations += 1
+                self._publish()
+
+    def clear(self):
+        """Remove all cached models"""
+        with self._lock:
+            self._entries.clear()
+            self._publish()
+
+    def stats(self):
+        """Return cache counters and resident models"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'max_models': self.max_models,
+                'max_bytes': self.max_bytes,
+                'resident_bytes': sum(e['signature'][1] for e in self._entries.values()),
+                'models': list(self._entries.keys())
+            }
+
+
+model_cache = ModelCache(
+    max_models=getattr(settings, 'MODEL_CACHE_MAX_MODELS', 4),
+    max_bytes=getattr(settings, 'MODEL_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+)
@@ -1,16 +1,22 @@
 import os
-import pandas as pd
+import numpy as np
 import json
 import pickle
 from rest_framework import status
 import logging
 from collections import defaultdict
+from Attrition.services.model_cache import model_cache
+from Attrition.services.result_cache import result_cache
+from Attrition.services.encoder import FeatureEncoder
+from Attrition.services.errors import InvalidRequestError
+from Attrition.services.forest import compile_model
+from Attrition.services.artifact import ARTIFACT_SUFFIX, artifact_path, open_forest_artifact
+from Attrition.services.registry import ModelRegistry
+from Attrition.services.metrics import PREDICTION_STAGE_SECONDS, PREDICTIONS, stage_timer
+from django.conf import settings
+from Attrition.models import EmployeeData
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    filename=os.path.join(os.getcwd(), 'log', 'prediction.log'))
+# Handlers are configured once in settings.LOGGING
 logger = logging.getLogger(__name__)
 
 class Prediction:
@@ -18,67 +24,124 @@ class Prediction:
         self.base_path = os.getcwd()
         self.pickle_path = os.path.normpath(os.path.join(self.base_path, 'pickle'))
         self.models_dir = os.path.normpath(os.path.join(self.pickle_path, 'models'))
-        self.metadata_file = os.path.normpath(os.path.join(self.pickle_path, 'model_metadata.json'))
+        self.registry = ModelRegistry()
         os.makedirs(self.models_dir, exist_ok=True)
 
     def get_available_models(self):
         """Get list of available models with their metadata"""
         try:
-            with open(self.metadata_file, 'r') as f:
-                metadata = json.load(f)
-            return metadata.get('models', [])
+            return self.registry.list()
         except Exception as e:
             logger.error(f"Error loading model metadata: {str(e)}")
             return []
 
+    def _resolve_model_path(self, model_id):
+        """Find the model file from the registry, preferring the mmap artifact for the compiled backend"""
+        with stage_timer(PREDICTION_STAGE_SECONDS, 'metadata'):
+            info = self.registry.get(model_id, include_features=False)
+        filename = info['filename']
+
+        pickle_file = os.path.join(self.models_dir, filename)
+        backend = info.get('inference_backend') or getattr(settings, 'PREDICTION_BACKEND', 'sklearn')
+        if backend == 'compiled' and os.path.exists(artifact_path(pickle_file)):
+            return artifact_path(pickle_file)
+
+        if not os.path.exists(pickle_file):
+            raise FileNotFoundError(f"Model file {filename} not found")
+
+        return pickle_file
+
+    def _load_model_file(self, pickle_file):
+        """Load a model file and return the model with its feature encoder"""
+        with stage_timer(PREDICTION_STAGE_SECONDS, 'load'):
+            return self._read_model_file(pickle_file)
+
+    def _read_model_file(self, pickle_file):
+        if pickle_file.endswith(ARTIFACT_SUFFIX):
+            # Tree arrays are mapped, not copied, so workers share page-cache memory
+            compiled, encoder_data = open_forest_artifact(
+                pickle_file, verify=getattr(settings, 'MODEL_ARTIFACT_VERIFY', True))
+            return compiled, FeatureEncoder.from_dict(encoder_data)
+
+        with open(pickle_file, 'rb') as f:
+            model_data = pickle.load(f)
+
+        if not isinstance(model_data, dict) or 'model' not in model_data:
+            raise ValueError("Invalid model file format")
+
+        if model_data.get('encoder') is not None:
+            encoder = FeatureEncoder.from_dict(model_data['encoder'])
+        elif model_data.get('feature_names') is not None:
+            # Models saved before the encoder was persisted
+            encoder = FeatureEncoder.from_feature_names(model_data['feature_names'])
+        else:
+            raise ValueError("Feature names not found in model file")
+
+        # Swap in the flattened forest when selected for this model
+        model = model_data['model']
+        self._drop_feature_names(model, encoder)
+        backend = model_data.get('inference_backend') or getattr(settings, 'PREDICTION_BACKEND', 'sklearn')
+        if backend == 'compiled':
+            compiled = compile_model(model)
+            if compiled is not None:
+                model = compiled
+            else:
+                logger.warning(f"Compiled backend not supported for {type(model).__name__}, using sklearn")
+
+        return model, encoder
+
+    def _drop_feature_names(self, model, encoder):
+        """Forget the DataFrame columns a model was fit on.
+
+        Inputs are encoded to plain arrays in the encoder's feature order;
+        once that order is checked against the fitted columns, sklearn no
+        longer needs the names and stops warning about unnamed input.
+        """
+        fitted = getattr(model, 'feature_names_in_', None)
+        if fitted is None:
+            return
+        if list(fitted) != list(encoder.feature_names):
+            raise ValueError("Model was fit on different columns than its feature encoder")
+        del model.feature_names_in_
+
     def load_model(self, model_id):
         """Load the trained model with error handling"""
         try:
-            # Find model filename from metadata
-            with open(self.metadata_file, 'r') as f:
-                metadata = json.load(f)
-            
-            model_info = next((m for m in metadata['models'] if m['model_id'] == model_id), None)
-            if not model_info:
-                raise ValueError(f"Model with ID {model_id} not found")
-                
-            pickle_file = os.path.join(self.models_dir, model_info['filename'])
-            if not os.path.exists(pickle_file):
-                raise FileNotFoundError(f"Model file {model_info['filename']} not found")
-                
-            with open(pickle_file, 'rb') as f:
-                model_data = pickle.load(f)
-                
-            if not isinstance(model_data, dict) or 'model' not in model_data:
-                raise ValueError("Invalid model file format")
-                
-            return model_data['model'], model_data.get('feature_names')
-            
+            # Served from the process-wide cache after the first load
+            return model_cache.get(model_id, self._resolve_model_path, self._load_model_file)
+
         except Exception as e:
             logger.error(f"Error loading model: {str(e)}")
             raise
 
-    def preprocess_input(self, input_data, expected_features):
-        """Preprocess the input data to match training format"""
+    def _predict_proba(self, model_id, model, features):
+        """predict_proba through the result cache; returns (probabilities, per-row cache hits)"""
+        version = model_cache.version(model_id)
+        if result_cache is None or version is None or not len(features):
+            return model.predict_proba(features), [False] * len(features)
+
+        keys = result_cache.keys(model_id, version, features)
+        cached = result_cache.get_many(keys)
+        hits = [key in cached for key in keys]
+
+        # Only rows without a cached result go to the model
+        probabilities = np.empty((len(keys), len(model.classes_)))
+        missing = [i for i, hit in enumerate(hits) if not hit]
+        if missing:
+            computed = model.predict_proba(features[missing])
+            probabilities[missing] = computed
+            result_cache.set_many({keys[i]: row.tolist() for i, row in zip(missing, computed)})
+        for i, hit in enumerate(hits):
+            if hit:
+                probabilities[i] = cached[keys[i]]
+        return probabilities, hits
+
+    def preprocess_input(self, input_data, encoder):
+        """Encode input records directly into the model's feature matrix"""
         try:
-            # Convert JSON to DataFrame
-            df_pred = pd.json_normalize(input_data)
-            logger.info(f"Input data shape: {df_pred.shape}")
-            
-            # One-hot encode categorical features
-            df_pred = pd.get_dummies(df_pred)
-            
-            # Ensure all expected features are present
-            for feature in expected_features:
-                if feature not in df_pred.columns:
-                    df_pred[feature] = 0  # Add missing features with 0
-                    logger.warning(f"Added missing feature: {feature}")
-            
-            # Ensure correct feature order
-            df_pred = df_pred[expected_features]
-            
-            return df_pred
-            
+            records = input_data if isinstance(input_data, list) else [input_data]
+            return encoder.transform(records)
+
         except Exception as e:
             logger.error(f"Error preprocessing input: {str(e)}")
             raise
@@ -91,10 +154,12 @@ class Prediction:
             'error': None
         }
         
+        model_label = ''
         try:
             # Parse input data
             try:
-                input_data = json.loads(request.body.decode('utf-8'))
+                with stage_timer(PREDICTION_STAGE_SECONDS, 'parse'):
+                    input_data = json.loads(request.body.decode('utf-8'))
                 model_id = input_data.get('model_id')
                 if not model_id:
                     raise ValueError("model_id is required")
@@ -103,36 +168,46 @@ class Prediction:
                 if not prediction_data:
                     raise ValueError("Prediction data is required")
                     
-                logger.info(f"Received prediction request for model {model_id}")
+                logger.info("Received prediction request for model %s", model_id)
             except json.JSONDecodeError:
                 raise ValueError("Invalid JSON input")
             
-            # Load model and feature names
-            model, feature_names = self.load_model(model_id)
-            if feature_names is None:
-                raise ValueError("Feature names not found in model file")
+            # Load model and feature encoder
+            model, encoder = self.load_model(model_id)
+            # Only registered ids become metric labels, not arbitrary input
+            model_label = model_id
             
             # Preprocess input data
-            df_pred = self.preprocess_input(prediction_data, feature_names)
+            with stage_timer(PREDICTION_STAGE_SECONDS, 'preprocess'):
+                features, unknowns, errors = self.preprocess_input(prediction_data, encoder)
+            if errors[0]:
+                raise ValueError(errors[0])
             
-            # Make prediction
-            prediction = model.predict(df_pred)
-            probabilities = model.predict_proba(df_pred)
+            # Make prediction (the class is the argmax of the probabilities)
+            with stage_timer(PREDICTION_STAGE_SECONDS, 'predict'):
+                probabilities, cache_hits = self._predict_proba(model_id, model, features)
+            prediction = model.classes_.take(np.argmax(probabilities, axis=1))
             
             # Prepare response
             result = {
                 "prediction": "Yes" if prediction[0] == 1 else "No",
                 "probability": float(probabilities[0][1]),  # Probability of "Yes"
                 "confidence": self._get_confidence_level(probabilities[0][1]),
-                "model_id": model_id
+                "model_id": model_id,
+                "unknown_categories": unknowns[0],
+                "cache_hit": cache_hits[0]
             }
             
             response['response'] = result
-            logger.info(f"Prediction successful: {result}")
+            PREDICTIONS.labels(endpoint='single', model_id=model_id, outcome='success').inc()
+            logger.info("Prediction for model %s: %s", model_id, result['prediction'],
+                        extra={'model_id': model_id, 'probability': result['probability'],
+                               'cache_hit': result['cache_hit']})
             
         except Exception as e:
             error_msg = f"Prediction error: {str(e)}"
             logger.error(error_msg, exc_info=True)
+            PREDICTIONS.labels(endpoint='single', model_id=model_label, outcome='error').inc()
             response.update({
                 'status': status.HTTP_500_INTERNAL_SERVER_ERROR,
                 'error': error_msg
@@ -140,6 +215,139 @@ class Prediction:
         
         return response
 
+    def _employee_number(self, value):
+        """An integer employee number from an int or a digit string, else None (bools are rejected)"""
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, int):
+            return value
+        if isinstance(value, str) and value.strip().isdigit():
+            return int(value.strip())
+        return None
+
+    def _fetch_employee_records(self, employee_numbers, chunk_size=500):
+        """Fetch employee records in input order, with an error for each invalid or missing number"""
+        numbers = [self._employee_number(value) for value in employee_numbers]
+        found = {}
+        unique_numbers = list(dict.fromkeys(n for n in numbers if n is not None))
+        for start in range(0, len(unique_numbers), chunk_size):
+            chunk = unique_numbers[start:start + chunk_size]
+            for row in EmployeeData.objects.filter(EmployeeNumber__in=chunk).values():
+                found[row['EmployeeNumber']] = row
+
+        records, errors = [], []
+        for value, number in zip(employee_numbers, numbers):
+            record = found.get(number) if number is not None else None
+            records.append(record)
+            if number is None:
+                errors.append(f"Invalid employee number: {value!r}")
+            else:
+                errors.append(None if record is not None else f"Employee {number} not found")
+        return records, errors
+
+    def predict_batch(self, request):
+        """Make predictions for many records with a single model call"""
+        response = {
+            'status': status.HTTP_200_OK,
+            'response': None,
+            'error': None
+        }
+
+        model_label = ''
+        try:
+            # Parse input data
+            try:
+                input_data = json.loads(request.body.decode('utf-8'))
+                model_id = input_data.get('model_id')
+                if not model_id:
+                    raise ValueError("model_id is required")
+
+                records = input_data.get('data')
+                employee_numbers = input_data.get('employee_numbers')
+                if records is None and employee_numbers is None:
+                    raise ValueError("Either data or employee_numbers is required")
+                if records is not None and not isinstance(records, list):
+                    raise ValueError("data must be a list of records")
+                if employee_numbers is not None and not isinstance(employee_numbers, list):
+                    raise ValueError("employee_numbers must be a list")
+                max_rows = getattr(settings, 'PREDICTION_BATCH_MAX_ROWS', 10000)
+                n_rows = len(records if records is not None else employee_numbers)
+                if n_rows > max_rows:
+                    raise ValueError(f"Batch has {n_rows} rows, limit is {max_rows}")
+            except json.JSONDecodeError:
+                raise InvalidRequestError("Invalid JSON input")
+            except ValueError as e:
+                raise InvalidRequestError(str(e))
+
+            # Load model and feature encoder
+            model, encoder = self.load_model(model_id)
+            # Only registered ids become metric labels, not arbitrary input
+            model_label = model_id
+
+            # Resolve records, keeping per-row errors aligned with the input
+            if records is None:
+                records, errors = self._fetch_employee_records(employee_numbers)
+                results = [
+                    {'index': i, 'employee_number': number, 'error': error}
+                    for i, (number, error) in enumerate(zip(employee_numbers, errors))
+                ]
+            else:
+                errors = [None if isinstance(r, dict) else "Record must be an object" for r in records]
+                results = [{'index': i, 'error': error} for i, error in enumerate(errors)]
+
+            # Encode all valid rows into one matrix and score it in one call
+            valid_rows = [i for i, error in enumerate(errors) if error is None]
+            if valid_rows:
+                features, unknowns, encode_errors = self.preprocess_input(
+                    [records[i] for i in valid_rows], encoder)
+                for row, error in zip(valid_rows, encode_errors):
+                    results[row]['error'] = error
+                scored = [j for j, error in enumerate(encode_errors) if error is None]
+                valid_rows = [valid_rows[j] for j in scored]
+
+            if valid_rows:
+                probabilities, cache_hits = self._predict_proba(model_id, model, features[scored])
+                predictions = model.classes_.take(np.argmax(probabilities, axis=1))
+
+                for row, j, prediction, probability, cache_hit in zip(
+                        valid_rows, scored, predictions, probabilities[:, 1], cache_hits):
+                    results[row].update({
+                        "prediction": "Yes" if prediction == 1 else "No",
+                        "probability": float(probability),
+                        "confidence": self._get_confidence_level(probability),
+                        "unknown_categories": unknowns[j],
+                        "cache_hit": cache_hit
+                    })
+
+            response['response'] = {
+                'model_id': model_id,
+                'count': len(results),
+                'failed': len(results) - len(valid_rows),
+                'results': results
+            }
+            PREDICTIONS.labels(endpoint='batch', model_id=model_id, outcome='success').inc()
+            logger.info("Batch prediction for model %s: %d/%d rows scored", model_id, len(valid_rows), len(results))
+
+        except InvalidRequestError as e:
+            error_msg = f"Invalid prediction request: {str(e)}"
+            logger.warning(error_msg)
+            PREDICTIONS.labels(endpoint='batch', model_id='', outcome='invalid').inc()
+            response.update({
+                'status': status.HTTP_400_BAD_REQUEST,
+                'error': error_msg
+            })
+
+        except Exception as e:
+            error_msg = f"Prediction error: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            PREDICTIONS.labels(endpoint='batch', model_id=model_label, outcome='error').inc()
+            response.update({
+                'status': status.HTTP_500_INTERNAL_SERVER_ERROR,
+                'error': error_msg
+            })
+
+        return response
+
     def _get_confidence_level(self, probability):
         """Convert probability to confidence level"""
         if probability > 0.8 or probability < 0.2:
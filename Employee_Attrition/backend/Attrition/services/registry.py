@@ -0,0 +1,87 @@
+import hashlib
+import json
+import logging
+from datetime import datetime, timezone
+from django.db import transaction
+from Attrition.models import FeatureSchema, TrainedModel
+
+logger = logging.getLogger(__name__)
+
+
+def schema_hash(features):
+    """Stable hash of an ordered feature list"""
+    return hashlib.sha256(json.dumps(list(features)).encode('utf-8')).hexdigest()
+
+
+def parse_timestamp(timestamp):
+    """Parse an ISO timestamp, treating naive values as UTC"""
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+
+class ModelRegistry:
+    """Database-backed registry of trained models and their feature schemas"""
+
+    def _to_dict(self, entry, include_features=True):
+        info = {
+            'model_id': entry.model_id,
+            'filename': entry.filename,
+            'timestamp': entry.timestamp.isoformat(),
+            'params': entry.params,
+            'metrics': entry.metrics,
+            'inference_backend': entry.inference_backend,
+            'is_promoted': entry.is_promoted,
+            'parent_id': entry.parent_id,
+            'trained_through': entry.trained_through
+        }
+        if include_features:
+            info['features'] = entry.schema.features
+        return info
+
+    def register(self, model_id, filename, timestamp, params, metrics, features, inference_backend=None,
+                 parent_id=None, trained_through=None):
+        """Insert a model row, reusing an existing schema with the same features"""
+        with transaction.atomic():
+            schema, _ = FeatureSchema.objects.get_or_create(
+                schema_hash=schema_hash(features),
+                defaults={'features': list(features)}
+            )
+            TrainedModel.objects.create(
+                model_id=model_id,
+                filename=filename,
+                timestamp=parse_timestamp(timestamp),
+                params=params,
+                metrics=metrics,
+                schema=schema,
+                inference_backend=inference_backend,
+                parent_id=parent_id,
+                trained_through=trained_through
+            )
+        logger.info("Registered model %s", model_id)
+
+    def get(self, model_id, include_features=True):
+        """Return a model's registry entry, raising ValueError if it is unknown"""
+        entry = (
+            TrainedModel.objects.select_related('schema').filter(model_id=model_id).first()
+            if include_features else TrainedModel.objects.filter(model_id=model_id).first()
+        )
+        if entry is None:
+            raise ValueError(f"Model with ID {model_id} not found")
+        return self._to_dict(entry, include_features)
+
+    def get_filename(self, model_id):
+        """Return only the model file name for a model"""
+        filename = TrainedModel.objects.filter(model_id=model_id).values_list('filename', flat=True).first()
+        if filename is None:
+            raise ValueError(f"Model with ID {model_id} not found")
+        return filename
+
+    def list(self, include_features=True):
+        """Return all registered models, oldest first"""
+        queryset = TrainedModel.objects.all()
+        if include_features:
+            queryset = queryset.select_related('schema')
+        return [self._to_dict(entry, include_features) for entry in queryset]
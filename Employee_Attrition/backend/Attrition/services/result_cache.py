@@ -0,0 +1,172 @@
+import time
+import hashlib
+import threading
+import logging
+import numpy as np
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+def feature_hash(row):
+    """Stable hash of one encoded feature vector"""
+    row = np.ascontiguousarray(row, dtype=np.float64)
+    return hashlib.blake2b(row.tobytes(), digest_size=16).hexdigest()
+
+
+class LocalResultStore:
+    """In-process LRU store with a per-entry TTL"""
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                expires, value = entry
+                if expires <= now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = value
+        return found
+
+    def set_many(self, values):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key, value in values.items():
+                self._entries[key] = (expires, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generation(self, prefix):
+        # Entries are deleted outright, so the generation never changes
+        return 0
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DjangoResultStore:
+    """Store backed by a Django cache alias, shared between worker processes.
+
+    Expiry and eviction are left to the cache backend. Keys cannot be
+    enumerated portably, so deleting a prefix bumps a generation counter
+    kept in the shared cache instead; keys carry the generation, so every
+    process stops reading the old entries and they age out with the TTL.
+    """
+
+    def __init__(self, ttl, alias='default'):
+        self.ttl = ttl
+        self.cache = caches[alias]
+
+    def get_many(self, keys):
+        return self.cache.get_many(keys)
+
+    def set_many(self, values):
+        self.cache.set_many(values, timeout=self.ttl)
+
+    def generation(self, prefix):
+        return self.cache.get(prefix + 'generation', 0)
+
+    def delete_prefix(self, prefix):
+        # Counter never expires, so an invalidated generation cannot come back
+        self.cache.add(prefix + 'generation', 0, timeout=None)
+        self.cache.incr(prefix + 'generation')
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+class PredictionResultCache:
+    """Caches results per (model_id, model version, generation, encoded feature vector).
+
+    The namespace keeps kinds of result apart when they share a store:
+    class probabilities under 'prediction', explanations under 'explanation'.
+    """
+
+    def __init__(self, store, namespace='prediction'):
+        self.store = store
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _prefix(self, model_id):
+        return f"{self.namespace}:{model_id}:"
+
+    def keys(self, model_id, version, features):
+        """Cache keys for each row of an encoded feature matrix"""
+        generation = self.store.generation(self._prefix(model_id))
+        prefix = f"{self._prefix(model_id)}{version}:{generation}:"
+        return [prefix + feature_hash(row) for row in features]
+
+    def get_many(self, keys):
+        """Return {key: result} for the keys that are cached"""
+        found = self.store.get_many(keys)
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set_many(self, values):
+        """Store {key: result}"""
+        if values:
+            self.store.set_many(values)
+
+    def invalidate(self, model_id):
+        """Drop cached results of a deleted or replaced model"""
+        self.store.delete_prefix(self._prefix(model_id))
+        logger.info("Invalidated cached %s results for model %s", self.namespace, model_id)
+
+    def clear(self):
+        self.store.clear()
+
+    def stats(self):
+        """Return cache counters"""
+        with self._lock:
+            return {
+                'backend': type(self.store).__name__,
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self.store)
+            }
+
+
+def build_result_cache(namespace='prediction'):
+    """Create the cache selected by PREDICTION_RESULT_CACHE ('local', 'django' or None)"""
+    backend = getattr(settings, 'PREDICTION_RESULT_CACHE', 'local')
+    ttl = getattr(settings, 'PREDICTION_RESULT_CACHE_TTL', 300)
+    if backend == 'django':
+        return PredictionResultCache(DjangoResultStore(
+            ttl, alias=getattr(settings, 'PREDICTION_RESULT_CACHE_ALIAS', 'default')), namespace)
+    if backend == 'local':
+        return PredictionResultCache(LocalResultStore(
+            ttl, getattr(settings, 'PREDICTION_RESULT_CACHE_MAX_ENTRIES', 10000)), namespace)
+    return None
+
+
+result_cache = build_result_cache()
@@ -0,0 +1,117 @@
+import time
+import logging
+import numpy as np
+from django.db import transaction
+from Attrition.models import EmployeeData, TrainedModel, RiskScore
+from Attrition.services.prediction import Prediction
+
+logger = logging.getLogger(__name__)
+
+
+class RiskScoring:
+    """Maintains the materialized RiskScore table for the promoted model"""
+
+    def __init__(self, chunk_size=5000):
+        self.chunk_size = chunk_size
+        self.predictor = Prediction()
+
+    def promoted_model_id(self):
+        return TrainedModel.objects.filter(is_promoted=True).values_list('model_id', flat=True).first()
+
+    def _score_rows(self, model_id, model, encoder, rows):
+        """Score a list of employee value dicts and upsert their RiskScore rows"""
+        features, _, errors = encoder.transform(rows)
+        scored = [i for i, error in enumerate(errors) if error is None]
+        if not scored:
+            return 0
+
+        probabilities = model.predict_proba(features[scored])
+        predictions = model.classes_.take(np.argmax(probabilities, axis=1))
+
+        scores = [
+            RiskScore(
+                employee_id=rows[i]['EmployeeNumber'],
+                model_id=model_id,
+                department=rows[i]['Department'],
+                probability=float(probability),
+                prediction="Yes" if prediction == 1 else "No",
+                confidence=self.predictor._get_confidence_level(probability)
+            )
+            for i, prediction, probability in zip(scored, predictions, probabilities[:, 1])
+        ]
+        with transaction.atomic():
+            RiskScore.objects.bulk_create(
+                scores,
+                update_conflicts=True,
+                unique_fields=['employee', 'model'],
+                update_fields=['department', 'probability', 'prediction', 'confidence', 'scored_at']
+            )
+        return len(scores)
+
+    def score(self, model_id, employee_numbers=None):
+        """Score all employees, or only the given ones, with a model"""
+        start = time.perf_counter()
+        model, encoder = self.predictor.load_model(model_id)
+
+        queryset = EmployeeData.objects.order_by('EmployeeNumber')
+        if employee_numbers is not None:
+            queryset = queryset.filter(EmployeeNumber__in=list(employee_numbers))
+
+        total = 0
+        rows = []
+        for row in queryset.values().iterator(chunk_size=self.chunk_size):
+            rows.append(row)
+            if len(rows) >= self.chunk_size:
+                total += self._score_rows(model_id, model, encoder, rows)
+                rows = []
+        if rows:
+            total += self._score_rows(model_id, model, encoder, rows)
+
+        logger.info("Scored %d employees with model %s in %.2fs", total, model_id, time.perf_counter() - start)
+        return total
+
+    def rescore(self, employee_numbers):
+        """Refresh scores for changed employees under the promoted model, if any"""
+        model_id = self.promoted_model_id()
+        if model_id is None or not employee_numbers:
+            return 0
+        total = 0
+        employee_numbers = list(employee_numbers)
+        for start in range(0, len(employee_numbers), self.chunk_size):
+            total += self.score(model_id, employee_numbers[start:start + self.chunk_size])
+        return total
+
+    def promote(self, model_id):
+        """Make a model the promoted one and rescore every employee with it"""
+        with transaction.atomic():
+            if not TrainedModel.objects.filter(model_id=model_id).exists():
+                raise ValueError(f"Model with ID {model_id} not found")
+            TrainedModel.objects.filter(is_promoted=True).exclude(model_id=model_id).update(is_promoted=False)
+            TrainedModel.objects.filter(model_id=model_id).update(is_promoted=True)
+        return self.score(model_id)
+
+    def query(self, model_id=None, threshold=None, department=None, cursor=None, page_size=100):
+        """Scores for one model, highest risk first, with optional filters and keyset paging"""
+        model_id = model_id or self.promoted_model_id()
+        if model_id is None:
+            raise ValueError("No model has been promoted")
+
+        queryset = RiskScore.objects.filter(model_id=model_id)
+        if department:
+            queryset = queryset.filter(department=department)
+        if threshold is not None:
+            queryset = queryset.filter(probability__gte=threshold)
+        if cursor is not None:
+            # cursor is (probability, employee number) of the last row on the previous page
+            probability, employee_number = cursor
+            queryset = queryset.filter(probability__lte=probability).exclude(
+                probability=probability, employee_id__gte=employee_number)
+
+        rows = list(queryset.order_by('-probability', '-employee_id').values(
+            'employee_id', 'department', 'probability', 'prediction', 'confidence', 'scored_at'
+        )[:page_size + 1])
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        next_cursor = f"{rows[-1]['probability']!r}:{rows[-1]['employee_id']}" if has_more else None
+        return model_id, rows, next_cursor
@@ -0,0 +1,97 @@
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from sklearn.ensemble import RandomForestClassifier
+from Attrition.services.imbalance import ImbalanceStrategy
+
+# Worker-side helpers for parallel fits. This module must not import Django:
+# it is imported by spawned pool workers that never call django.setup().
+
+
+class SharedArrays:
+    """Copies named arrays into shared memory blocks that workers can map without copying"""
+
+    def __init__(self, arrays):
+        self._blocks = []
+        self.specs = {}
+        try:
+            for name, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                self._blocks.append(block)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+                self.specs[name] = (block.name, array.shape, array.dtype.str)
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        """Release and unlink all blocks (owner only)"""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def attach_arrays(specs):
+    """Map shared blocks described by SharedArrays.specs; returns (arrays, blocks)"""
+    arrays, blocks = {}, []
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    return arrays, blocks
+
+
+def fit_candidate(specs, rf_params, keep_model=False):
+    """Fit one forest on the shared training arrays and score the shared test arrays.
+
+    The fitted forest is only returned (and so pickled back to the parent)
+    when keep_model is set; scoring runs need just the predictions.
+    """
+    arrays, blocks = attach_arrays(specs)
+    try:
+        start = time.perf_counter()
+        model = RandomForestClassifier(**rf_params)
+        model.fit(arrays['train_data'], arrays['train_target'])
+        fit_seconds = time.perf_counter() - start
+
+        predictions = model.predict(arrays['test_data'])
+        return (model if keep_model else None), predictions, fit_seconds
+    finally:
+        # Drop the views before unmapping the blocks
+        arrays.clear()
+        for block in blocks:
+            block.close()
+
+
+def fit_fold(specs, train_rows, test_rows, rf_params, imbalance=None):
+    """Rebalance one cross-validation fold's training rows, fit and predict its test rows"""
+    arrays, blocks = attach_arrays(specs)
+    try:
+        timings = {}
+        # Fancy indexing gathers this fold's rows; the shared matrix is not copied whole
+        train_data, train_target, stats = ImbalanceStrategy(**(imbalance or {})).resample(
+            arrays['data'][train_rows], arrays['target'][train_rows])
+        timings['resample_seconds'] = stats['seconds']
+        timings['train_rows'] = stats['rows_after']
+
+        start = time.perf_counter()
+        model = RandomForestClassifier(**rf_params)
+        model.fit(train_data, train_target)
+        timings['fit_seconds'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        predictions = model.predict(arrays['data'][test_rows])
+        timings['predict_seconds'] = time.perf_counter() - start
+        return predictions, timings
+    finally:
+        arrays.clear()
+        for block in blocks:
+            block.close()
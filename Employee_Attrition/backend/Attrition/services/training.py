@@ -1,4 +1,5 @@
 import os
+import time
 import traceback
 import pandas as pd
 import numpy as np
@@ -8,34 +9,50 @@ import json
 from imblearn.over_sampling import SMOTE
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import train_test_split, ParameterGrid, ParameterSampler, StratifiedKFold
 from sklearn.metrics import f1_score, recall_score, accuracy_score, precision_score, confusion_matrix, classification_report
 from Attrition.models import EmployeeData
+from Attrition.services.encoder import FeatureEncoder
+from Attrition.services.errors import InvalidRequestError
+from Attrition.services.artifact import save_forest_artifact
+from Attrition.services.registry import ModelRegistry
+from Attrition.services.importer import normalize_attrition
+from Attrition.services.loader import holdout_start, training_watermark
+from Attrition.services.feature_store import feature_store
+from Attrition.services.sweep import SharedArrays, fit_candidate, fit_fold
+from Attrition.services.imbalance import ImbalanceStrategy
+from Attrition.services.trimming import ForestTrimmer, prefix_model
+from Attrition.services.metrics import TRAINING_STAGE_SECONDS, TRAINING_RUNS, stage_timer
+from django.conf import settings
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import logging
 from collections import defaultdict
 import uuid
 from datetime import datetime
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    filename=os.path.join(os.getcwd(), 'log', 'training.log'))
+# Handlers are configured once in settings.LOGGING
 logger = logging.getLogger(__name__)
 
+# Random forest defaults, overridden by model_params from the request
+DEFAULT_MODEL_PARAMS = {
+    'n_jobs': -1,
+    'n_estimators': 1000,
+    'max_features': 'sqrt',
+    'max_depth': 4,
+    'min_samples_leaf': 2,
+    'random_state': 42,
+    'verbose': 0
+}
+
 class Training:
     def __init__(self):
         self.base_path = os.getcwd()
         self.pickle_path = os.path.normpath(os.path.join(self.base_path, 'pickle', 'models'))
-        self.metadata_path = os.path.normpath(os.path.join(self.base_path, 'pickle', 'model_metadata.json'))
+        self.registry = ModelRegistry()
         os.makedirs(self.pickle_path, exist_ok=True)
-        
-        # Initialize model metadata file if it doesn't exist
-        if not os.path.exists(self.metadata_path):
-            with open(self.metadata_path, 'w') as f:
-                json.dump({"models": []}, f)
 
-    def accuracy_measures(self, y_test, predictions, avg_method='weighted'):
+    def accuracy_measures(self, y_test, predictions, avg_method='weighted', log_report=True):
         """Calculate and log various accuracy metrics"""
         metrics = defaultdict(float)
         
@@ -44,6 +61,9 @@ class Training:
         metrics['recall'] = recall_score(y_test, predictions, average=avg_method)
         metrics['f1_score'] = f1_score(y_test, predictions, average=avg_method)
         
+        if not log_report:
+            return metrics
+
         target_names = ['0', '1']
         logger.info("Classification Report:\n%s", 
                    classification_report(y_test, predictions, target_names=target_names))
@@ -57,12 +77,12 @@ class Training:
     def preprocess_data(self, attrition_df, selected_features=None):
         """Preprocess the data including encoding and feature engineering"""
         # Convert target variable
-        target_map = {'True': 1, 'False': 0}
-        target = attrition_df["Attrition"].map(target_map)
+        target_map = {'Yes': 1, 'No': 0}
+        target = normalize_attrition(attrition_df["Attrition"]).map(target_map)
         
         # Separate features
-        categorical_features = attrition_df.select_dtypes(include=['object']).columns.drop('Attrition')
-        numerical_features = attrition_df.select_dtypes(exclude=['object']).columns
+        categorical_features = attrition_df.select_dtypes(include=['object', 'category']).columns.drop('Attrition')
+        numerical_features = attrition_df.select_dtypes(exclude=['object', 'category']).columns
         
         # One-hot encode categorical features
         attrition_cat = pd.get_dummies(attrition_df[categorical_features], drop_first=True)
@@ -79,36 +99,154 @@ class Training:
         
         return features, target
 
-    def train_model(self, train_data, train_target, test_data, test_target, model_params):
-        """Train Random Forest model with SMOTE oversampling"""
+    def prepare_data(self, selected_features=None):
+        """Read the encoded training range from the feature store and split it"""
+        # Rebuilt only when rows in the training range changed
+        with stage_timer(TRAINING_STAGE_SECONDS, 'db_load'):
+            dataset = feature_store.get()
+        logger.info("Loaded %d rows for training (feature store version %s)", len(dataset), dataset.version[:12])
+
+        if len(dataset) < 100:  # Minimum data threshold
+            raise ValueError("Insufficient data for training")
+
+        # Split row indices; both splits share the store's column schema
+        with stage_timer(TRAINING_STAGE_SECONDS, 'split'):
+            train_rows, test_rows = train_test_split(np.arange(len(dataset)), test_size=0.2, random_state=42)
+
+        with stage_timer(TRAINING_STAGE_SECONDS, 'encode'):
+            columns = dataset.column_indices(selected_features)
+            names = [dataset.columns[i] for i in columns]
+            train_features = pd.DataFrame(dataset.features[np.ix_(train_rows, columns)], columns=names)
+            test_features = pd.DataFrame(dataset.features[np.ix_(test_rows, columns)], columns=names)
+            train_target = pd.Series(dataset.target[train_rows].astype(int))
+            test_target = pd.Series(dataset.target[test_rows].astype(int))
+
+        return dataset, train_features, train_target, test_features, test_target
+
+    def train_model(self, train_data, train_target, test_data, test_target, model_params, imbalance=None):
+        """Train Random Forest model after handling class imbalance (SMOTE by default)"""
+        imbalance = imbalance or ImbalanceStrategy()
+
         # Handle class imbalance
-        smote = SMOTE(random_state=42)
-        smote_train, smote_target = smote.fit_resample(train_data, train_target)
+        with stage_timer(TRAINING_STAGE_SECONDS, 'resample'):
+            resampled_train, resampled_target, imbalance_stats = imbalance.resample(train_data, train_target)
         
         # Default parameters with override from input
-        rf_params = {
-            'n_jobs': -1,
-            'n_estimators': 1000,
-            'max_features': 'sqrt',
-            'max_depth': 4,
-            'min_samples_leaf': 2,
-            'random_state': 42,
-            'verbose': 0
-        }
+        rf_params = dict(DEFAULT_MODEL_PARAMS)
+        rf_params.update(imbalance.model_params())
         rf_params.update(model_params)
         
-        # Train model
-        model = RandomForestClassifier(**rf_params)
-        model.fit(smote_train, smote_target)
+        # Train model on arrays, as every inference path passes encoded arrays
+        with stage_timer(TRAINING_STAGE_SECONDS, 'fit'):
+            model = RandomForestClassifier(**rf_params)
+            model.fit(np.asarray(resampled_train, dtype=np.float32), resampled_target)
         
         # Evaluate model
-        predictions = model.predict(test_data)
-        metrics = self.accuracy_measures(test_target, predictions)
+        with stage_timer(TRAINING_STAGE_SECONDS, 'evaluate'):
+            predictions = model.predict(np.asarray(test_data, dtype=np.float32))
+            metrics = self.accuracy_measures(test_target, predictions)
+        metrics['imbalance'] = dict(imbalance.to_dict(), **imbalance_stats)
         
         return model, metrics, rf_params
 
-    def save_model(self, model, feature_names, model_params, metrics):
-        """Save model and metadata"""
+    def cross_validate(self, dataset, selected_features, model_params, cv_options, imbalance=None):
+        """Stratified k-fold metrics over the training range, folds fit in parallel processes"""
+        n_folds = int(cv_options.get('folds', 5))
+        max_folds = getattr(settings, 'TRAINING_CV_MAX_FOLDS', 10)
+        if not 2 <= n_folds <= max_folds:
+            raise ValueError(f"cross_validation folds must be between 2 and {max_folds}")
+        random_state = cv_options.get('random_state', 42)
+
+        columns = dataset.column_indices(selected_features)
+        target = np.asarray(dataset.target, dtype=np.int8)
+        folds = list(StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+                     .split(np.zeros(len(target)), target))
+
+        # One core per fit; the pool provides the parallelism
+        imbalance = imbalance or ImbalanceStrategy()
+        rf_params = dict(DEFAULT_MODEL_PARAMS)
+        rf_params.update(imbalance.model_params())
+        rf_params.update(model_params)
+        rf_params['n_jobs'] = 1
+        max_workers = min(
+            n_folds,
+            int(cv_options.get('max_workers', getattr(settings, 'SWEEP_MAX_WORKERS', os.cpu_count() or 1)))
+        )
+        logger.info("Cross-validating %d folds on %d workers", n_folds, max_workers)
+
+        start_time = time.perf_counter()
+        results = [None] * n_folds
+        with stage_timer(TRAINING_STAGE_SECONDS, 'cross_validation'), SharedArrays({
+            'data': dataset.features[:, columns].astype(np.float32),
+            'target': target
+        }) as shared, ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context('spawn')
+        ) as executor:
+            futures = {
+                executor.submit(fit_fold, shared.specs, train_rows, test_rows, rf_params, imbalance.to_dict()): index
+                for index, (train_rows, test_rows) in enumerate(folds)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                predictions, timings = future.result()
+                test_rows = folds[index][1]
+                results[index] = dict(
+                    self.accuracy_measures(target[test_rows], predictions, log_report=False),
+                    fold=index,
+                    test_rows=len(test_rows),
+                    **timings
+                )
+
+        summary = {'folds': n_folds, 'random_state': random_state, 'fold_metrics': results}
+        for metric in ('accuracy', 'precision', 'recall', 'f1_score'):
+            values = np.array([result[metric] for result in results])
+            summary[metric] = {'mean': float(values.mean()), 'std': float(values.std())}
+        summary['seconds'] = time.perf_counter() - start_time
+        logger.info("Cross-validation f1_score %.4f +/- %.4f in %.1fs",
+                    summary['f1_score']['mean'], summary['f1_score']['std'], summary['seconds'])
+        return summary
+
+    def split_validation(self, train_data, train_target, trim_options):
+        """Hold a stratified validation split out of the training rows for choosing the tree prefix"""
+        validation_size = float(trim_options.get('validation_size', 0.2))
+        if not 0 < validation_size < 1:
+            raise ValueError("trim validation_size must be between 0 and 1")
+        with stage_timer(TRAINING_STAGE_SECONDS, 'split'):
+            fit_data, validation_data, fit_target, validation_target = train_test_split(
+                train_data, train_target, test_size=validation_size, stratify=train_target, random_state=42)
+        return (fit_data.reset_index(drop=True), fit_target.reset_index(drop=True),
+                validation_data.reset_index(drop=True), validation_target.reset_index(drop=True))
+
+    def trim_model(self, model, validation_data, validation_target, test_data, test_target, trim_options,
+                   inference_backend=None):
+        """Trim a fitted forest to the smallest prefix within tolerance or latency budget"""
+        metric = trim_options.get('metric', 'f1_score')
+        if metric not in ('accuracy', 'precision', 'recall', 'f1_score'):
+            raise ValueError("trim metric must be one of accuracy, precision, recall, f1_score")
+        min_trees = int(trim_options.get('min_trees', getattr(settings, 'TRIM_MIN_TREES', 10)))
+        if min_trees < 1:
+            raise ValueError("trim min_trees must be at least 1")
+
+        trimmer = ForestTrimmer(
+            score=lambda y, predictions: self.accuracy_measures(y, predictions, log_report=False),
+            metric=metric,
+            tolerance=float(trim_options.get('tolerance', 0.005)),
+            target_latency_ms=trim_options.get('target_latency_ms'),
+            inference_backend=inference_backend or getattr(settings, 'PREDICTION_BACKEND', 'sklearn'),
+            min_trees=min_trees
+        )
+        return trimmer.trim(model, validation_data, validation_target, test_data, test_target)
+
+    def save_model(self, model, feature_names, model_params, metrics, encoder=None, inference_backend=None,
+                   parent_id=None, trained_through=None):
+        """Save model, its compiled feature encoder and metadata"""
+        with stage_timer(TRAINING_STAGE_SECONDS, 'save'):
+            return self._save_model(model, feature_names, model_params, metrics, encoder, inference_backend,
+                                    parent_id, trained_through)
+
+    def _save_model(self, model, feature_names, model_params, metrics, encoder, inference_backend,
+                    parent_id, trained_through):
         model_id = str(uuid.uuid4())
         timestamp = datetime.now().isoformat()
         
@@ -116,9 +254,12 @@ class Training:
         model_data = {
             'model': model,
             'feature_names': feature_names,
+            'encoder': encoder.to_dict() if encoder is not None else None,
+            'inference_backend': inference_backend,
             'model_params': model_params,
             'metrics': metrics,
             'model_id': model_id,
+            'parent_id': parent_id,
             'timestamp': timestamp
         }
         
@@ -127,36 +268,390 @@ class Training:
         model_path = os.path.join(self.pickle_path, model_filename)
         with open(model_path, 'wb') as f:
             pickle.dump(model_data, f)
+
+        # Memory-mappable copy of the tree arrays for the compiled backend
+        if save_forest_artifact(model_path, model, model_data['encoder']) is None:
+            logger.warning(f"No forest artifact written for {type(model).__name__}")
         
-        # Update metadata
-        with open(self.metadata_path, 'r') as f:
-            metadata = json.load(f)
-        
-        metadata['models'].append({
-            'model_id': model_id,
-            'filename': model_filename,
-            'timestamp': timestamp,
-            'params': model_params,
-            'metrics': metrics,
-            'features': feature_names
-        })
-        
-        with open(self.metadata_path, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        # Register metadata (atomic insert, feature schema shared by hash)
+        self.registry.register(
+            model_id=model_id,
+            filename=model_filename,
+            timestamp=timestamp,
+            params=model_params,
+            metrics=metrics,
+            features=feature_names,
+            inference_backend=inference_backend,
+            parent_id=parent_id,
+            trained_through=trained_through
+        )
         
         logger.info(f"Model saved successfully as {model_filename}")
         return model_id
 
+    def build_candidates(self, request_data):
+        """Expand a param_grid or random_search spec into a list of model_params"""
+        if 'param_grid' in request_data:
+            return list(ParameterGrid(request_data['param_grid']))
+        if 'random_search' in request_data:
+            spec = request_data['random_search']
+            return list(ParameterSampler(
+                spec['params'],
+                n_iter=spec.get('n_iter', 10),
+                random_state=spec.get('random_state', 42)
+            ))
+        raise ValueError("Either param_grid or random_search is required")
+
+    def sweep(self, request):
+        """Fit many parameter sets in parallel on one shared, resampled dataset"""
+        response = {
+            'status': status.HTTP_200_OK,
+            'response': 'Sweep completed successfully',
+            'leaderboard': [],
+            'model_ids': []
+        }
+
+        try:
+            # Parse request data
+            try:
+                request_data = json.loads(request.body.decode('utf-8'))
+                selected_features = request_data.get('features', None)
+                base_params = request_data.get('model_params') or {}
+                if not isinstance(base_params, dict):
+                    raise ValueError("model_params must be an object")
+                top_n = request_data.get('top_n', 1)
+                if isinstance(top_n, bool) or int(top_n) < 1:
+                    raise ValueError("top_n must be a positive integer")
+                top_n = int(top_n)
+                max_workers = int(
+                    request_data.get('max_workers', getattr(settings, 'SWEEP_MAX_WORKERS', os.cpu_count() or 1)))
+                if max_workers < 1:
+                    raise ValueError("max_workers must be a positive integer")
+                metric = request_data.get('metric', 'f1_score')
+                inference_backend = request_data.get('inference_backend', None)
+                if inference_backend not in (None, 'sklearn', 'compiled'):
+                    raise ValueError("inference_backend must be 'sklearn' or 'compiled'")
+                imbalance = ImbalanceStrategy.from_options(request_data.get('imbalance', None))
+                candidates = self.build_candidates(request_data)
+                if not candidates:
+                    raise ValueError("Sweep has no parameter combinations")
+                max_candidates = getattr(settings, 'SWEEP_MAX_CANDIDATES', 64)
+                if len(candidates) > max_candidates:
+                    raise ValueError(f"Sweep has {len(candidates)} combinations, limit is {max_candidates}")
+                if metric not in ('accuracy', 'precision', 'recall', 'f1_score'):
+                    raise ValueError("metric must be one of accuracy, precision, recall, f1_score")
+
+                candidate_params = []
+                for candidate in candidates:
+                    # One core per fit; the pool provides the parallelism
+                    rf_params = dict(DEFAULT_MODEL_PARAMS)
+                    rf_params.update(imbalance.model_params())
+                    rf_params.update(base_params)
+                    rf_params.update(candidate)
+                    rf_params['n_jobs'] = 1
+                    if rf_params.get('random_state') is None:
+                        # Winners are refit, which must reproduce the scored forest
+                        rf_params['random_state'] = int(np.random.randint(2 ** 31 - 1))
+                    # Bad values (e.g. "max_depth": "deep") are the caller's error, not a failed fit
+                    RandomForestClassifier(**rf_params)._validate_params()
+                    candidate_params.append(rf_params)
+            except json.JSONDecodeError:
+                raise InvalidRequestError("Invalid JSON input")
+            except (TypeError, ValueError) as e:
+                raise InvalidRequestError(str(e))
+
+            # Load, encode and resample once for every candidate
+            dataset, train_features, train_target, test_features, test_target = \
+                self.prepare_data(selected_features)
+            resampled_train, resampled_target, imbalance_stats = imbalance.resample(train_features, train_target)
+            feature_names = train_features.columns.tolist()
+            encoder = dataset.encoder(feature_names)
+
+            max_workers = min(len(candidates), max_workers)
+            logger.info("Sweeping %d parameter sets on %d workers", len(candidates), max_workers)
+
+            results = []
+            with SharedArrays({
+                'train_data': resampled_train.to_numpy(dtype=np.float32),
+                'train_target': resampled_target.to_numpy(),
+                'test_data': test_features.to_numpy(dtype=np.float32)
+            }) as shared, ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            ) as executor:
+                # Workers send back only predictions; forests stay in the workers
+                futures = {
+                    executor.submit(fit_candidate, shared.specs, rf_params): (index, candidate, rf_params)
+                    for index, (candidate, rf_params) in enumerate(zip(candidates, candidate_params))
+                }
+                for future in as_completed(futures):
+                    index, candidate, rf_params = futures[future]
+                    _, predictions, fit_seconds = future.result()
+                    metrics = self.accuracy_measures(test_target, predictions)
+                    metrics['imbalance'] = dict(imbalance.to_dict(), **imbalance_stats)
+                    results.append({
+                        'index': index,
+                        'params': candidate,
+                        'final_params': rf_params,
+                        'metrics': dict(metrics),
+                        'fit_seconds': fit_seconds,
+                        'model': None
+                    })
+                results.sort(key=lambda r: (-r['metrics'][metric], r['fit_seconds'], r['index']))
+
+                # Refit only the top N; a fixed random_state rebuilds the same forests
+                winners = {
+                    executor.submit(fit_candidate, shared.specs, result['final_params'], keep_model=True): result
+                    for result in results[:top_n]
+                }
+                for future in as_completed(winners):
+                    winners[future]['model'] = future.result()[0]
+
+            # Register only the best models
+            trained_through = int(dataset.employee_numbers.max())
+            for rank, result in enumerate(results, start=1):
+                result['rank'] = rank
+                result['model_id'] = None
+                if result['model'] is not None:
+                    result['model_id'] = self.save_model(
+                        result['model'],
+                        feature_names,
+                        result['final_params'],
+                        result['metrics'],
+                        encoder,
+                        inference_backend,
+                        trained_through=trained_through
+                    )
+                    response['model_ids'].append(result['model_id'])
+
+            response['leaderboard'] = [
+                {k: v for k, v in result.items() if k not in ('model', 'final_params')}
+                for result in results
+            ]
+            logger.info("Sweep completed, registered %s", response['model_ids'])
+
+        except InvalidRequestError as e:
+            error_msg = f"Invalid sweep request: {str(e)}"
+            logger.warning(error_msg)
+
+            response.update({
+                'status': status.HTTP_400_BAD_REQUEST,
+                'response': error_msg
+            })
+
+        except Exception as e:
+            error_msg = f"Exception during sweep: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+
+            response.update({
+                'status': status.HTTP_500_INTERNAL_SERVER_ERROR,
+                'response': error_msg
+            })
+
+        return response
+
+    def _load_model_data(self, model_id):
+        """Unpickle a registered model file"""
+        info = self.registry.get(model_id, include_features=False)
+        model_path = os.path.join(self.pickle_path, info['filename'])
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model file {info['filename']} not found")
+        with open(model_path, 'rb') as f:
+            return info, pickle.load(f)
+
+    def _fetch_rows(self, employee_numbers, chunk_size=5000):
+        """Employee value dicts for the given numbers"""
+        rows = []
+        employee_numbers = list(employee_numbers)
+        for start in range(0, len(employee_numbers), chunk_size):
+            chunk = employee_numbers[start:start + chunk_size]
+            rows.extend(EmployeeData.objects.filter(EmployeeNumber__in=chunk).values())
+        return rows
+
+    def _encode_rows(self, encoder, rows):
+        """Encode rows with a fixed encoder; returns (features, target) for the rows that encode"""
+        features, _, errors = encoder.transform(rows)
+        keep = [i for i, error in enumerate(errors) if error is None]
+        target = normalize_attrition(pd.Series([rows[i]['Attrition'] for i in keep])).map({'Yes': 1, 'No': 0})
+        valid = target.notna().to_numpy()
+        return features[keep][valid], target.to_numpy()[valid].astype(int)
+
+    def train_incremental(self, request):
+        """Grow a registered forest with trees fit on employees added since it was trained"""
+        response = {
+            'status': status.HTTP_200_OK,
+            'response': 'Model updated successfully',
+            'metrics': {},
+            'model_id': None,
+            'parent_id': None
+        }
+
+        try:
+            start_time = time.perf_counter()
+            # Parse request data
+            try:
+                request_data = json.loads(request.body.decode('utf-8'))
+                parent_id = request_data.get('model_id')
+                if not parent_id:
+                    raise ValueError("model_id is required")
+                n_new = int(request_data.get('n_estimators', 50))
+                retire = int(request_data.get('retire', 0))
+                replay_ratio = float(request_data.get('replay_ratio', 1.0))
+                min_replay_rows = int(request_data.get('min_replay_rows', 200))
+                eval_rows = int(request_data.get('eval_rows', 1000))
+                random_state = int(request_data.get('random_state', 42))
+                if n_new < 1 or retire < 0:
+                    raise ValueError("n_estimators must be positive and retire non-negative")
+                if replay_ratio < 0 or min_replay_rows < 0 or eval_rows < 1:
+                    raise ValueError("replay_ratio and min_replay_rows must be non-negative and eval_rows positive")
+            except json.JSONDecodeError:
+                raise InvalidRequestError("Invalid JSON input")
+            except (TypeError, ValueError) as e:
+                raise InvalidRequestError(str(e))
+
+            info, model_data = self._load_model_data(parent_id)
+            model = model_data['model']
+            if not isinstance(model, RandomForestClassifier):
+                raise ValueError(f"Model {parent_id} is not a random forest")
+            if retire >= len(model.estimators_) + n_new:
+                raise ValueError("Cannot retire every tree")
+
+            # The feature schema stays the parent's
+            if model_data.get('encoder') is not None:
+                encoder = FeatureEncoder.from_dict(model_data['encoder'])
+            else:
+                encoder = FeatureEncoder.from_feature_names(model_data['feature_names'])
+
+            # Parent and child are both scored on the holdout, which neither is fit on
+            start = holdout_start()
+            if start is None:
+                raise ValueError("Every employee is in the training range; there is no holdout to evaluate on")
+
+            # Employees added to the training range since the parent, plus a replay sample of the older ones
+            watermark = info['trained_through'] or training_watermark() or 0
+            recent_numbers = list(
+                EmployeeData.objects.filter(EmployeeNumber__gt=watermark, EmployeeNumber__lt=start)
+                .order_by('EmployeeNumber').values_list('EmployeeNumber', flat=True)
+            )
+            if not recent_numbers:
+                raise ValueError(f"No employees added to the training range since model {parent_id} was trained")
+
+            rng = np.random.default_rng(random_state)
+            older_numbers = np.array(
+                EmployeeData.objects.filter(EmployeeNumber__lte=watermark).values_list('EmployeeNumber', flat=True)
+            )
+            rng.shuffle(older_numbers)
+            n_replay = min(len(older_numbers), max(min_replay_rows, int(np.ceil(replay_ratio * len(recent_numbers)))))
+            replay_numbers = older_numbers[:n_replay].tolist()
+            eval_numbers = list(
+                EmployeeData.objects.filter(EmployeeNumber__gte=start)
+                .order_by('EmployeeNumber').values_list('EmployeeNumber', flat=True)[:eval_rows]
+            )
+
+            with stage_timer(TRAINING_STAGE_SECONDS, 'db_load'):
+                train_rows = self._fetch_rows(recent_numbers + replay_numbers)
+                eval_rows_data = self._fetch_rows(eval_numbers)
+            with stage_timer(TRAINING_STAGE_SECONDS, 'encode'):
+                train_data, train_target = self._encode_rows(encoder, train_rows)
+                test_data, test_target = self._encode_rows(encoder, eval_rows_data)
+
+            class_counts = np.bincount(train_target, minlength=2)
+            if class_counts.min() == 0:
+                raise ValueError("Incremental data has a single attrition class; raise replay_ratio")
+
+            with stage_timer(TRAINING_STAGE_SECONDS, 'resample'):
+                if class_counts.min() > 1:
+                    smote = SMOTE(random_state=42, k_neighbors=min(5, int(class_counts.min()) - 1))
+                    train_data, train_target = smote.fit_resample(train_data, train_target)
+
+            # warm_start keeps the fitted trees and fits only the added ones
+            n_parent = len(model.estimators_)
+            fit_start = time.perf_counter()
+            with stage_timer(TRAINING_STAGE_SECONDS, 'fit'):
+                model.set_params(warm_start=True, n_estimators=n_parent + n_new)
+                model.fit(train_data, train_target)
+                model.set_params(warm_start=False)
+            fit_seconds = time.perf_counter() - fit_start
+
+            with stage_timer(TRAINING_STAGE_SECONDS, 'evaluate'):
+                # The parent's trees are the first n_parent of the grown forest
+                parent_metrics = dict(self.accuracy_measures(
+                    test_target, prefix_model(model, n_parent).predict(test_data), log_report=False))
+
+                if retire:
+                    model.estimators_ = model.estimators_[retire:]
+                    model.n_estimators = len(model.estimators_)
+                metrics = dict(self.accuracy_measures(test_target, model.predict(test_data)))
+
+            metrics.update({
+                'parent_metrics': parent_metrics,
+                'incremental': {
+                    'parent_n_estimators': n_parent,
+                    'added': n_new,
+                    'retired': retire,
+                    'recent_rows': len(recent_numbers),
+                    'replay_rows': len(replay_numbers),
+                    'eval_rows': len(test_target),
+                    'fit_seconds': fit_seconds,
+                    'seconds': time.perf_counter() - start_time
+                }
+            })
+
+            final_params = dict(info['params'], n_estimators=len(model.estimators_))
+            model_id = self.save_model(
+                model,
+                encoder.feature_names,
+                final_params,
+                metrics,
+                encoder,
+                info['inference_backend'],
+                parent_id=parent_id,
+                trained_through=max(recent_numbers)
+            )
+
+            response.update({
+                'metrics': metrics,
+                'model_id': model_id,
+                'parent_id': parent_id
+            })
+            TRAINING_RUNS.labels(outcome='success').inc()
+            logger.info("Grew model %s into %s: +%d/-%d trees on %d new and %d replayed rows",
+                        parent_id, model_id, n_new, retire, len(recent_numbers), len(replay_numbers))
+
+        except InvalidRequestError as e:
+            error_msg = f"Invalid incremental training request: {str(e)}"
+            logger.warning(error_msg)
+            TRAINING_RUNS.labels(outcome='invalid').inc()
+
+            response.update({
+                'status': status.HTTP_400_BAD_REQUEST,
+                'response': error_msg
+            })
+
+        except Exception as e:
+            error_msg = f"Exception during incremental training: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            TRAINING_RUNS.labels(outcome='error').inc()
+
+            response.update({
+                'status': status.HTTP_500_INTERNAL_SERVER_ERROR,
+                'response': error_msg
+            })
+
+        return response
+
     def get_available_models(self):
         """Get list of available models with their metadata"""
         try:
-            with open(self.metadata_path, 'r') as f:
-                metadata = json.load(f)
-            return metadata.get('models', [])
+            return self.registry.list()
         except Exception as e:
             logger.error(f"Error loading model metadata: {str(e)}")
             return []
 
+    def get_model_details(self, model_id):
+        """Get metadata for a single model, raising ValueError if it is unknown"""
+        return self.registry.get(model_id)
+
     # def train(self, request):
     #     """Main training pipeline"""
     #     response = {
@@ -240,40 +735,81 @@ class Training:
                 request_data = json.loads(request.body.decode('utf-8'))
                 model_params = request_data.get('model_params', {})
                 selected_features = request_data.get('features', None)
+                inference_backend = request_data.get('inference_backend', None)
+                if inference_backend not in (None, 'sklearn', 'compiled'):
+                    raise ValueError("inference_backend must be 'sklearn' or 'compiled'")
+                trim_options = request_data.get('trim', None)
+                if trim_options is True:
+                    trim_options = {}
+                elif trim_options is False:
+                    trim_options = None
+                elif trim_options is not None and not isinstance(trim_options, dict):
+                    raise ValueError("trim must be true or an object of trimming options")
+                cv_options = request_data.get('cross_validation', None)
+                if cv_options is True:
+                    cv_options = {}
+                imbalance = ImbalanceStrategy.from_options(request_data.get('imbalance', None))
             except json.JSONDecodeError:
-                raise ValueError("Invalid JSON input")
-
-            # Load only first 1450 rows
-            logger.info("Loading first 1450 rows from database...")
-            qs = EmployeeData.objects.all().order_by("EmployeeNumber")[:1450]
-            df = pd.DataFrame.from_records(qs.values())
-            logger.info("Loaded %d rows for training", len(df))
+                raise InvalidRequestError("Invalid JSON input")
+            except ValueError as e:
+                raise InvalidRequestError(str(e))
 
-            if len(df) < 100:  # Minimum data threshold
-                raise ValueError("Insufficient data for training")
+            dataset, train_features, train_target, test_features, test_target = \
+                self.prepare_data(selected_features)
 
-            # Split into train/test
-            train_df, test_df = train_test_split(df, test_size=0.2, random_state=42)
+            # Optional k-fold estimate over the whole training range, imbalance handled per fold
+            cross_validation = None
+            if cv_options is not None and cv_options is not False:
+                cross_validation = self.cross_validate(dataset, selected_features, model_params, cv_options, imbalance)
 
-            # Preprocess data
-            logger.info("Preprocessing data...")
-            train_features, train_target = self.preprocess_data(train_df, selected_features)
-            test_features, test_target = self.preprocess_data(test_df, selected_features)
+            # Trimming picks its tree prefix on rows the forest is not fit on, leaving the test split untouched
+            if trim_options is not None:
+                train_features, train_target, validation_features, validation_target = \
+                    self.split_validation(train_features, train_target, trim_options)
 
             # Train model
             logger.info("Training model with parameters: %s", model_params)
             model, metrics, final_params = self.train_model(
                 train_features, train_target,
                 test_features, test_target,
-                model_params
+                model_params,
+                imbalance
             )
 
+            # Compile the encoder used to map raw records at inference time
+            feature_names = train_features.columns.tolist()
+            encoder = dataset.encoder(feature_names)
+            trained_through = int(dataset.employee_numbers.max())
+
+            # Optionally keep only the smallest tree prefix that holds up on the validation split
+            full_model_id = None
+            trimming = None
+            if trim_options is not None:
+                trimmed, trimming = self.trim_model(
+                    model, validation_features, validation_target, test_features, test_target,
+                    trim_options, inference_backend)
+                if trim_options.get('keep_full', False):
+                    full_model_id = self.save_model(
+                        model, feature_names, final_params,
+                        dict(metrics, latency_ms=trimming['full_latency_ms']),
+                        encoder, inference_backend, trained_through=trained_through
+                    )
+                trimming['full_model_id'] = full_model_id
+                model = trimmed
+                final_params = dict(final_params, n_estimators=trimming['n_estimators'])
+                metrics = dict(trimming['metrics'], latency_ms=trimming['latency_ms'], trimming=trimming)
+            if cross_validation:
+                metrics = dict(metrics, cross_validation=cross_validation)
+
             # Save model and metadata
             model_id = self.save_model(
                 model,
-                train_features.columns.tolist(),
+                feature_names,
                 final_params,
-                metrics
+                metrics,
+                encoder,
+                inference_backend,
+                trained_through=trained_through
             )
 
             # Update response
@@ -281,11 +817,25 @@ class Training:
                 'metrics': metrics,
                 'model_id': model_id
             })
+            if trimming:
+                response['full_model_id'] = full_model_id
+            TRAINING_RUNS.labels(outcome='success').inc()
             logger.info("Training completed successfully")
 
+        except InvalidRequestError as e:
+            error_msg = f"Invalid training request: {str(e)}"
+            logger.warning(error_msg)
+            TRAINING_RUNS.labels(outcome='invalid').inc()
+
+            response.update({
+                'status': status.HTTP_400_BAD_REQUEST,
+                'response': error_msg
+            })
+
         except Exception as e:
             error_msg = f"Exception during training: {str(e)}"
             logger.error(error_msg, exc_info=True)
+            TRAINING_RUNS.labels(outcome='error').inc()
 
             response.update({
                 'status': status.HTTP_500_INTERNAL_SERVER_ERROR,
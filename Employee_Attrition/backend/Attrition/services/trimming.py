@@ -0,0 +1,125 @@
+import copy
+import time
+import logging
+import numpy as np
+from Attrition.services.forest import compile_model
+
+logger = logging.getLogger(__name__)
+
+
+def measure_latency(model, row, repeats=20):
+    """Median single-row predict_proba latency in milliseconds"""
+    model.predict_proba(row)  # warm up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def prefix_model(model, n_trees):
+    """Shallow copy of a fitted forest keeping only its first n_trees estimators"""
+    trimmed = copy.copy(model)
+    trimmed.estimators_ = model.estimators_[:n_trees]
+    trimmed.n_estimators = n_trees
+    return trimmed
+
+
+class ForestTrimmer:
+    """Finds the smallest tree prefix that keeps validation metrics or meets a latency budget.
+
+    The prefix is chosen on a validation split the forest was not fit on and
+    its metrics are reported on a separate test split, so the reported
+    numbers are not biased by the choice. Every tree's probabilities are
+    computed once and accumulated, so each candidate prefix size costs only
+    an argmax and a metric evaluation.
+    """
+
+    def __init__(self, score, metric='f1_score', tolerance=0.005, target_latency_ms=None,
+                 inference_backend='sklearn', candidates=50, min_trees=1):
+        self.score = score
+        self.metric = metric
+        self.tolerance = tolerance
+        self.target_latency_ms = target_latency_ms
+        self.inference_backend = inference_backend
+        self.candidates = candidates
+        self.min_trees = min_trees
+
+    def _serving_model(self, model):
+        """The object that would serve predictions for this model"""
+        if self.inference_backend == 'compiled':
+            return compile_model(model) or model
+        return model
+
+    def _latency(self, model, n_trees, row):
+        return measure_latency(self._serving_model(prefix_model(model, n_trees)), row)
+
+    def _metrics_by_size(self, model, data, target, sizes):
+        """Metrics of every prefix size in sizes on one split"""
+        X = np.ascontiguousarray(data, dtype=np.float32)
+        sizes = set(sizes)
+
+        # Running sum of per-tree class probabilities, as RandomForest averages them;
+        # the argmax of the sum equals the argmax of the mean
+        metrics_by_size = {}
+        running = np.zeros((X.shape[0], len(model.classes_)))
+        for size, tree in enumerate(model.estimators_[:max(sizes)], start=1):
+            running += tree.predict_proba(X, check_input=False)
+            if size in sizes:
+                predictions = model.classes_.take(np.argmax(running, axis=1))
+                metrics_by_size[size] = dict(self.score(target, predictions))
+        return metrics_by_size
+
+    def trim(self, model, validation_data, validation_target, test_data, test_target):
+        """Return (trimmed model, trimming report)"""
+        n_trees = len(model.estimators_)
+        min_trees = max(1, min(int(self.min_trees), n_trees))
+
+        sizes = sorted({int(size) for size in np.linspace(min_trees, n_trees, self.candidates)} | {n_trees})
+        selection = self._metrics_by_size(model, validation_data, validation_target, sizes)
+
+        floor = selection[n_trees][self.metric] - self.tolerance
+        chosen = next(size for size in sizes if selection[size][self.metric] >= floor)
+
+        X = np.ascontiguousarray(test_data, dtype=np.float32)
+        row = X[:1]
+        full_latency = self._latency(model, n_trees, row)
+        chosen_latency = self._latency(model, chosen, row)
+
+        if self.target_latency_ms is not None and chosen_latency > self.target_latency_ms:
+            # Largest prefix that fits the budget (latency grows with tree count)
+            low, high = 0, sizes.index(chosen) - 1
+            fitting, fitting_latency = sizes[0], None
+            while low <= high:
+                middle = (low + high) // 2
+                latency = self._latency(model, sizes[middle], row)
+                if latency <= self.target_latency_ms:
+                    fitting, fitting_latency = sizes[middle], latency
+                    low = middle + 1
+                else:
+                    high = middle - 1
+            chosen = fitting
+            chosen_latency = fitting_latency if fitting_latency is not None else self._latency(model, chosen, row)
+
+        # Reported metrics come from the test split, which played no part in the choice
+        reported = self._metrics_by_size(model, test_data, test_target, {chosen, n_trees})
+        report = {
+            'metric': self.metric,
+            'tolerance': self.tolerance,
+            'target_latency_ms': self.target_latency_ms,
+            'min_trees': min_trees,
+            'n_estimators_full': n_trees,
+            'n_estimators': chosen,
+            'validation_rows': len(validation_target),
+            'validation_metrics': selection[chosen],
+            'full_validation_metrics': selection[n_trees],
+            'full_metrics': reported[n_trees],
+            'full_latency_ms': full_latency,
+            'metrics': reported[chosen],
+            'latency_ms': chosen_latency
+        }
+        logger.info("Trimmed forest from %d to %d trees (test %s %.4f -> %.4f, %.2fms -> %.2fms)",
+                    n_trees, chosen, self.metric, reported[n_trees][self.metric],
+                    reported[chosen][self.metric], full_latency, chosen_latency)
+        return prefix_model(model, chosen), report
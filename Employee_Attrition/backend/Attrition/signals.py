@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from Attrition.models import TrainedModel
+from Attrition.services.model_cache import model_cache
+from Attrition.services.result_cache import result_cache
+from Attrition.services.explanation import explainer_cache, explanation_cache
+
+
+@receiver(post_delete, sender=TrainedModel)
+def drop_cached_model(sender, instance, **kwargs):
+    """Forget a deleted model and its cached predictions and explanations.
+
+    Loaded models are dropped in this process only; other processes notice
+    the removed file on their next lookup. A shared result store drops the
+    results for every process by bumping the model's key generation.
+    """
+    model_cache.invalidate(instance.model_id)
+    explainer_cache.invalidate(instance.model_id)
+    for cache in (result_cache, explanation_cache):
+        if cache is not None:
+            cache.invalidate(instance.model_id)
@@ -1,3 +1,1383 @@
-from django.test import TestCase
+import os
+import importlib
+import pickle
+import warnings
+import json
+import logging
+import tempfile
+import threading
+import time
+from multiprocessing import shared_memory
+from concurrent.futures import Future
+from datetime import timedelta
+from unittest import mock
+from asgiref.sync import async_to_sync
+import numpy as np
+import pandas as pd
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from prometheus_client.parser import text_string_to_metric_families
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import StratifiedKFold, cross_validate
+from imblearn.over_sampling import SMOTE
+from imblearn.pipeline import make_pipeline
+from backend.logs import DroppingQueueHandler, QueuedFileHandler
+from Attrition.services.comparison import ModelComparison
+from Attrition.services.artifact import open_forest_artifact, save_forest_artifact
+from Attrition.services.encoder import FeatureEncoder
+from Attrition.services.feature_store import FeatureStore
+from Attrition.models import EmployeeData, FeatureSchema, HoldoutPrediction, RiskScore, TrainedModel, TrainingJob
+from Attrition.services.explanation import Explanation, TreeExplainer
+from Attrition.services.forest import CompiledForest, compile_model
+from Attrition.services.imbalance import ImbalanceStrategy
+from Attrition.services.importer import EmployeeImporter
+from Attrition.services.inference_pool import InferencePool, PoolSaturatedError
+from Attrition.services.model_cache import ModelCache, model_cache
+from Attrition.services.jobs import QueueFullError, TrainingJobQueue, run_training_job
+from Attrition.services.loader import bump_employee_data_version, employee_data_version, load_employee_frame
+from Attrition.services.registry import ModelRegistry, schema_hash
+from Attrition.services.sweep import SharedArrays
+from Attrition.services.result_cache import DjangoResultStore, LocalResultStore, PredictionResultCache
+from Attrition.services.prediction import Prediction
+from Attrition.services.risk import RiskScoring
+from Attrition.services.training import DEFAULT_MODEL_PARAMS, Training
+from Attrition.services.trimming import ForestTrimmer, prefix_model
 
-# Create your tests here.
+DATASET = os.path.join(settings.BASE_DIR, 'Employee_Attrition_Prediction.csv')
+
+
+def load_sample(rows=300):
+    """First rows of the bundled dataset, as the training frame and as records"""
+    df = pd.read_csv(DATASET, nrows=rows)
+    return df, df.to_dict('records')
+
+
+def create_employees(records):
+    """Store dataset records as EmployeeData rows"""
+    EmployeeData.objects.bulk_create([EmployeeData(**record) for record in records])
+
+
+def fit_forest(features, target, **params):
+    """Small forest on the encoded sample, as the training service fits it"""
+    params = dict({'n_estimators': 25, 'max_depth': 6, 'random_state': 0}, **params)
+    return RandomForestClassifier(**params).fit(features.to_numpy(dtype=np.float32), target)
+
+
+class FeatureEncoderTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.df, cls.records = load_sample()
+        cls.features, _ = Training().preprocess_data(cls.df)
+
+    def test_matches_training_encoding(self):
+        encoder = FeatureEncoder.fit(self.df, self.features.columns.tolist())
+        matrix, unknowns, errors = encoder.transform(self.records)
+
+        self.assertEqual(encoder.feature_names, self.features.columns.tolist())
+        np.testing.assert_array_equal(matrix, self.features.to_numpy(dtype=np.float64))
+        self.assertTrue(all(error is None for error in errors))
+        self.assertTrue(all(unknown == {} for unknown in unknowns))
+
+    def test_matches_selected_features(self):
+        selected = ['OverTime_Yes', 'Age', 'MaritalStatus_Single', 'MonthlyIncome']
+        features, _ = Training().preprocess_data(self.df, selected)
+        encoder = FeatureEncoder.fit(self.df, features.columns.tolist())
+        matrix, _, _ = encoder.transform(self.records)
+
+        np.testing.assert_array_equal(matrix, features.to_numpy(dtype=np.float64))
+
+    def test_round_trips_through_dict(self):
+        encoder = FeatureEncoder.fit(self.df, self.features.columns.tolist())
+        restored = FeatureEncoder.from_dict(encoder.to_dict())
+
+        np.testing.assert_array_equal(restored.transform(self.records)[0], encoder.transform(self.records)[0])
+
+    def test_reports_unknown_category(self):
+        encoder = FeatureEncoder.fit(self.df, self.features.columns.tolist())
+        record = dict(self.records[0], Department='Legal')
+        matrix, unknowns, errors = encoder.transform([record])
+
+        self.assertEqual(unknowns[0], {'Department': 'Legal'})
+        self.assertIsNone(errors[0])
+        department_columns = [i for i, name in enumerate(encoder.feature_names) if name.startswith('Department_')]
+        self.assertFalse(matrix[0, department_columns].any())
+
+    def test_reports_missing_fields(self):
+        encoder = FeatureEncoder.fit(self.df, self.features.columns.tolist())
+        missing_numeric = {k: v for k, v in self.records[0].items() if k != 'Age'}
+        missing_categorical = {k: v for k, v in self.records[1].items() if k != 'OverTime'}
+        matrix, _, errors = encoder.transform([missing_numeric, missing_categorical, self.records[2]])
+
+        self.assertEqual(errors[0], "Missing value for Age")
+        self.assertEqual(errors[1], "Missing value for OverTime")
+        self.assertIsNone(errors[2])
+        self.assertFalse(matrix[:2].any())
+
+    def test_reports_invalid_numeric_value(self):
+        encoder = FeatureEncoder.fit(self.df, self.features.columns.tolist())
+        _, _, errors = encoder.transform([dict(self.records[0], Age='forty')])
+
+        self.assertEqual(errors[0], "Invalid numeric value for Age: 'forty'")
+
+
+class CompiledForestTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        df, _ = load_sample()
+        features, target = Training().preprocess_data(df)
+        cls.X = features.to_numpy(dtype=np.float64)
+        cls.model = fit_forest(features, target)
+
+    def test_predict_proba_matches_sklearn(self):
+        compiled = CompiledForest.from_sklearn(self.model)
+
+        np.testing.assert_allclose(compiled.predict_proba(self.X), self.model.predict_proba(self.X))
+        np.testing.assert_array_equal(compiled.predict(self.X), self.model.predict(self.X))
+
+    def test_chunked_predict_proba_matches_sklearn(self):
+        compiled = CompiledForest.from_sklearn(self.model)
+
+        # Chunks that do not divide the row count exercise the last partial chunk
+        np.testing.assert_allclose(compiled.predict_proba(self.X, chunk_size=7), self.model.predict_proba(self.X))
+
+    def test_unbounded_depth_matches_sklearn(self):
+        df, _ = load_sample()
+        features, target = Training().preprocess_data(df)
+        model = fit_forest(features, target, max_depth=None, min_samples_leaf=1)
+
+        np.testing.assert_allclose(compile_model(model).predict_proba(self.X), model.predict_proba(self.X))
+
+    def test_apply_matches_sklearn_leaves(self):
+        compiled = CompiledForest.from_sklearn(self.model)
+        leaves = compiled.apply(self.X) - compiled.roots
+
+        np.testing.assert_array_equal(leaves, self.model.apply(self.X.astype(np.float32)))
+
+
+class ForestArtifactTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        df, _ = load_sample()
+        features, target = Training().preprocess_data(df)
+        cls.X = features.to_numpy(dtype=np.float64)
+        cls.model = fit_forest(features, target)
+        cls.encoder = FeatureEncoder.fit(df, features.columns.tolist())
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = save_forest_artifact(os.path.join(tmp.name, 'model.sav'), self.model, self.encoder.to_dict())
+
+    def test_round_trip_matches_sklearn(self):
+        compiled, encoder_data = open_forest_artifact(self.path)
+
+        np.testing.assert_array_equal(
+            compiled.predict_proba(self.X), CompiledForest.from_sklearn(self.model).predict_proba(self.X))
+        np.testing.assert_allclose(compiled.predict_proba(self.X), self.model.predict_proba(self.X))
+        self.assertEqual(encoder_data, self.encoder.to_dict())
+
+    def test_corrupted_byte_fails_verification(self):
+        # A byte in the middle of the tree arrays, well past the header
+        with open(self.path, 'r+b') as f:
+            f.seek(-os.path.getsize(self.path) // 4, os.SEEK_END)
+            byte = f.read(1)
+            f.seek(-1, os.SEEK_CUR)
+            f.write(bytes([byte[0] ^ 0xFF]))
+
+        with self.assertRaisesRegex(ValueError, 'Checksum mismatch'):
+            open_forest_artifact(self.path, verify=True)
+
+    def test_truncated_artifact_is_rejected(self):
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+
+        with self.assertRaisesRegex(ValueError, 'truncated'):
+            open_forest_artifact(self.path, verify=False)
+
+
+class ForestTrimmerTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        df, _ = load_sample(rows=600)
+        features, target = Training().preprocess_data(df)
+        fit_data, fit_target, cls.validation_data, cls.validation_target = Training().split_validation(
+            features[:400], target[:400].reset_index(drop=True), {})
+        cls.test_data, cls.test_target = features[400:], target[400:]
+        cls.model = fit_forest(fit_data, fit_target, n_estimators=40)
+
+    def score(self, target, predictions):
+        return Training().accuracy_measures(target, predictions, log_report=False)
+
+    def trim(self, **options):
+        trimmer = ForestTrimmer(score=self.score, **dict({'tolerance': 0.02}, **options))
+        return trimmer.trim(self.model, self.validation_data, self.validation_target, self.test_data, self.test_target)
+
+    def test_reports_test_metrics_of_chosen_prefix(self):
+        trimmed, report = self.trim()
+        test_X = self.test_data.to_numpy(dtype=np.float32)
+
+        self.assertEqual(len(trimmed.estimators_), report['n_estimators'])
+        self.assertEqual(report['metrics'], dict(self.score(self.test_target, trimmed.predict(test_X))))
+        self.assertEqual(report['full_metrics'], dict(self.score(self.test_target, self.model.predict(test_X))))
+        self.assertEqual(report['validation_rows'], len(self.validation_target))
+
+    def test_chooses_prefix_on_validation_split(self):
+        _, report = self.trim()
+        validation_X = self.validation_data.to_numpy(dtype=np.float32)
+        floor = report['full_validation_metrics']['f1_score'] - 0.02
+
+        chosen = prefix_model(self.model, report['n_estimators'])
+        self.assertEqual(
+            report['validation_metrics'], dict(self.score(self.validation_target, chosen.predict(validation_X))))
+        self.assertGreaterEqual(report['validation_metrics']['f1_score'], floor)
+
+    def test_keeps_min_trees(self):
+        _, report = self.trim(tolerance=1.0, min_trees=15)
+
+        self.assertEqual(report['n_estimators'], 15)
+        self.assertEqual(report['min_trees'], 15)
+
+
+class PredictionResultCacheTests(SimpleTestCase):
+    features = np.arange(12, dtype=np.float64).reshape(3, 4)
+
+    def setUp(self):
+        caches['default'].clear()
+        self.addCleanup(caches['default'].clear)
+
+    def fill(self, cache, model_id):
+        keys = cache.keys(model_id, 'v1', self.features)
+        cache.set_many({key: [0.25, 0.75] for key in keys})
+        return keys
+
+    def test_shared_invalidation_reaches_other_processes(self):
+        # Two caches over one Django cache alias stand in for two worker processes
+        worker, other_worker = (PredictionResultCache(DjangoResultStore(60)) for _ in range(2))
+        keys = self.fill(worker, 'deleted')
+        kept = self.fill(worker, 'kept')
+        self.assertEqual(len(other_worker.get_many(other_worker.keys('deleted', 'v1', self.features))), 3)
+
+        worker.invalidate('deleted')
+
+        self.assertEqual(other_worker.get_many(other_worker.keys('deleted', 'v1', self.features)), {})
+        self.assertNotEqual(other_worker.keys('deleted', 'v1', self.features), keys)
+        self.assertEqual(other_worker.keys('kept', 'v1', self.features), kept)
+        self.assertEqual(len(other_worker.get_many(kept)), 3)
+
+    def test_local_invalidation_deletes_entries(self):
+        cache = PredictionResultCache(LocalResultStore(60, 100))
+        keys = self.fill(cache, 'deleted')
+        self.fill(cache, 'kept')
+
+        cache.invalidate('deleted')
+
+        self.assertEqual(cache.keys('deleted', 'v1', self.features), keys)
+        self.assertEqual(cache.get_many(keys), {})
+        self.assertEqual(len(cache.store), 3)
+
+
+class ModelCacheTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = tmp.name
+        self.loads = []
+
+    def write(self, model_id, size=10):
+        with open(os.path.join(self.directory, model_id), 'wb') as f:
+            f.write(b'x' * size)
+
+    def resolve(self, model_id):
+        path = os.path.join(self.directory, model_id)
+        if not os.path.exists(path):
+            raise ValueError(f"Model with ID {model_id} not found")
+        return path
+
+    def load(self, path):
+        self.loads.append(os.path.basename(path))
+        return {'path': path, 'load': len(self.loads)}
+
+    def get(self, cache, model_id):
+        return cache.get(model_id, self.resolve, self.load)
+
+    def test_evicts_least_recently_used_by_count(self):
+        cache = ModelCache(max_models=2, instrument=False)
+        for model_id in ('a', 'b', 'c'):
+            self.write(model_id)
+        self.get(cache, 'a')
+        self.get(cache, 'b')
+        self.get(cache, 'a')
+        self.get(cache, 'c')
+
+        self.assertEqual(cache.stats()['models'], ['a', 'c'])
+        self.assertEqual(cache.evictions, 1)
+
+    def test_evicts_least_recently_used_by_bytes(self):
+        cache = ModelCache(max_models=10, max_bytes=250, instrument=False)
+        for model_id in ('a', 'b', 'c'):
+            self.write(model_id, size=100)
+            self.get(cache, model_id)
+
+        self.assertEqual(cache.stats()['models'], ['b', 'c'])
+        self.assertEqual(cache.stats()['resident_bytes'], 200)
+
+    def test_reloads_when_file_changes(self):
+        cache = ModelCache(instrument=False)
+        self.write('a', size=10)
+        first = self.get(cache, 'a')
+        self.assertIs(self.get(cache, 'a'), first)
+
+        self.write('a', size=20)
+        self.assertIsNot(self.get(cache, 'a'), first)
+
+        # Same size, new mtime
+        stat = os.stat(self.resolve('a'))
+        os.utime(self.resolve('a'), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.get(cache, 'a')
+
+        self.assertEqual(self.loads, ['a', 'a', 'a'])
+        self.assertEqual(cache.invalidations, 2)
+
+    def test_concurrent_misses_load_once(self):
+        cache = ModelCache(instrument=False)
+        self.write('a')
+        barrier = threading.Barrier(8)
+
+        def slow_load(path):
+            time.sleep(0.05)
+            return self.load(path)
+
+        def request():
+            barrier.wait()
+            results.append(cache.get('a', self.resolve, slow_load))
+
+        results = []
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.loads, ['a'])
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual((cache.misses, cache.hits), (1, 7))
+
+    def test_unknown_model_is_not_a_miss(self):
+        cache = ModelCache(instrument=False)
+
+        with self.assertRaises(ValueError):
+            self.get(cache, 'missing')
+        self.assertEqual(cache.misses, 0)
+
+
+class MetricsEndpointTests(SimpleTestCase):
+    def scrape(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        return {
+            (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+            for family in text_string_to_metric_families(response.content.decode())
+            for sample in family.samples
+        }
+
+    def test_exports_cache_and_inference_counters(self):
+        before = self.scrape()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, 'model.sav')
+        with open(path, 'wb') as f:
+            f.write(b'x' * 64)
+        cache = ModelCache()
+        cache.get('m', lambda model_id: path, lambda path: 'model')
+        cache.get('m', lambda model_id: path, lambda path: 'model')
+
+        pool = InferencePool(max_workers=1, max_in_flight=1)
+        self.addCleanup(pool._executor.shutdown)
+        async_to_sync(pool.run)(lambda: None)
+        pool._admit()
+        self.addCleanup(pool._release)
+        with self.assertRaises(PoolSaturatedError):
+            async_to_sync(pool.run)(lambda: None)
+        after = self.scrape()
+
+        def delta(name, **labels):
+            key = (name, tuple(sorted(labels.items())))
+            return after.get(key, 0) - before.get(key, 0)
+
+        self.assertEqual(delta('attrition_model_cache_requests_total', result='miss'), 1)
+        self.assertEqual(delta('attrition_model_cache_requests_total', result='hit'), 1)
+        self.assertEqual(after[('attrition_model_cache_resident_bytes', ())], 64)
+        self.assertEqual(delta('attrition_prediction_queue_wait_seconds_count'), 1)
+        self.assertEqual(delta('attrition_prediction_rejected_total'), 1)
+        self.assertEqual(after[('attrition_prediction_in_flight', ())], 1)
+
+
+class JsonLogHandlerTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.filename = os.path.join(tmp.name, 'test.log')
+        self.logger = logging.getLogger('Attrition.tests.json_log')
+        self.logger.propagate = False
+        self.addCleanup(setattr, self.logger, 'propagate', True)
+
+    def test_writes_one_json_record_per_line(self):
+        handler = QueuedFileHandler(self.filename)
+        self.logger.addHandler(handler)
+        self.addCleanup(self.logger.removeHandler, handler)
+        self.logger.warning("Scored %d rows", 3, extra={'model_id': 'm1'})
+        try:
+            raise ValueError("bad row")
+        except ValueError:
+            self.logger.exception("Scoring failed")
+        handler.close()  # Stops the listener after it drains the queue
+
+        with open(self.filename) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([record['message'] for record in records], ["Scored 3 rows", "Scoring failed"])
+        self.assertEqual((records[0]['level'], records[0]['model_id']), ('WARNING', 'm1'))
+        self.assertEqual(records[0]['logger'], 'Attrition.tests.json_log')
+        self.assertIn('ValueError: bad row', records[1]['exc_info'])
+
+    def test_full_queue_drops_records(self):
+        handler = DroppingQueueHandler(maxsize=1)
+        self.logger.addHandler(handler)
+        self.addCleanup(self.logger.removeHandler, handler)
+        self.logger.warning("kept")
+        self.logger.warning("dropped")
+
+        self.assertEqual(handler.dropped, 1)
+        self.assertEqual(handler.queue.get_nowait().msg, "kept")
+
+
+class TrainingJobQueueTests(TestCase):
+    def setUp(self):
+        self.queue = TrainingJobQueue(max_workers=1, max_pending=2, timeout=60)
+        # Jobs are admitted and recorded but never run
+        executor = mock.Mock()
+        executor.submit.side_effect = lambda *args: Future()
+        self.queue._get_executor = lambda: executor
+
+    def test_rejects_beyond_max_pending(self):
+        self.queue.submit({})
+        self.queue.submit({})
+
+        with self.assertRaises(QueueFullError):
+            self.queue.submit({})
+        self.assertEqual(TrainingJob.objects.count(), 2)
+
+    def test_stale_jobs_are_failed_and_free_their_slots(self):
+        old = timezone.now() - timedelta(seconds=120)
+        queued = self.queue.submit({})
+        running = self.queue.submit({})
+        TrainingJob.objects.filter(job_id=queued.job_id).update(created_at=old)
+        TrainingJob.objects.filter(job_id=running.job_id).update(status='running', started_at=old)
+
+        job = self.queue.submit({})
+
+        self.assertEqual(job.status, 'queued')
+        for stale in (queued, running):
+            stale.refresh_from_db()
+            self.assertEqual(stale.status, 'failed')
+            self.assertIsNotNone(stale.finished_at)
+
+    def test_recent_jobs_are_not_failed(self):
+        self.queue.submit({})
+
+        self.assertEqual(self.queue.fail_stale_jobs(), 0)
+
+    def test_training_endpoint_queues_a_job(self):
+        with mock.patch('Attrition.views.training_queue', self.queue):
+            response = self.client.post('/training/', {'model_params': {'n_estimators': 10}},
+                                        content_type='application/json')
+
+        self.assertEqual(response.status_code, 202)
+        job = TrainingJob.objects.get(job_id=response.json()['job_id'])
+        self.assertEqual((job.status, job.request_data), ('queued', {'model_params': {'n_estimators': 10}}))
+
+    def test_worker_keeps_a_stale_failure(self):
+        job = self.queue.submit({})
+
+        def train(request):
+            # The job overruns and another request fails it while it is still training
+            TrainingJob.objects.filter(job_id=job.job_id).update(
+                started_at=timezone.now() - timedelta(seconds=120))
+            self.queue.fail_stale_jobs()
+            return {'status': 200, 'model_id': 'late', 'metrics': {'f1_score': 0.5}}
+
+        with mock.patch.object(Training, 'train', side_effect=train):
+            self.assertEqual(run_training_job(job.job_id), 'failed')
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.model_id), ('failed', None))
+        self.assertIn('did not finish', job.error)
+
+    def test_worker_skips_a_job_failed_before_it_started(self):
+        job = self.queue.submit({})
+        TrainingJob.objects.filter(job_id=job.job_id).update(status='failed', error='stale')
+
+        with mock.patch.object(Training, 'train') as train:
+            self.assertEqual(run_training_job(job.job_id), 'failed')
+        train.assert_not_called()
+        job.refresh_from_db()
+        self.assertIsNone(job.started_at)
+
+    def test_worker_records_the_outcome(self):
+        job = self.queue.submit({})
+        result = {'status': 200, 'model_id': 'm1', 'metrics': {'f1_score': 0.5}}
+
+        with mock.patch.object(Training, 'train', return_value=result):
+            self.assertEqual(run_training_job(job.job_id), 'done')
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.model_id, job.metrics), ('done', 'm1', {'f1_score': 0.5}))
+        self.assertIsNotNone(job.finished_at)
+
+
+class InferencePoolTests(SimpleTestCase):
+    def setUp(self):
+        self.pool = InferencePool(max_workers=1, max_in_flight=1, retry_after=7)
+        self.addCleanup(self.pool._executor.shutdown)
+
+    def test_saturated_pool_returns_503_with_retry_after(self):
+        self.pool._admit()  # One prediction already in flight
+        with mock.patch('Attrition.views.inference_pool', self.pool):
+            response = self.client.post('/prediction/async/', {'model_id': 'm', 'data': {}},
+                                        content_type='application/json')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '7')
+        self.assertEqual(self.pool.stats()['rejected'], 1)
+
+    def test_tasks_recycle_database_connections(self):
+        calls = []
+        with mock.patch('Attrition.services.inference_pool.close_old_connections',
+                        side_effect=lambda: calls.append('close')):
+            result = async_to_sync(self.pool.run)(lambda: calls.append('task') or 'done')
+
+        self.assertEqual(result, 'done')
+        self.assertEqual(calls, ['close', 'task', 'close'])
+        self.assertEqual(self.pool.stats()['in_flight'], 0)
+
+
+class EmployeeImporterTests(TestCase):
+    def setUp(self):
+        self.df = pd.read_csv(DATASET, nrows=5, dtype=str)
+        self.importer = EmployeeImporter(chunk_size=3, batch_size=2, rescore=False)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def run_import(self, df):
+        path = os.path.join(self.tmp.name, 'employees.csv')
+        df.to_csv(path, index=False)
+        return self.importer.run(path)
+
+    def test_coerces_types_and_attrition_spellings(self):
+        df = self.df.copy()
+        df['Attrition'] = ['True', 'false', ' yes', 'N', '1']
+        df.loc[0, 'Age'] = ' 41 '
+        df.loc[1, 'MonthlyIncome'] = '5130.0'
+        stats = self.run_import(df)
+
+        self.assertEqual((stats['rows'], stats['imported'], stats['invalid']), (5, 5, 0))
+        employees = EmployeeData.objects.order_by('EmployeeNumber')
+        self.assertEqual([e.Attrition for e in employees], ['Yes', 'No', 'Yes', 'No', 'Yes'])
+        self.assertEqual(employees[0].Age, 41)
+        self.assertEqual(employees[1].MonthlyIncome, 5130)
+
+    def test_skips_invalid_rows(self):
+        df = self.df.copy()
+        df.loc[0, 'Age'] = 'forty'
+        df.loc[1, 'Attrition'] = 'maybe'
+        df.loc[2, 'DailyRate'] = '10.5'
+        df.loc[3, 'Department'] = ''
+        stats = self.run_import(df)
+
+        self.assertEqual((stats['imported'], stats['invalid']), (1, 4))
+        self.assertEqual(
+            list(EmployeeData.objects.values_list('EmployeeNumber', flat=True)),
+            [int(self.df.loc[4, 'EmployeeNumber'])]
+        )
+
+    def test_reimport_updates_existing_rows(self):
+        self.run_import(self.df)
+        version = employee_data_version()
+        df = self.df.copy()
+        df.loc[0, 'MonthlyIncome'] = '9999'
+        # The last occurrence of a duplicated EmployeeNumber wins
+        duplicate = df.iloc[[1]].assign(Age='60')
+        stats = self.run_import(pd.concat([df, duplicate], ignore_index=True))
+
+        self.assertEqual((stats['rows'], stats['invalid']), (6, 0))
+        self.assertEqual(EmployeeData.objects.count(), 5)
+        self.assertEqual(EmployeeData.objects.get(EmployeeNumber=int(df.loc[0, 'EmployeeNumber'])).MonthlyIncome, 9999)
+        self.assertEqual(EmployeeData.objects.get(EmployeeNumber=int(df.loc[1, 'EmployeeNumber'])).Age, 60)
+        self.assertGreater(employee_data_version(), version)
+
+
+@override_settings(TRAINING_ROWS=5)
+class PrefilledListingTests(TestCase):
+    url = '/prediction/prefilled-predictions/'
+
+    @classmethod
+    def setUpTestData(cls):
+        _, records = load_sample(rows=25)
+        create_employees(records)
+        cls.holdout = sorted(record['EmployeeNumber'] for record in records)[5:]
+
+    def test_pages_cover_holdout_once_in_order(self):
+        seen, cursor = [], None
+        while True:
+            params = {'page_size': 3, **({'cursor': cursor} if cursor is not None else {})}
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 200)
+            page = [row['employeeNumber'] for row in response.json()['results']]
+            self.assertLessEqual(len(page), 3)
+            seen.extend(page)
+            cursor = response.json()['next_cursor']
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, self.holdout)
+
+    def test_malformed_cursor_is_rejected(self):
+        for cursor in ('abc', '12.5', '1:2'):
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 400)
+
+
+class RiskScoreQueryTests(TestCase):
+    url = '/risk-scores/'
+
+    @classmethod
+    def setUpTestData(cls):
+        _, records = load_sample(rows=30)
+        create_employees(records)
+        schema = FeatureSchema.objects.create(schema_hash='0' * 64, features=[])
+        cls.model = TrainedModel.objects.create(
+            model_id='promoted', filename='promoted.sav', timestamp=timezone.now(), schema=schema, is_promoted=True)
+        # Few distinct probabilities so most pages start and end inside a tie
+        RiskScore.objects.bulk_create([
+            RiskScore(employee_id=record['EmployeeNumber'], model=cls.model, department=record['Department'],
+                      probability=[0.9, 0.5, 0.5, 0.25, 0.1][i % 5], prediction='No', confidence='Low')
+            for i, record in enumerate(records)
+        ])
+
+    def expected(self, **filters):
+        scores = RiskScore.objects.filter(model=self.model, **filters).values_list('probability', 'employee_id')
+        return sorted(scores, key=lambda score: (-score[0], -score[1]))
+
+    def page_through(self, page_size, **filters):
+        seen, cursor = [], None
+        while True:
+            _, rows, cursor = RiskScoring().query(cursor=cursor, page_size=page_size, **filters)
+            self.assertLessEqual(len(rows), page_size)
+            seen.extend((row['probability'], row['employee_id']) for row in rows)
+            if cursor is None:
+                return seen
+            probability, employee_number = cursor.split(':')
+            cursor = (float(probability), int(employee_number))
+
+    def test_pages_cover_ties_once_in_order(self):
+        for page_size in (1, 4, 7, 30):
+            self.assertEqual(self.page_through(page_size), self.expected())
+
+    def test_pages_respect_filters(self):
+        self.assertEqual(self.page_through(4, threshold=0.5), self.expected(probability__gte=0.5))
+        self.assertEqual(
+            self.page_through(4, department='Sales'), self.expected(department='Sales'))
+
+    def test_view_follows_next_cursor(self):
+        seen, params = [], {'page_size': 4}
+        while True:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 200)
+            seen.extend((row['probability'], row['employee_id']) for row in response.json()['results'])
+            if response.json()['next_cursor'] is None:
+                break
+            params['cursor'] = response.json()['next_cursor']
+
+        self.assertEqual(seen, self.expected())
+
+    def test_malformed_cursor_is_rejected(self):
+        for cursor in ('abc', '0.5', '0.5:x', '0.5:1:2'):
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 400)
+
+
+@override_settings(TRAINING_ROWS=200)
+class IncrementalTrainingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.df, records = load_sample(rows=300)
+        create_employees(records)
+        cls.numbers = sorted(record['EmployeeNumber'] for record in records)
+
+    def test_fits_training_range_and_scores_on_holdout(self):
+        # The parent saw the first 150 employees; 150-199 were added to the training range since
+        parent_df = self.df[self.df['EmployeeNumber'] <= self.numbers[149]]
+        features, target = Training().preprocess_data(parent_df)
+        encoder = FeatureEncoder.fit(parent_df, features.columns.tolist())
+        info = {'trained_through': self.numbers[149], 'params': {}, 'inference_backend': None}
+        model_data = {'model': fit_forest(features, target), 'encoder': encoder.to_dict()}
+        request = mock.Mock(body=json.dumps({'model_id': 'parent', 'n_estimators': 5, 'min_replay_rows': 20}).encode())
+
+        with mock.patch.object(Training, '_load_model_data', return_value=(info, model_data)), \
+                mock.patch.object(Training, 'save_model', return_value='child') as save_model, \
+                mock.patch.object(Training, '_fetch_rows', autospec=True, side_effect=Training._fetch_rows) as fetch:
+            response = Training().train_incremental(request)
+
+        self.assertEqual(response['status'], 200, response['response'])
+        train_numbers, eval_numbers = (set(call.args[1]) for call in fetch.call_args_list)
+        recent = set(self.numbers[150:200])
+        self.assertTrue(recent <= train_numbers)
+        self.assertTrue(train_numbers - recent <= set(self.numbers[:150]))
+        self.assertEqual(eval_numbers, set(self.numbers[200:]))
+        self.assertEqual(save_model.call_args.kwargs['trained_through'], self.numbers[199])
+        self.assertEqual(response['metrics']['incremental']['recent_rows'], 50)
+
+    def test_malformed_options_are_bad_requests(self):
+        for options in ({'n_estimators': 'ten'}, {'replay_ratio': [1]}, {'retire': None},
+                        {'n_estimators': 0}, {'eval_rows': 0}, {'model_id': None}):
+            request = mock.Mock(body=json.dumps(dict({'model_id': 'parent'}, **options)).encode())
+            with mock.patch.object(Training, '_load_model_data') as load_model_data:
+                response = Training().train_incremental(request)
+
+            self.assertEqual(response['status'], 400, options)
+            self.assertIn('Invalid incremental training request', response['response'])
+            load_model_data.assert_not_called()
+
+
+class EmployeeLoaderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        _, records = load_sample(rows=200)
+        create_employees(records)
+
+    def assert_encodes_like_get_dummies(self, frame):
+        # The previous loader built object columns from values() rows
+        rows = pd.DataFrame(list(EmployeeData.objects.order_by('EmployeeNumber').values()))
+        expected_features, expected_target = Training().preprocess_data(rows)
+        features, target = Training().preprocess_data(frame)
+
+        self.assertEqual(features.columns.tolist(), expected_features.columns.tolist())
+        np.testing.assert_array_equal(features.to_numpy(dtype=np.float32),
+                                      expected_features.to_numpy(dtype=np.float32))
+        np.testing.assert_array_equal(target.to_numpy(), expected_target.to_numpy())
+
+    def test_typed_frame_encodes_like_object_frame(self):
+        frame = load_employee_frame(chunk_size=64)
+
+        self.assertEqual(frame['Age'].dtype, np.int32)
+        self.assertEqual(frame['Department'].dtype, 'category')
+        self.assert_encodes_like_get_dummies(frame)
+
+    def test_grows_when_rows_outnumber_the_count(self):
+        with mock.patch('django.db.models.QuerySet.count', return_value=10):
+            frame = load_employee_frame(chunk_size=64)
+
+        self.assertEqual(len(frame), 200)
+        self.assert_encodes_like_get_dummies(frame)
+
+
+@override_settings(TRAINING_ROWS=200)
+class SweepTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        _, records = load_sample(rows=250)
+        create_employees(records)
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch('Attrition.services.training.feature_store', FeatureStore(directory=tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sweep(self, **request_data):
+        return Training().sweep(mock.Mock(body=json.dumps(request_data).encode()))
+
+    def test_registers_refit_winners_that_reproduce_their_scores(self):
+        prepared = []
+        original = Training.prepare_data
+
+        def prepare_data(trainer, selected_features=None):
+            prepared.append(original(trainer, selected_features))
+            return prepared[-1]
+
+        with mock.patch.object(Training, 'prepare_data', autospec=True, side_effect=prepare_data), \
+                mock.patch.object(Training, 'save_model', side_effect=['m1', 'm2']) as save_model:
+            response = self.sweep(param_grid={'max_depth': [2, 4, 6]}, model_params={'n_estimators': 10},
+                                  top_n=2, max_workers=2)
+
+        self.assertEqual(response['status'], 200, response['response'])
+        leaderboard = response['leaderboard']
+        self.assertEqual([entry['rank'] for entry in leaderboard], [1, 2, 3])
+        scores = [entry['metrics']['f1_score'] for entry in leaderboard]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(response['model_ids'], ['m1', 'm2'])
+        self.assertEqual([entry['model_id'] for entry in leaderboard], ['m1', 'm2', None])
+
+        _, _, _, test_features, test_target = prepared[0]
+        for entry, call in zip(leaderboard, save_model.call_args_list):
+            model, _, params, metrics = call.args[:4]
+            self.assertEqual(params['max_depth'], entry['params']['max_depth'])
+            # The refit forest is the one that was scored
+            predictions = model.predict(test_features.to_numpy(dtype=np.float32))
+            self.assertEqual(accuracy_score(test_target, predictions), metrics['accuracy'])
+
+    def test_invalid_options_are_bad_requests(self):
+        grid = {'max_depth': [3]}
+        for request_data, message in [
+            ({'param_grid': grid, 'top_n': 0}, 'top_n must be a positive integer'),
+            ({'param_grid': grid, 'top_n': -2}, 'top_n must be a positive integer'),
+            ({'param_grid': grid, 'top_n': 'best'}, 'invalid literal'),
+            ({'param_grid': grid, 'max_workers': 0}, 'max_workers must be a positive integer'),
+            ({'param_grid': grid, 'model_params': {'n_estimators': 'many'}}, 'n_estimators'),
+            ({'param_grid': {'max_depth': ['deep']}}, 'max_depth'),
+            ({'param_grid': {'max_depth': 3}}, 'Parameter grid'),
+        ]:
+            with mock.patch.object(Training, 'prepare_data') as prepare_data:
+                response = self.sweep(**request_data)
+            self.assertEqual(response['status'], 400, request_data)
+            self.assertIn(message, response['response'])
+            prepare_data.assert_not_called()
+
+
+@override_settings(TRAINING_ROWS=200)
+class CrossValidationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        _, records = load_sample(rows=250)
+        create_employees(records)
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dataset = FeatureStore(directory=tmp.name).get()
+        self.params = {'n_estimators': 10, 'max_depth': 4}
+
+    def cross_validate(self, params, imbalance, **cv_options):
+        """Run Training.cross_validate, recording the SharedArrays it creates in self.shared"""
+        self.shared = []
+
+        def shared_arrays(arrays):
+            self.shared.append(SharedArrays(arrays))
+            return self.shared[-1]
+
+        with mock.patch('Attrition.services.training.SharedArrays', side_effect=shared_arrays):
+            return Training().cross_validate(self.dataset, None, params, dict({'folds': 3}, **cv_options),
+                                             ImbalanceStrategy.from_options(imbalance))
+
+    def assert_released(self, shared):
+        self.assertTrue(shared.specs)
+        for block_name, _, _ in shared.specs.values():
+            with self.assertRaises(FileNotFoundError):
+                shared_memory.SharedMemory(name=block_name)
+
+    def test_fold_scores_match_serial_cross_val_score(self):
+        for imbalance in ('smote', 'class_weight'):
+            summary = self.cross_validate(self.params, imbalance, random_state=7, max_workers=2)
+
+            strategy = ImbalanceStrategy.from_options(imbalance)
+            forest = RandomForestClassifier(**dict(DEFAULT_MODEL_PARAMS, **strategy.model_params(), **self.params))
+            estimator = make_pipeline(SMOTE(random_state=42), forest) if imbalance == 'smote' else forest
+            serial = cross_validate(
+                estimator, self.dataset.features.astype(np.float32), self.dataset.target.astype(np.int8),
+                cv=StratifiedKFold(n_splits=3, shuffle=True, random_state=7),
+                scoring=['accuracy', 'f1_weighted'])
+
+            folds = summary['fold_metrics']
+            np.testing.assert_allclose([fold['accuracy'] for fold in folds], serial['test_accuracy'])
+            np.testing.assert_allclose([fold['f1_score'] for fold in folds], serial['test_f1_weighted'])
+            self.assert_released(self.shared[0])
+
+    def test_shared_memory_is_released_when_a_fold_fails(self):
+        with self.assertRaisesRegex(ValueError, 'max_depth'):
+            self.cross_validate(dict(self.params, max_depth='deep'), 'class_weight', max_workers=1)
+
+        self.assert_released(self.shared[0])
+
+
+@override_settings(TRAINING_ROWS=200)
+class TrainingOptionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        _, records = load_sample(rows=250)
+        create_employees(records)
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch('Attrition.services.training.feature_store', FeatureStore(directory=tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def train(self, **request_data):
+        return Training().train(mock.Mock(body=json.dumps(request_data).encode()))
+
+    def test_trim_true_uses_default_options(self):
+        with mock.patch.object(Training, 'save_model', return_value='m1') as save_model:
+            response = self.train(model_params={'n_estimators': 20}, trim=True)
+
+        self.assertEqual(response['status'], 200, response['response'])
+        trimming = response['metrics']['trimming']
+        self.assertLessEqual(trimming['n_estimators'], 20)
+        self.assertEqual(len(save_model.call_args.args[0].estimators_), trimming['n_estimators'])
+
+    def test_trim_must_be_an_object(self):
+        for trim in ('yes', 1, ['tolerance']):
+            with mock.patch.object(Training, 'prepare_data') as prepare_data:
+                response = self.train(trim=trim)
+            self.assertEqual(response['status'], 400, trim)
+            self.assertIn('trim must be true or an object', response['response'])
+            prepare_data.assert_not_called()
+
+
+@override_settings(TRAINING_ROWS=200)
+class FeatureStoreTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        _, records = load_sample(rows=250)
+        create_employees(records)
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = FeatureStore(directory=tmp.name)
+
+    def test_unchanged_rows_reuse_version_without_reading_them(self):
+        dataset = self.store.get()
+
+        with mock.patch.object(FeatureStore, 'content_hash') as content_hash, self.assertNumQueries(2):
+            self.assertIs(self.store.get(), dataset)
+        content_hash.assert_not_called()
+        self.assertEqual(len(dataset), 200)
+
+    def test_data_version_bump_builds_new_version(self):
+        dataset = self.store.get()
+        EmployeeData.objects.filter(EmployeeNumber=int(dataset.employee_numbers[0])).update(Age=18)
+        bump_employee_data_version()
+
+        rebuilt = self.store.get()
+        self.assertNotEqual(rebuilt.version, dataset.version)
+        self.assertEqual(rebuilt.features[0, rebuilt.columns.index('Age')], 18)
+
+    def test_verify_rebuilds_after_unversioned_write(self):
+        dataset = self.store.get()
+        self.assertEqual(self.store.verify(), (True, dataset))
+
+        # A write that bypasses the data version keeps the marker, and the stale version
+        EmployeeData.objects.filter(EmployeeNumber=int(dataset.employee_numbers[0])).update(Age=18)
+        self.assertIs(self.store.get(), dataset)
+
+        ok, rebuilt = self.store.verify()
+        self.assertFalse(ok)
+        self.assertNotEqual(rebuilt.version, dataset.version)
+        self.assertEqual(rebuilt.features[0, rebuilt.columns.index('Age')], 18)
+        self.assertTrue(self.store.verify()[0])
+
+
+class ImbalanceOptionTests(TestCase):
+    def test_builds_from_name_or_options(self):
+        self.assertEqual(ImbalanceStrategy.from_options(None).strategy, 'smote')
+        self.assertEqual(ImbalanceStrategy.from_options('undersample').strategy, 'undersample')
+        strategy = ImbalanceStrategy.from_options({'strategy': 'smote_sample', 'max_minority_rows': '500'})
+        self.assertEqual(strategy.max_minority_rows, 500)
+
+    def test_rejects_invalid_options(self):
+        for options, message in [
+            ('oversample', 'imbalance strategy must be one of'),
+            ({'strategy': 'smote', 'k': 3}, 'Unknown imbalance options k; accepted options are strategy'),
+            ({'majority_ratio': 'lots'}, 'majority_ratio a number'),
+            ({'max_minority_rows': 1}, 'at least 2'),
+            (['smote'], 'imbalance must be a strategy name or an object'),
+        ]:
+            with self.assertRaisesRegex(ValueError, message):
+                ImbalanceStrategy.from_options(options)
+
+    def test_invalid_options_are_bad_requests(self):
+        for url in ('/training/', '/training/sweep/', '/training/jobs/'):
+            response = self.client.post(
+                url, {'imbalance': {'strategy': 'smote', 'neighbours': 3}, 'param_grid': {'max_depth': [3]}},
+                content_type='application/json')
+            self.assertEqual(response.status_code, 400, url)
+            body = response.json()
+            self.assertIn('accepted options are', body.get('error') or body['response'])
+        self.assertFalse(TrainingJob.objects.exists())
+
+
+class BatchPredictionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        df, cls.records = load_sample()
+        create_employees(cls.records)
+        features, target = Training().preprocess_data(df)
+        cls.encoder = FeatureEncoder.fit(df, features.columns.tolist())
+        cls.model = fit_forest(features, target)
+
+    def setUp(self):
+        patcher = mock.patch.object(Prediction, 'load_model', return_value=(self.model, self.encoder))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def predict(self, **payload):
+        return Prediction().predict_batch(mock.Mock(body=json.dumps(dict(model_id='m', **payload)).encode()))
+
+    def probability(self, record):
+        return self.model.predict_proba(self.encoder.transform([record])[0])[0, 1]
+
+    def test_records_keep_input_order_and_per_row_errors(self):
+        records = [self.records[3], 'not a record', {k: v for k, v in self.records[4].items() if k != 'Age'},
+                   self.records[0]]
+        response = self.predict(data=records)
+
+        self.assertEqual(response['status'], 200)
+        results = response['response']['results']
+        self.assertEqual([result['index'] for result in results], [0, 1, 2, 3])
+        self.assertEqual(results[1]['error'], "Record must be an object")
+        self.assertEqual(results[2]['error'], "Missing value for Age")
+        self.assertAlmostEqual(results[0]['probability'], self.probability(self.records[3]))
+        self.assertAlmostEqual(results[3]['probability'], self.probability(self.records[0]))
+        self.assertEqual(response['response']['failed'], 2)
+
+    def test_employee_numbers_are_validated(self):
+        first, second = self.records[0]['EmployeeNumber'], self.records[1]['EmployeeNumber']
+        response = self.predict(employee_numbers=[second, str(first), True, 'abc', 10 ** 9, first])
+
+        results = response['response']['results']
+        self.assertEqual([result['error'] for result in results], [
+            None, None, "Invalid employee number: True", "Invalid employee number: 'abc'",
+            f"Employee {10 ** 9} not found", None
+        ])
+        self.assertAlmostEqual(results[0]['probability'], self.probability(self.records[1]))
+        self.assertAlmostEqual(results[1]['probability'], self.probability(self.records[0]))
+        self.assertEqual(results[1]['probability'], results[5]['probability'])
+
+    @override_settings(PREDICTION_BATCH_MAX_ROWS=2)
+    def test_rejects_oversized_batch(self):
+        response = self.client.post('/prediction/batch/', {'model_id': 'm', 'employee_numbers': [1, 2, 3]},
+                                    content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('limit is 2', response.json()['error'])
+
+
+class ExplanationTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        df, cls.records = load_sample()
+        cls.features, cls.target = Training().preprocess_data(df)
+        cls.encoder = FeatureEncoder.fit(df, cls.features.columns.tolist())
+        cls.model = fit_forest(cls.features, cls.target)
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'model_m.sav')
+        self.write_model(self.model)
+        for patcher in (
+            mock.patch.object(ModelRegistry, 'get', return_value={'filename': 'model_m.sav'}),
+            mock.patch('Attrition.services.explanation.explainer_cache', ModelCache(instrument=False)),
+            mock.patch('Attrition.services.explanation.explanation_cache',
+                       PredictionResultCache(LocalResultStore(60, 100), 'explanation')),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.explanation = Explanation()
+        self.explanation.models_dir = tmp.name
+
+    def write_model(self, model):
+        with open(self.path, 'wb') as f:
+            pickle.dump({'model': model, 'encoder': self.encoder.to_dict()}, f)
+
+    def explain(self, **options):
+        request_data = dict({'model_id': 'm', 'data': self.records[0]}, **options)
+        return self.explanation.explain(mock.Mock(body=json.dumps(request_data).encode()))
+
+    def test_contributions_add_up_to_predict_proba(self):
+        explainer = TreeExplainer(self.model, self.encoder)
+        matrix, _, _ = self.encoder.transform(self.records[:50])
+        probabilities, contributions = explainer.contributions(matrix)
+
+        expected = self.model.predict_proba(matrix.astype(np.float32))[:, 1]
+        np.testing.assert_allclose(explainer.base_value + contributions.sum(axis=1), expected)
+        np.testing.assert_allclose(probabilities, expected)
+        np.testing.assert_allclose(explainer.by_field(contributions).sum(axis=1), contributions.sum(axis=1))
+
+    def test_top_n_ranks_by_absolute_contribution(self):
+        for group_categorical in (True, False):
+            response = self.explain(top_n=5, group_categorical=group_categorical)['response']
+
+            contributions = [entry['contribution'] for entry in response['contributions']]
+            self.assertEqual(len(contributions), 5)
+            self.assertEqual(contributions, sorted(contributions, key=abs, reverse=True))
+            self.assertAlmostEqual(sum(contributions) + response['other_contribution'],
+                                   response['probability'] - response['base_value'])
+            fields = list(self.encoder.numerical) + list(self.encoder.categorical)
+            names = {entry['feature'] for entry in response['contributions']}
+            self.assertLessEqual(names, set(fields if group_categorical else self.encoder.feature_names))
+
+    def test_cached_until_the_model_file_changes(self):
+        first = self.explain()['response']
+        second = self.explain()['response']
+        self.assertEqual((first['cache_hit'], second['cache_hit']), (False, True))
+        self.assertEqual(second['probability'], first['probability'])
+
+        retrained = fit_forest(self.features, self.target, n_estimators=40, random_state=1)
+        self.write_model(retrained)
+        third = self.explain()['response']
+
+        self.assertFalse(third['cache_hit'])
+        matrix, _, _ = self.encoder.transform(self.records[:1])
+        self.assertAlmostEqual(third['probability'], retrained.predict_proba(matrix.astype(np.float32))[0, 1])
+
+    def test_invalid_options_are_bad_requests(self):
+        for options in ({'group_categorical': 'false'}, {'group_categorical': 0}, {'top_n': -1},
+                        {'top_n': 'ten'}, {'top_n': True}, {'data': None}):
+            response = self.explain(**options)
+
+            self.assertEqual(response['status'], 400, options)
+            self.assertIn('Invalid explanation request', response['error'])
+
+
+class ModelFileTests(SimpleTestCase):
+    def test_dataframe_fitted_model_predicts_arrays_without_warning(self):
+        df, records = load_sample()
+        features, target = Training().preprocess_data(df)
+        encoder = FeatureEncoder.fit(df, features.columns.tolist())
+        model = RandomForestClassifier(n_estimators=5, random_state=0).fit(features, target)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, 'model.sav')
+        with open(path, 'wb') as f:
+            pickle.dump({'model': model, 'encoder': encoder.to_dict(), 'inference_backend': 'sklearn'}, f)
+
+        loaded, loaded_encoder = Prediction()._read_model_file(path)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            probabilities = loaded.predict_proba(loaded_encoder.transform(records)[0])
+
+        np.testing.assert_allclose(probabilities, model.predict_proba(features))
+
+    def test_rejects_model_with_mismatched_columns(self):
+        df, _ = load_sample()
+        features, target = Training().preprocess_data(df)
+        model = RandomForestClassifier(n_estimators=2, random_state=0).fit(features, target)
+        encoder = FeatureEncoder.from_feature_names(list(reversed(features.columns)))
+
+        with self.assertRaisesRegex(ValueError, 'different columns'):
+            Prediction()._drop_feature_names(model, encoder)
+
+
+def clear_registry():
+    """Drop registry rows the test database's migrations imported from the working directory"""
+    TrainedModel.objects.all().delete()
+    FeatureSchema.objects.all().delete()
+
+
+class ModelRegistryTests(TestCase):
+    features = ['Age', 'OverTime_Yes', 'MonthlyIncome']
+
+    def setUp(self):
+        clear_registry()
+
+    def register(self, model_id, features=None, **kwargs):
+        ModelRegistry().register(
+            model_id=model_id, filename=f"model_{model_id}.sav", timestamp='2024-05-01T12:30:00',
+            params={'n_estimators': 10}, metrics={'f1_score': 0.8}, features=features or self.features, **kwargs)
+
+    def test_registers_and_loads_back(self):
+        self.register('a', inference_backend='compiled', trained_through=1450)
+        info = ModelRegistry().get('a')
+
+        self.assertEqual(info['filename'], 'model_a.sav')
+        self.assertEqual(info['timestamp'], '2024-05-01T12:30:00+00:00')
+        self.assertEqual(info['params'], {'n_estimators': 10})
+        self.assertEqual(info['metrics'], {'f1_score': 0.8})
+        self.assertEqual(info['features'], self.features)
+        self.assertEqual((info['inference_backend'], info['trained_through']), ('compiled', 1450))
+        self.assertNotIn('features', ModelRegistry().get('a', include_features=False))
+        self.assertEqual(ModelRegistry().get_filename('a'), 'model_a.sav')
+
+    def test_feature_schemas_are_shared_by_hash(self):
+        self.register('a')
+        self.register('b')
+        self.register('c', features=list(reversed(self.features)))
+
+        self.assertEqual(FeatureSchema.objects.count(), 2)
+        schemas = dict(TrainedModel.objects.values_list('model_id', 'schema_id'))
+        self.assertEqual(schemas['a'], schemas['b'])
+        self.assertNotEqual(schemas['a'], schemas['c'])
+        self.assertTrue(FeatureSchema.objects.filter(schema_hash=schema_hash(self.features)).exists())
+        self.assertEqual([info['model_id'] for info in ModelRegistry().list()], ['a', 'b', 'c'])
+
+    def test_unknown_model_raises(self):
+        with self.assertRaisesRegex(ValueError, 'not found'):
+            ModelRegistry().get('missing')
+        with self.assertRaisesRegex(ValueError, 'not found'):
+            ModelRegistry().get_filename('missing')
+
+
+class DataMigrationTests(TestCase):
+    def setUp(self):
+        clear_registry()
+
+    def run_migration(self, module, function, *args):
+        getattr(importlib.import_module(f'Attrition.migrations.{module}'), function)(apps, None, *args)
+
+    def test_imports_model_metadata_of_existing_model_files(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        os.makedirs(os.path.join(tmp.name, 'pickle'))
+        features = ['Age', 'OverTime_Yes']
+        with open(os.path.join(tmp.name, 'pickle', 'model_metadata.json'), 'w') as f:
+            json.dump({'models': [
+                {'model_id': 'old-1', 'filename': 'model_old-1.sav', 'timestamp': '2024-01-02T03:04:05',
+                 'params': {'max_depth': 4}, 'metrics': {'accuracy': 0.9}, 'features': features},
+                {'model_id': 'old-2', 'filename': 'model_old-2.sav', 'timestamp': '2024-01-03T03:04:05+00:00',
+                 'features': features, 'inference_backend': 'compiled'}
+            ]}, f)
+
+        cwd = os.getcwd()
+        os.chdir(tmp.name)
+        self.addCleanup(os.chdir, cwd)
+        self.run_migration('0003_import_model_metadata', 'import_model_metadata')
+        # Already registered ids are skipped, so the migration can be re-run
+        self.run_migration('0003_import_model_metadata', 'import_model_metadata')
+
+        self.assertEqual(TrainedModel.objects.count(), 2)
+        self.assertEqual(FeatureSchema.objects.count(), 1)
+        old = ModelRegistry().get('old-1')
+        self.assertEqual((old['filename'], old['timestamp']), ('model_old-1.sav', '2024-01-02T03:04:05+00:00'))
+        self.assertEqual(old['features'], features)
+        self.assertEqual(ModelRegistry().get('old-2')['inference_backend'], 'compiled')
+
+    def test_missing_metadata_file_is_a_no_op(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        cwd = os.getcwd()
+        os.chdir(tmp.name)
+        self.addCleanup(os.chdir, cwd)
+
+        self.run_migration('0003_import_model_metadata', 'import_model_metadata')
+        self.assertFalse(TrainedModel.objects.exists())
+
+    def test_normalizes_boolean_attrition_values(self):
+        _, records = load_sample(rows=4)
+        values = ['True', '0', 'Yes', 'false']
+        create_employees([dict(record, Attrition=value) for record, value in zip(records, values)])
+
+        self.run_migration('0005_normalize_attrition', 'normalize_attrition')
+
+        self.assertEqual(list(EmployeeData.objects.order_by('EmployeeNumber').values_list('Attrition', flat=True)),
+                         ['Yes', 'No', 'Yes', 'No'])
+
+
+@override_settings(TRAINING_ROWS=200)
+class ModelComparisonTests(TestCase):
+    selected = ['Age', 'OverTime_Yes', 'MonthlyIncome', 'JobLevel']
+
+    @classmethod
+    def setUpTestData(cls):
+        df, records = load_sample(rows=250)
+        create_employees(records)
+        cls.holdout = df.iloc[200:]
+        training = df.iloc[:200]
+        cls.models = {}
+        for model_id, selected in (('a', None), ('b', cls.selected)):
+            features, target = Training().preprocess_data(training, selected)
+            names = features.columns.tolist()
+            cls.models[model_id] = (fit_forest(features, target), FeatureEncoder.fit(training, names))
+
+    def setUp(self):
+        clear_registry()
+        for model_id, (_, encoder) in self.models.items():
+            ModelRegistry().register(
+                model_id=model_id, filename=f"model_{model_id}.sav", timestamp='2024-05-01T12:30:00',
+                params={'n_estimators': 25}, metrics={'f1_score': 0.8}, features=encoder.feature_names)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        original = Prediction.load_model
+
+        def load_model(predictor, model_id):
+            if model_id == 'broken':
+                raise ValueError("Model file model_broken.sav not found")
+            return self.models[model_id] if model_id in self.models else original(predictor, model_id)
+
+        for patcher in (
+            mock.patch('Attrition.services.comparison.feature_store', FeatureStore(directory=tmp.name)),
+            mock.patch.object(Prediction, 'load_model', autospec=True, side_effect=load_model),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def compare(self, model_ids, **options):
+        request_data = dict({'model_ids': model_ids}, **options)
+        return ModelComparison().compare(mock.Mock(body=json.dumps(request_data).encode()))
+
+    def test_models_share_one_holdout_encoding(self):
+        with mock.patch.object(ModelComparison, 'load_holdout', autospec=True,
+                               side_effect=ModelComparison.load_holdout) as load_holdout:
+            response = self.compare(['a', 'b'], metric='accuracy')
+
+        self.assertEqual(response['status'], 200, response['error'])
+        load_holdout.assert_called_once()
+        result = response['response']
+        self.assertEqual(result['holdout']['rows'], len(self.holdout))
+        self.assertEqual(result['holdout']['first_employee_number'], int(self.holdout['EmployeeNumber'].iloc[0]))
+        target = (self.holdout['Attrition'] == 'Yes').astype(int).to_numpy()
+        for entry in result['models']:
+            model, encoder = self.models[entry['model_id']]
+            matrix, _, _ = encoder.transform(self.holdout.to_dict('records'))
+            probabilities = model.predict_proba(matrix)[:, 1]
+            self.assertEqual(entry['metrics']['accuracy'], accuracy_score(target, (probabilities > 0.5).astype(int)))
+        best = max(result['models'], key=lambda entry: entry['metrics']['accuracy'])
+        self.assertEqual(result['best_model_id'], best['model_id'])
+
+    def test_errors_are_per_model_and_results_keep_request_order(self):
+        misses = model_cache.misses
+        response = self.compare(['b', 'unknown', 'a', 'broken', 'b'])
+
+        self.assertEqual(response['status'], 200, response['error'])
+        models = response['response']['models']
+        self.assertEqual([entry['model_id'] for entry in models], ['b', 'unknown', 'a', 'broken'])
+        self.assertIn('not found', models[1]['error'])
+        self.assertEqual(models[3]['error'], "Model file model_broken.sav not found")
+        self.assertTrue(all(models[i]['error'] is None and models[i]['metrics'] for i in (0, 2)))
+        # An unknown id fails in the registry, before the model cache counts a miss
+        self.assertEqual(model_cache.misses, misses)
+
+    def test_stored_predictions_stay_out_of_risk_scores(self):
+        response = self.compare(['a', 'b'], store_predictions=True)
+        self.compare(['a'], store_predictions=True)
+
+        self.assertEqual(response['status'], 200, response['error'])
+        version = response['response']['holdout']['data_version']
+        self.assertEqual([entry['stored'] for entry in response['response']['models']], [50, 50])
+        self.assertFalse(RiskScore.objects.exists())
+        for model_id in ('a', 'b'):
+            stored = HoldoutPrediction.objects.filter(model_id=model_id)
+            self.assertEqual(stored.count(), 50)
+            self.assertEqual(set(stored.values_list('data_version', flat=True)), {version})
+        employee = int(self.holdout['EmployeeNumber'].iloc[0])
+        self.assertEqual(HoldoutPrediction.objects.get(model_id='a', employee_id=employee).actual,
+                         self.holdout['Attrition'].iloc[0])
+
+    def test_invalid_options_are_bad_requests(self):
+        for options in ({'model_ids': []}, {'model_ids': ['a'], 'store_predictions': 'yes'},
+                        {'model_ids': ['a'], 'metric': 'auc'}):
+            response = ModelComparison().compare(mock.Mock(body=json.dumps(options).encode()))
+
+            self.assertEqual(response['status'], 400, options)
+            self.assertIn('Invalid comparison request', response['error'])
+            self.assertFalse(HoldoutPrediction.objects.exists())
@@ -1,20 +1,44 @@
 from django.urls import path
 from .views import (
     TrainChurnModelView, 
+    TrainSweepView,
+    TrainIncrementalView,
+    TrainingJobListView,
+    TrainingJobDetailView,
     PredChurnModelView, 
+    PredBatchChurnModelView,
+    ExplainChurnModelView,
+    predict_async,
+    metrics,
     get_prefilled_prediction_data, 
     get_employee_details,
     ModelListView,
     ModelDetailView,
+    ModelCacheView,
+    ModelCompareView,
+    PromoteModelView,
+    RiskScoreListView,
     add_employee 
 )
 
 urlpatterns = [
     path('training/', TrainChurnModelView.as_view(), name='model_training'),
+    path('training/sweep/', TrainSweepView.as_view(), name='model-sweep'),
+    path('training/incremental/', TrainIncrementalView.as_view(), name='model-incremental'),
+    path('training/jobs/', TrainingJobListView.as_view(), name='training-job-list'),
+    path('training/jobs/<uuid:job_id>/', TrainingJobDetailView.as_view(), name='training-job-detail'),
     path('prediction/', PredChurnModelView.as_view(), name='model_prediction'),
+    path('prediction/batch/', PredBatchChurnModelView.as_view(), name='model_prediction_batch'),
+    path('prediction/async/', predict_async, name='model_prediction_async'),
+    path('prediction/explain/', ExplainChurnModelView.as_view(), name='model_prediction_explain'),
     path('models/', ModelListView.as_view(), name='model-list'),
+    path('models/cache/', ModelCacheView.as_view(), name='model-cache'),
+    path('models/compare/', ModelCompareView.as_view(), name='model-compare'),
     path('models/<uuid:model_id>/', ModelDetailView.as_view(), name='model-detail'),
+    path('models/<uuid:model_id>/promote/', PromoteModelView.as_view(), name='model-promote'),
+    path('risk-scores/', RiskScoreListView.as_view(), name='risk-scores'),
     path('prediction/prefilled-predictions/', get_prefilled_prediction_data),
     path('prediction/prefilled-predictions/<int:employee_number>/', get_employee_details),
     path('employees/add/', add_employee, name='add-employee'),
+    path('metrics', metrics, name='metrics'),
 ]
\ No newline at end of file
@@ -2,44 +2,126 @@ from django.shortcuts import render
 from rest_framework.response import Response 
 from rest_framework.views import APIView
 from Attrition.services.prediction import Prediction
+from Attrition.services.explanation import Explanation, explainer_cache, explanation_cache
+from Attrition.services.comparison import ModelComparison
 from Attrition.services.training import Training 
+from Attrition.services.imbalance import ImbalanceStrategy
+from Attrition.services.model_cache import model_cache
+from Attrition.services.result_cache import result_cache
+from Attrition.services.jobs import training_queue, QueueFullError
+from Attrition.services.inference_pool import inference_pool, PoolSaturatedError
+from Attrition.services.metrics import render_metrics
+from django.http import HttpResponse, JsonResponse
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from .models import EmployeeData
-import pandas as pd
+from .models import EmployeeData, TrainingJob
 from .serializers import EmployeeDataSerializer, EmployeeCreateSerializer
 from rest_framework import status
 import json
+from django.conf import settings
+from Attrition.services.loader import bump_employee_data_version, holdout_start
+from Attrition.services.risk import RiskScoring
+import logging
+
+logger = logging.getLogger(__name__)
+
+def submit_training_job(request_data):
+    """Validate a training request and queue it; 202 with the job, which clients poll"""
+    # Reject bad options now rather than as a failed job later
+    try:
+        ImbalanceStrategy.from_options(request_data.get('imbalance', None))
+    except ValueError as e:
+        return Response(
+            {'error': str(e), 'response': 'Invalid training request'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        job = training_queue.submit(request_data)
+        return Response(training_queue.to_dict(job), status=status.HTTP_202_ACCEPTED)
+    except QueueFullError as e:
+        return Response(
+            {'error': str(e), 'response': 'Training queue is full'},
+            status=status.HTTP_429_TOO_MANY_REQUESTS
+        )
+    except Exception as e:
+        return Response(
+            {'error': str(e), 'response': 'Training failed'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
 
 class TrainChurnModelView(APIView):
+    def post(self, request):
+        # Training runs on the job queue; poll /training/jobs/<job_id>/ for the result
+        return submit_training_job(request.data)
+
+class TrainSweepView(APIView):
     def post(self, request):
         try:
             # Initialize training service
             train_obj = Training()
-            
-            # Get training configuration from request
-            request_data = request.data
-            model_params = request_data.get('model_params', {})
-            features = request_data.get('features', None)
-            
+
             # Create a mock request object compatible with your existing training service
             class MockRequest:
                 def __init__(self, data):
                     self.body = json.dumps(data).encode('utf-8')
-            
-            mock_request = MockRequest(request_data)
-            
-            # Execute training
-            response_dict = train_obj.train(mock_request)
-            
+
+            mock_request = MockRequest(request.data)
+
+            # Execute the sweep
+            response_dict = train_obj.sweep(mock_request)
+
             return Response(response_dict, status=response_dict.get('status', status.HTTP_200_OK))
-            
+
+        except Exception as e:
+            return Response(
+                {'error': str(e), 'response': 'Sweep failed'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+class TrainIncrementalView(APIView):
+    def post(self, request):
+        try:
+            # Initialize training service
+            train_obj = Training()
+
+            # Create a mock request object compatible with your existing training service
+            class MockRequest:
+                def __init__(self, data):
+                    self.body = json.dumps(data).encode('utf-8')
+
+            mock_request = MockRequest(request.data)
+
+            # Grow the parent model with trees for new employees
+            response_dict = train_obj.train_incremental(mock_request)
+
+            return Response(response_dict, status=response_dict.get('status', status.HTTP_200_OK))
+
         except Exception as e:
             return Response(
-                {'error': str(e), 'response': 'Training failed'},
+                {'error': str(e), 'response': 'Incremental training failed'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+class TrainingJobListView(APIView):
+    def get(self, request):
+        jobs = TrainingJob.objects.all()[:50]
+        return Response({'jobs': [training_queue.to_dict(job) for job in jobs]}, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        return submit_training_job(request.data)
+
+class TrainingJobDetailView(APIView):
+    def get(self, request, job_id):
+        try:
+            job = TrainingJob.objects.get(job_id=job_id)
+            return Response(training_queue.to_dict(job), status=status.HTTP_200_OK)
+        except TrainingJob.DoesNotExist:
+            return Response(
+                {'error': f"Training job {job_id} not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
 class PredChurnModelView(APIView): 
     def post(self, request):
         try:
@@ -69,6 +151,83 @@ class PredChurnModelView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+class PredBatchChurnModelView(APIView):
+    def post(self, request):
+        try:
+            # Initialize prediction service
+            pred_obj = Prediction()
+
+            # Create a mock request object compatible with your existing prediction service
+            class MockRequest:
+                def __init__(self, data):
+                    self.body = json.dumps(data).encode('utf-8')
+
+            mock_request = MockRequest(request.data)
+
+            # Execute batch prediction
+            response_dict = pred_obj.predict_batch(mock_request)
+
+            return Response(response_dict, status=response_dict.get('status', status.HTTP_200_OK))
+
+        except Exception as e:
+            return Response(
+                {'error': str(e), 'response': 'Prediction failed'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+class ExplainChurnModelView(APIView):
+    def post(self, request):
+        try:
+            # Initialize explanation service
+            explain_obj = Explanation()
+
+            # Create a mock request object compatible with your existing prediction service
+            class MockRequest:
+                def __init__(self, data):
+                    self.body = json.dumps(data).encode('utf-8')
+
+            mock_request = MockRequest(request.data)
+
+            # Execute explanation
+            response_dict = explain_obj.explain(mock_request)
+
+            return Response(response_dict, status=response_dict.get('status', status.HTTP_200_OK))
+
+        except Exception as e:
+            return Response(
+                {'error': str(e), 'response': 'Explanation failed'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+async def predict_async(request):
+    """Prediction served from the ASGI event loop; the model runs on the bounded inference pool"""
+    if request.method != 'POST':
+        return JsonResponse({'error': "Method not allowed"}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    try:
+        # Prediction.predict only reads request.body, which is already buffered
+        response_dict = await inference_pool.run(Prediction().predict, request)
+        return JsonResponse(response_dict, status=response_dict.get('status', status.HTTP_200_OK))
+    except PoolSaturatedError as e:
+        response = JsonResponse(
+            {'error': str(e), 'response': 'Prediction failed'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        response['Retry-After'] = str(e.retry_after)
+        return response
+    except Exception as e:
+        return JsonResponse(
+            {'error': str(e), 'response': 'Prediction failed'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+# Called with JSON like the DRF views, which are exempt as well
+predict_async.csrf_exempt = True
+
+def metrics(request):
+    """Prometheus scrape endpoint covering every worker process"""
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
+
 class ModelListView(APIView):
     def get(self, request):
         try:
@@ -81,6 +240,87 @@ class ModelListView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+class ModelCacheView(APIView):
+    def get(self, request):
+        stats = model_cache.stats()
+        stats['results'] = result_cache.stats() if result_cache is not None else None
+        stats['explainers'] = explainer_cache.stats()
+        stats['explanations'] = explanation_cache.stats() if explanation_cache is not None else None
+        return Response(stats, status=status.HTTP_200_OK)
+
+class ModelCompareView(APIView):
+    def post(self, request):
+        try:
+            # Initialize comparison service
+            compare_obj = ModelComparison()
+
+            # Create a mock request object compatible with your existing prediction service
+            class MockRequest:
+                def __init__(self, data):
+                    self.body = json.dumps(data).encode('utf-8')
+
+            mock_request = MockRequest(request.data)
+
+            # Score every model on the shared holdout
+            response_dict = compare_obj.compare(mock_request)
+
+            return Response(response_dict, status=response_dict.get('status', status.HTTP_200_OK))
+
+        except Exception as e:
+            return Response(
+                {'error': str(e), 'response': 'Comparison failed'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+class PromoteModelView(APIView):
+    def post(self, request, model_id):
+        try:
+            scored = RiskScoring().promote(str(model_id))
+            return Response({'model_id': str(model_id), 'scored': scored}, status=status.HTTP_200_OK)
+        except ValueError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+class RiskScoreListView(APIView):
+    def get(self, request):
+        # ?model_id=&threshold=&department=&cursor=&page_size=
+        try:
+            threshold = request.query_params.get('threshold')
+            threshold = float(threshold) if threshold else None
+            page_size = int(request.query_params.get('page_size', settings.PREFILLED_PAGE_SIZE))
+            page_size = max(1, min(page_size, settings.PREFILLED_MAX_PAGE_SIZE))
+            cursor = request.query_params.get('cursor')
+            if cursor:
+                probability, employee_number = cursor.split(':')
+                cursor = (float(probability), int(employee_number))
+        except ValueError:
+            return Response({'error': "Invalid threshold, page_size or cursor"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            model_id, scores, next_cursor = RiskScoring().query(
+                model_id=request.query_params.get('model_id'),
+                threshold=threshold,
+                department=request.query_params.get('department'),
+                cursor=cursor or None,
+                page_size=page_size
+            )
+            return Response({
+                'model_id': model_id,
+                'results': scores,
+                'next_cursor': next_cursor
+            }, status=status.HTTP_200_OK)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 class ModelDetailView(APIView):
     def get(self, request, model_id):
         try:
@@ -101,11 +341,32 @@ class ModelDetailView(APIView):
 @api_view(['GET'])
 def get_prefilled_prediction_data(request):
     try:
-        all_data = EmployeeData.objects.all().order_by("EmployeeNumber")
-        df = pd.DataFrame(list(all_data.values()))
-        prefilled_data = df.iloc[1450:]
-        employee_numbers = prefilled_data["EmployeeNumber"].tolist()
-        formatted_response = [{"employeeNumber": num} for num in employee_numbers]
+        # Keyset pagination over holdout employees: ?cursor=<last EmployeeNumber>&page_size=N
+        try:
+            page_size = int(request.query_params.get('page_size', settings.PREFILLED_PAGE_SIZE))
+            page_size = max(1, min(page_size, settings.PREFILLED_MAX_PAGE_SIZE))
+            cursor = request.query_params.get('cursor')
+            cursor = int(cursor) if cursor else None
+        except ValueError:
+            return Response({"error": "cursor and page_size must be integers"}, status=400)
+
+        start = holdout_start()
+        employee_numbers = []
+        if start is not None:
+            qs = EmployeeData.objects.filter(EmployeeNumber__gte=start)
+            if cursor is not None:
+                qs = qs.filter(EmployeeNumber__gt=cursor)
+            employee_numbers = list(
+                qs.order_by("EmployeeNumber").values_list("EmployeeNumber", flat=True)[:page_size + 1]
+            )
+
+        has_more = len(employee_numbers) > page_size
+        employee_numbers = employee_numbers[:page_size]
+        formatted_response = {
+            "results": [{"employeeNumber": num} for num in employee_numbers],
+            "next_cursor": employee_numbers[-1] if has_more else None,
+            "page_size": page_size
+        }
         return Response(formatted_response, status=200)
     except Exception as e:
         return Response({"error": str(e)}, status=500)
@@ -139,6 +400,13 @@ def add_employee(request):
         if serializer.is_valid():
             # Save with the new employee number
             employee = serializer.save(EmployeeNumber=new_employee_number)
+            bump_employee_data_version()
+
+            # Score the new employee with the promoted model; the insert stands either way
+            try:
+                RiskScoring().rescore([new_employee_number])
+            except Exception as e:
+                logger.error(f"Risk rescoring failed for employee {new_employee_number}: {str(e)}")
             
             # Return success response with full employee data
             return Response({
@@ -0,0 +1,117 @@
+"""
+Logging handlers and filters referenced from LOGGING in settings.py.
+
+Records are put on a bounded in-memory queue by the request thread and
+written as JSON lines by a background listener thread, so request paths
+never wait on the disk. When the queue is full new records are dropped
+and counted rather than blocking the caller.
+"""
+
+import json
+import queue
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# LogRecord attributes that are not user-supplied extra fields
+RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'suppressed'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including any extra= fields"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'process': record.process,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        if getattr(record, 'suppressed', 0):
+            entry['suppressed'] = record.suppressed
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket for records below WARNING; warnings and errors always pass.
+
+    The number of records suppressed since the last one let through is
+    attached to it as `suppressed`.
+    """
+
+    def __init__(self, rate=20, burst=None):
+        super().__init__()
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                self._suppressed += 1
+                return False
+            self._tokens -= 1
+            record.suppressed, self._suppressed = self._suppressed, 0
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler over a bounded queue that drops records instead of blocking"""
+
+    def __init__(self, maxsize=10000):
+        super().__init__(queue.Queue(maxsize=maxsize))
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Resolve the message now (args may change later); exc_info is kept
+        # and formatted by the listener thread
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            from Attrition.services.metrics import LOG_RECORDS_DROPPED
+            LOG_RECORDS_DROPPED.inc()
+
+
+class QueuedFileHandler(DroppingQueueHandler):
+    """Appends JSON lines to filename from a background listener thread"""
+
+    def __init__(self, filename, maxsize=10000):
+        super().__init__(maxsize)
+        self.target = logging.FileHandler(filename, delay=True)
+        self.target.setFormatter(JsonFormatter())
+        self.listener = QueueListener(self.queue, self.target, respect_handler_level=False)
+        self.listener.start()
+        # Flush what is still queued when the process exits
+        atexit.register(self.close)
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+            self.target.close()
+        super().close()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -80,7 +81,8 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        # Overridable so tools like the loadtest command can run against a scratch copy
+        'NAME': os.environ.get('ATTRITION_DB_PATH', BASE_DIR / 'db.sqlite3'),
     }
 }
 
@@ -127,3 +129,134 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CORS_ALLOW_ALL_ORIGINS = True
+
+# In-process model cache used by the prediction service
+MODEL_CACHE_MAX_MODELS = 4
+MODEL_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Prediction result cache keyed by model and encoded feature vector: 'local'
+# (per-process LRU), 'django' (the CACHES alias below, shared by workers) or None
+PREDICTION_RESULT_CACHE = 'local'
+PREDICTION_RESULT_CACHE_ALIAS = 'default'
+PREDICTION_RESULT_CACHE_TTL = 300
+PREDICTION_RESULT_CACHE_MAX_ENTRIES = 10000
+
+# Explanations (POST /prediction/explain/): per-model path structures kept per
+# process; results are cached like predictions, under their own key prefix
+EXPLAINER_CACHE_MAX_MODELS = 2
+
+# Model comparison (POST /models/compare/): most models per request and the
+# threads scoring them on the shared holdout matrix
+COMPARE_MAX_MODELS = 10
+COMPARE_MAX_WORKERS = 4
+
+# Default inference backend for models that don't choose one at training time:
+# 'sklearn' uses the pickled estimator, 'compiled' the flattened forest arrays
+PREDICTION_BACKEND = 'sklearn'
+
+# Batch prediction (POST /prediction/batch/): most records or employee numbers
+# accepted per request; larger batches get a 400
+PREDICTION_BATCH_MAX_ROWS = 10000
+
+# Async prediction (POST /prediction/async/): threads running predictions per
+# process, the most predictions admitted at once (running or waiting) before
+# requests get a 503, and the Retry-After seconds sent with it
+PREDICTION_MAX_WORKERS = 2
+PREDICTION_MAX_IN_FLIGHT = 16
+PREDICTION_RETRY_AFTER = 1
+
+# Background training jobs (POST /training/jobs/): worker processes, the most
+# jobs allowed queued or running at once, and the per-job forest n_jobs and
+# niceness so training leaves CPU for prediction requests
+TRAINING_MAX_WORKERS = 1
+TRAINING_MAX_PENDING_JOBS = 4
+TRAINING_JOB_N_JOBS = 1
+TRAINING_WORKER_NICE = 10
+# Seconds a job may stay queued or running before it is treated as orphaned
+# (crashed worker, restarted server) and marked failed on the next submit
+TRAINING_JOB_TIMEOUT = 2 * 60 * 60
+
+# Hyperparameter sweeps (POST /training/sweep/): fit processes and the largest
+# number of parameter combinations accepted per request
+SWEEP_MAX_WORKERS = 4
+SWEEP_MAX_CANDIDATES = 64
+
+# Cross-validated training (cross_validation on POST /training/): folds are fit
+# in up to SWEEP_MAX_WORKERS processes; largest fold count accepted
+TRAINING_CV_MAX_FOLDS = 10
+
+# Forest trimming (trim on POST /training/): fewest trees a trimmed model may
+# keep unless the request sets min_trees
+TRIM_MIN_TREES = 10
+
+# Employees (ordered by EmployeeNumber) used for training; later rows form the
+# holdout listed under /prediction/prefilled-predictions/
+TRAINING_ROWS = 1450
+PREFILLED_PAGE_SIZE = 100
+PREFILLED_MAX_PAGE_SIZE = 1000
+
+# Check the sha256 of memory-mapped .forest model artifacts when they are opened
+MODEL_ARTIFACT_VERIFY = True
+
+# Encoded training matrix cache, versioned by the training range's row count,
+# last EmployeeNumber and the employee data version (manage.py
+# verify_feature_store checks it against a full hash of the rows);
+# None stores it under pickle/features in the working directory
+FEATURE_STORE_DIR = None
+FEATURE_STORE_KEEP_VERSIONS = 2
+
+# Logging: JSON lines written by a background thread from a bounded queue
+# (records are dropped, not waited on, when it is full). Info records from
+# the prediction path are rate-limited per process; warnings always pass.
+LOG_DIR = os.environ.get('ATTRITION_LOG_DIR', os.path.join(os.getcwd(), 'log'))
+LOG_QUEUE_SIZE = 10000
+PREDICTION_LOG_RATE = 20  # info records per second
+
+os.makedirs(LOG_DIR, exist_ok=True)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'prediction_rate': {
+            '()': 'backend.logs.RateLimitFilter',
+            'rate': PREDICTION_LOG_RATE
+        }
+    },
+    'handlers': {
+        'prediction_file': {
+            '()': 'backend.logs.QueuedFileHandler',
+            'filename': os.path.join(LOG_DIR, 'prediction.log'),
+            'maxsize': LOG_QUEUE_SIZE
+        },
+        'training_file': {
+            '()': 'backend.logs.QueuedFileHandler',
+            'filename': os.path.join(LOG_DIR, 'training.log'),
+            'maxsize': LOG_QUEUE_SIZE
+        }
+    },
+    'loggers': {
+        'Attrition': {
+            'handlers': ['prediction_file'],
+            'level': 'INFO'
+        },
+        'Attrition.services.prediction': {
+            'filters': ['prediction_rate']
+        },
+        'Attrition.services.result_cache': {
+            'filters': ['prediction_rate']
+        },
+        'Attrition.services.model_cache': {
+            'filters': ['prediction_rate']
+        },
+        'Attrition.services.explanation': {
+            'filters': ['prediction_rate']
+        }
+    }
+}
+
+for _name in ('training', 'trimming', 'sweep', 'jobs', 'importer', 'registry', 'artifact', 'feature_store', 'imbalance'):
+    LOGGING['loggers'][f'Attrition.services.{_name}'] = {
+        'handlers': ['training_file'],
+        'propagate': False
+    }
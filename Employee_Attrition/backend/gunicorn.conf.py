@@ -0,0 +1,18 @@
+# Loaded automatically by gunicorn from the working directory (/app in the image)
+import os
+import glob
+
+
+def on_starting(server):
+    """Clear Prometheus samples left by a previous run"""
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        for path in glob.glob(os.path.join(directory, '*.db')):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    """Drop live gauges of a worker that exited"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,11 +1,12 @@
 import React, { useEffect, useState } from "react";
 import { useParams } from "react-router-dom";
-import { getEmployeeDetails, predictAttrition, getAvailableModels } from "../utils/httpsUtil";
+import { getEmployeeDetails, predictAttrition, explainPrediction, getAvailableModels } from "../utils/httpsUtil";
 
 const EmployeeDetails = () => {
     const { employeeNumber } = useParams();
     const [details, setDetails] = useState(null);
     const [predictionResult, setPredictionResult] = useState(null);
+    const [explanation, setExplanation] = useState(null);
     const [availableModels, setAvailableModels] = useState([]);
     const [selectedModel, setSelectedModel] = useState("");
     const [isLoading, setIsLoading] = useState(false);
@@ -35,12 +36,21 @@ const EmployeeDetails = () => {
         
         setIsLoading(true);
         setPredictionResult(null);
+        setExplanation(null);
         try {
-            const result = await predictAttrition({
-                model_id: selectedModel,
-                data: details
-            });
+            const [result, factors] = await Promise.all([
+                predictAttrition({
+                    model_id: selectedModel,
+                    data: details
+                }),
+                explainPrediction({
+                    model_id: selectedModel,
+                    employee_number: Number(employeeNumber),
+                    top_n: 5
+                }).catch(() => null)
+            ]);
             setPredictionResult(result);
+            setExplanation(factors);
         } catch (error) {
             setPredictionResult({ error: error.message });
         } finally {
@@ -136,6 +146,21 @@ const EmployeeDetails = () => {
                                     <p className="text-lg">
                                         <strong>Confidence:</strong> {predictionResult.confidence}
                                     </p>
+                                    {explanation && (
+                                        <div className="mt-3">
+                                            <h4 className="font-semibold mb-1">Main Factors</h4>
+                                            <ul className="text-sm">
+                                                {explanation.contributions.map((factor) => (
+                                                    <li key={factor.feature} className="flex justify-between">
+                                                        <span>{factor.feature}: {String(factor.value)}</span>
+                                                        <span className={factor.contribution > 0 ? "text-red-600" : "text-green-600"}>
+                                                            {factor.contribution > 0 ? "+" : ""}{(factor.contribution * 100).toFixed(1)}%
+                                                        </span>
+                                                    </li>
+                                                ))}
+                                            </ul>
+                                        </div>
+                                    )}
                                     <p className="text-xs text-gray-500 mt-2">
                                         Model ID: {predictionResult.model_id}
                                     </p>
@@ -4,17 +4,21 @@ import Card from "./Card";
 
 function PredictionData(){
     const [data,setData]=useState([]);
+    const [nextCursor,setNextCursor]=useState(null);
 
-    useEffect(() => {
-        const fetchData = async () => {
-            try {
-                const response = await predictData();
-                setData(response); 
-            } catch (error) {
-                console.error("Error fetching prediction data:", error);
+    const fetchData = async (cursor = null) => {
+        try {
+            const response = await predictData(cursor);
+            if (response) {
+                setData(prev => cursor ? [...prev, ...response.results] : response.results);
+                setNextCursor(response.next_cursor);
             }
-        };
-    
+        } catch (error) {
+            console.error("Error fetching prediction data:", error);
+        }
+    };
+
+    useEffect(() => {
         fetchData();
     }, []);
 
@@ -33,6 +37,18 @@ function PredictionData(){
                     </div>
                 )
             }
+            {
+                nextCursor && (
+                    <div className="flex justify-center m-4">
+                        <button
+                            onClick={() => fetchData(nextCursor)}
+                            className="px-6 py-3 bg-blue-500 text-white rounded-lg hover:bg-blue-700"
+                        >
+                            Load more
+                        </button>
+                    </div>
+                )
+            }
 
         </>
     );
@@ -6,14 +6,27 @@ const BASE_URL = process.env.NODE_ENV === 'production'
   : 'http://localhost:8001';
 
 // Training-related functions
+const TRAINING_POLL_INTERVAL_MS = 2000;
+
+// Training runs as a queued job: submit it, then poll until it is done or failed
 export const trainModel = async (trainingConfig) => {
+  let job;
   try {
     const response = await axios.post(`${BASE_URL}/training/`, trainingConfig);
-    return response.data;
+    job = response.data;
+    while (job.status === "queued" || job.status === "running") {
+      await new Promise((resolve) => setTimeout(resolve, TRAINING_POLL_INTERVAL_MS));
+      const poll = await axios.get(`${BASE_URL}/training/jobs/${job.job_id}/`);
+      job = poll.data;
+    }
   } catch (error) {
     console.error("Error during training:", error);
-    throw new Error(error.response?.data?.response || "Training failed");
+    throw new Error(error.response?.data?.error || error.response?.data?.response || "Training failed");
   }
+  if (job.status === "failed") {
+    throw new Error(job.error || "Training failed");
+  }
+  return job;
 };
 
 export const getAvailableModels = async () => {
@@ -29,7 +42,7 @@ export const getAvailableModels = async () => {
 // Prediction-related functions
 export const predictAttrition = async (predictionRequest) => {
   try {
-    const response = await axios.post(`${BASE_URL}/prediction/`, predictionRequest);
+    const response = await axios.post(`${BASE_URL}/prediction/async/`, predictionRequest);
     return response.data.response;
   } catch (error) {
     console.error("Error during prediction:", error);
@@ -37,9 +50,21 @@ export const predictAttrition = async (predictionRequest) => {
   }
 };
 
-export const getPrefilledPredictions = async () => {
+export const explainPrediction = async (explanationRequest) => {
+  try {
+    const response = await axios.post(`${BASE_URL}/prediction/explain/`, explanationRequest);
+    return response.data.response;
+  } catch (error) {
+    console.error("Error during explanation:", error);
+    throw new Error(error.response?.data?.error || "Explanation failed");
+  }
+};
+
+export const getPrefilledPredictions = async (cursor = null) => {
   try {
-    const response = await axios.get(`${BASE_URL}/prediction/prefilled-predictions/`);
+    const response = await axios.get(`${BASE_URL}/prediction/prefilled-predictions/`, {
+      params: cursor ? { cursor } : {},
+    });
     return response.data;
   } catch (error) {
     console.error("Error during fetching prediction data:", error);
@@ -70,9 +95,11 @@ export const getModelDetails = async (modelId) => {
   }
 };
 
-export const predictData = async () => {
+export const predictData = async (cursor = null) => {
   try {
-    const response = await axios.get(`${BASE_URL}/prediction/prefilled-predictions/`);
+    const response = await axios.get(`${BASE_URL}/prediction/prefilled-predictions/`, {
+      params: cursor ? { cursor } : {},
+    });
     return response.data;
   } catch (error) {
     console.error("Error during fetching prediction data:", error);